@@ -0,0 +1,321 @@
+# etl/bench.py
+"""
+Offline micro-benchmarks for the ETL hot paths.
+
+    python -m etl.bench download --files 200 --size-kb 512 --latency-ms 50 --connections 64
+    python -m etl.bench ranged --size-mb 128 --bandwidth-mbps 20 --splits 1,4,8
+    python -m etl.bench transform --files 300 --rows 366
+    python -m etl.bench scaling --files 2000 --processes 1,2,4,8,16,32
+    python -m etl.bench memory --files 1000 --rows 366
+    python -m etl.bench documents --files 300 --batch 5000
+
+Everything runs against local stand-ins (no network, no MongoDB), so numbers
+are comparable between commits on the same machine.
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+import requests
+
+from etl.downloader.engine import DownloadEngine
+from etl.downloader.http_downloader import HTTPDownloader
+from etl.loader.preparer import DefaultRecordPreparer
+from etl.tests.gsod_sample import station_rows, to_csv
+from etl.transformer.builder import VALIDATION_TIERS, PydanticRecordBuilder
+from etl.transformer.columnar import ColumnarReader
+from etl.transformer.concurrent import ConcurrentTransformer
+from etl.transformer.parser import CsvParser
+from etl.transformer.reader import CsvReader
+
+
+def _report(label: str, n_bytes: int, elapsed: float, threads: int) -> None:
+    print(
+        f"{label:<26} {n_bytes / 1e6:9.1f} MB in {elapsed:6.2f}s "
+        f"→ {n_bytes / 1e6 / elapsed:8.1f} MB/s  (peak {threads} threads)"
+    )
+
+
+@contextmanager
+def _stub_server(extra_args: List[str]) -> Iterator[str]:
+    """Run etl.tests.http_stub in its own process and yield its base URL."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "etl.tests.http_stub", *extra_args],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        yield proc.stdout.readline().strip()
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+class _PeakThreads:
+    def __init__(self) -> None:
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._t = threading.Thread(target=self._watch, daemon=True)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count() - 1)
+
+    def __enter__(self) -> "_PeakThreads":
+        self._t.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._t.join()
+
+
+def bench_download(args: argparse.Namespace) -> None:
+    years = list(range(1, args.files + 1))
+    total = args.size_kb * 1024 * len(years)
+    stub_args = ["--files", str(args.files), "--size-kb", str(args.size_kb),
+                 "--latency-ms", str(args.latency_ms)]
+
+    with _stub_server(stub_args) as url, tempfile.TemporaryDirectory() as tmp:
+        # baseline: what HTTPDownloader used to do – a fresh connection per
+        # request, 8 KiB writes, one thread per in-flight transfer
+        def fetch_one(y: int) -> None:
+            resp = requests.get(f"{url}/{y}.tar.gz", stream=True, timeout=60)
+            with open(Path(tmp) / f"base-{y}", "wb") as f:
+                for chunk in resp.iter_content(chunk_size=8192):
+                    f.write(chunk)
+
+        with _PeakThreads() as peak:
+            tic = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.threads) as exe:
+                list(exe.map(fetch_one, years))
+            elapsed = time.perf_counter() - tic
+        _report(f"requests, {args.threads} threads", total, elapsed, peak.peak)
+
+        with DownloadEngine(max_connections=args.connections, buffer_size=args.buffer_kb << 10) as engine:
+            dl = HTTPDownloader(base_url=url, retry_wait=0, engine=engine)
+            with _PeakThreads() as peak:
+                tic = time.perf_counter()
+                got = dl.download_years(years, Path(tmp) / "engine", max_workers=args.connections)
+                elapsed = time.perf_counter() - tic
+            assert len(got) == len(years), "engine run lost transfers"
+        _report(f"engine, {args.connections} connections", total, elapsed, peak.peak)
+
+
+def bench_ranged(args: argparse.Namespace) -> None:
+    size = args.size_mb << 20
+    stub_args = ["--files", "1", "--size-kb", str(size >> 10), "--latency-ms", str(args.latency_ms),
+                 "--bandwidth-mbps", str(args.bandwidth_mbps)]
+
+    with _stub_server(stub_args) as url, tempfile.TemporaryDirectory() as tmp:
+        with DownloadEngine(max_connections=max(args.splits)) as engine:
+            for n in args.splits:
+                dl = HTTPDownloader(base_url=url, retry_wait=0, engine=engine, range_connections=n,
+                                    range_part_size=args.part_mb << 20)
+                dest = Path(tmp) / f"split-{n}"
+                with _PeakThreads() as peak:
+                    tic = time.perf_counter()
+                    out = dl.download_year_tar(1, dest)
+                    elapsed = time.perf_counter() - tic
+                assert out.stat().st_size == size, "assembled archive has the wrong length"
+                _report(f"one archive, {n} connection(s)", size, elapsed, peak.peak)
+
+
+def bench_transform(args: argparse.Namespace) -> None:
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _station_files(tmp, args.files, args.rows, args.ragged)
+
+        # one core each: DictReader rows through `build`, the per-header row
+        # plan (CsvReader) under each validation tier, then the columnar reader in chunks of `--chunk`
+        # files (= ConcurrentTransformer.chunk_size)
+        parser, builder = CsvParser(logger), PydanticRecordBuilder(logger)
+        tic = time.process_time()
+        dicts = []
+        for p in paths:
+            with p.open(encoding="utf-8", newline="") as f:
+                dicts.extend(builder.build(raw) for raw in parser.parse(f))
+        base = len(dicts) / (time.process_time() - tic)
+        print(f"{'dict rows':<26} {base:12,.0f} rows/s")
+
+        for tier in VALIDATION_TIERS:
+            reader = CsvReader(parser, PydanticRecordBuilder(logger, tier, args.sample), logger)
+            tic = time.process_time()
+            rows = [rec for p in paths for rec in reader.read(p)]
+            rate = len(rows) / (time.process_time() - tic)
+            print(f"{'row plan, ' + tier:<26} {rate:12,.0f} rows/s  ({rate / base:.1f}x)")
+            assert rows == dicts, f"{tier} row plan records differ from the dict rows'"
+
+        columnar = ColumnarReader(logger)
+        tic = time.process_time()
+        cols = [rec for i in range(0, len(paths), args.chunk)
+                for recs in columnar.read_many(paths[i:i + args.chunk]) for rec in recs]
+        rate = len(cols) / (time.process_time() - tic)
+        print(f"{'columnar':<26} {rate:12,.0f} rows/s  ({rate / base:.1f}x)")
+        assert cols == rows, "columnar records differ from the row builder's"
+
+
+def _station_files(tmp: str, files: int, rows: int, ragged: bool = False) -> List[Path]:
+    paths = []
+    for i in range(files):
+        p = Path(tmp) / f"{i:05d}.csv"
+        p.write_text(to_csv(station_rows(rows, seed=i, padded=not ragged)), encoding="utf-8")
+        paths.append(p)
+    return paths
+
+
+def bench_scaling(args: argparse.Namespace) -> None:
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.CRITICAL)
+    print(f"{os.cpu_count()} cores")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _station_files(tmp, args.files, args.rows)
+        base = None
+        for n in args.processes:
+            transformer = ConcurrentTransformer(
+                max_workers=n, chunk_size=args.chunk, logger=logger,
+                use_processes=True, columnar=not args.row_transform,
+            )
+            try:
+                tic = time.perf_counter()
+                records = transformer.transform(paths)
+                rate = len(records) / (time.perf_counter() - tic)
+            finally:
+                transformer.close()
+            base = base or rate / n
+            print(f"{f'{n} process(es)':<26} {rate:12,.0f} rows/s  ({rate / base:.1f}x one process)")
+            print(f"{'':<26} {transformer.last_report.summary()}")
+
+
+def _held(build):
+    """(result, bytes still allocated because of it) for `build()`."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _station_files(tmp, args.files, args.rows)
+        transformer = ConcurrentTransformer(max_workers=1, chunk_size=args.chunk, logger=logger, columnar=True)
+        try:
+            batch, columnar = _held(lambda: transformer.transform(paths))
+        finally:
+            transformer.close()
+        dicts, held = _held(batch.to_records)
+        n = len(dicts)
+        print(f"{'dict records':<26} {held / n:9,.0f} B/row  {held / 1e6:9.1f} MB for {n:,} rows")
+        print(f"{'RecordBatch':<26} {columnar / n:9,.0f} B/row  {columnar / 1e6:9.1f} MB  "
+              f"({held / columnar:.1f}x smaller)")
+
+
+def bench_documents(args: argparse.Namespace) -> None:
+    logger = logging.getLogger("bench")
+    logger.setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _station_files(tmp, args.files, args.rows)
+        transformer = ConcurrentTransformer(max_workers=1, logger=logger, columnar=True)
+        try:
+            batch = transformer.transform(paths)
+        finally:
+            transformer.close()
+    prep = DefaultRecordPreparer(logger)
+    slices = [batch[i : i + args.batch] for i in range(0, len(batch), args.batch)]
+    # the loader's view: one insert batch of documents at a time
+    ways = {
+        "dict rows + prepare": lambda part: [prep.prepare(r) for r in part],
+        "fused prepare_many": prep.prepare_many,
+    }
+    per_million = 1e6 / len(batch)
+    base = None
+    for label, build in ways.items():
+        elapsed = float("inf")
+        for _ in range(3):
+            tic = time.process_time()
+            for part in slices:
+                build(part)
+            elapsed = min(elapsed, time.process_time() - tic)
+        tracemalloc.start()
+        for part in slices:
+            build(part)
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        base = base or elapsed
+        print(f"{label:<26} {elapsed * per_million:7.2f}s per 1M rows ({base / elapsed:.1f}x)  "
+              f"peak {allocated / 1e6:6.1f} MB per {args.batch}-row batch")
+    assert prep.prepare_many(slices[0]) == [prep.prepare(r) for r in slices[0]]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser("ClimateLens ETL benchmarks")
+    sub = p.add_subparsers(dest="bench", required=True)
+
+    d = sub.add_parser("download", help="download engine vs per-call requests, local stub server")
+    d.add_argument("--files", type=int, default=200)
+    d.add_argument("--size-kb", type=int, default=512)
+    d.add_argument("--latency-ms", type=float, default=50.0, help="simulated server time to first byte")
+    d.add_argument("--connections", type=int, default=64)
+    d.add_argument("--threads", type=int, default=4, help="baseline thread pool size (= DOWNLOAD_MAX_WORKERS)")
+    d.add_argument("--buffer-kb", type=int, default=1024)
+    d.set_defaults(func=bench_download)
+
+    r = sub.add_parser("ranged", help="one large archive over 1…N byte-range connections")
+    r.add_argument("--size-mb", type=int, default=128)
+    r.add_argument("--part-mb", type=int, default=16, help="= DOWNLOAD_RANGE_PART_SIZE")
+    r.add_argument("--bandwidth-mbps", type=float, default=20.0, help="stub per-connection rate cap")
+    r.add_argument("--latency-ms", type=float, default=50.0)
+    r.add_argument("--splits", type=lambda v: [int(x) for x in v.split(",")], default=[1, 4, 8],
+                   help="comma-separated DOWNLOAD_RANGE_CONNECTIONS values to compare")
+    r.set_defaults(func=bench_ranged)
+
+    t = sub.add_parser("transform", help="GSOD dict rows vs row plan tiers vs columnar reader, one core")
+    t.add_argument("--files", type=int, default=300)
+    t.add_argument("--rows", type=int, default=366, help="rows per station file")
+    t.add_argument("--chunk", type=int, default=100, help="files per read_many call")
+    t.add_argument("--ragged", action="store_true", help="unpadded values instead of NOAA's fixed widths")
+    t.add_argument("--sample", type=float, default=0.01, help="= GSOD_VALIDATION_SAMPLE")
+    t.set_defaults(func=bench_transform)
+
+    c = sub.add_parser("scaling", help="ConcurrentTransformer wall-clock throughput over 1…N worker processes")
+    c.add_argument("--files", type=int, default=2000)
+    c.add_argument("--rows", type=int, default=366, help="rows per station file")
+    c.add_argument("--chunk", type=int, default=50, help="files per worker task")
+    c.add_argument("--processes", type=lambda v: [int(x) for x in v.split(",")], default=[1, 2, 4, 8],
+                   help="comma-separated GSOD_TRANSFORM_PROCESSES values to compare")
+    c.add_argument("--row-transform", action="store_true", help="row builder instead of columnar")
+    c.set_defaults(func=bench_scaling)
+
+    m = sub.add_parser("memory", help="heap held by transformed records: dicts vs RecordBatch")
+    m.add_argument("--files", type=int, default=1000)
+    m.add_argument("--rows", type=int, default=366, help="rows per station file")
+    m.add_argument("--chunk", type=int, default=100, help="files per worker task")
+    m.set_defaults(func=bench_memory)
+
+    o = sub.add_parser("documents", help="Mongo documents from a RecordBatch: dict rows + prepare vs fused")
+    o.add_argument("--files", type=int, default=300)
+    o.add_argument("--rows", type=int, default=366, help="rows per station file")
+    o.add_argument("--batch", type=int, default=5000, help="= CHUNK_SIZE")
+    o.set_defaults(func=bench_documents)
+
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from datetime import datetime
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, PositiveInt, field_validator
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Literal
 
 # ─── single source‐of‐truth .env loader ─────────────────────────────
 ENV_PATH = Path(__file__).parent.parent / "server" / ".env"
@@ -50,10 +50,116 @@ class ETLConfig(BaseSettings):
     DOWNLOAD_RETRY_ATTEMPTS:  PositiveInt = Field(default=3, ge=1)
     DOWNLOAD_RETRY_WAIT:      PositiveInt = Field(default=5, ge=0)
     DOWNLOAD_MAX_WORKERS:     PositiveInt = Field(default=4, ge=1)
+    DOWNLOAD_MAX_CONNECTIONS: PositiveInt = Field(
+        default=64, ge=1,
+        description="Pooled keep-alive connections (= concurrent transfers) of the shared download engine"
+    )
+    DOWNLOAD_BUFFER_SIZE: PositiveInt = Field(
+        default=1 << 20, ge=1,
+        description="Read chunk / file write buffer per transfer, in bytes"
+    )
+    DOWNLOAD_ADAPTIVE: bool = Field(
+        default=True,
+        description="Adapt per-host concurrency (AIMD) to 429/5xx and latency, "
+                    "up to DOWNLOAD_MAX_CONNECTIONS"
+    )
+    DOWNLOAD_INITIAL_CONCURRENCY: PositiveInt = Field(
+        default=4, ge=1,
+        description="Per-host concurrency an adaptive download starts from"
+    )
+    DOWNLOAD_RANGE_CONNECTIONS: PositiveInt = Field(
+        default=4, ge=1,
+        description="Connections one large archive download is split across (1 = never split)"
+    )
+    DOWNLOAD_RANGE_PART_SIZE: PositiveInt = Field(
+        default=16 << 20, ge=1,
+        description="Byte-range size for split downloads; smaller archives use one request"
+    )
+    DOWNLOAD_STREAM_EXTRACT: bool = Field(
+        default=False,
+        description="Extract GSOD archives from the HTTP body while it downloads. Saves the "
+                    "wait for the full archive, but a streamed download uses one connection "
+                    "(no DOWNLOAD_RANGE_CONNECTIONS split) and restarts from byte 0 after a "
+                    "dropped connection instead of resuming its .part file"
+    )
+    DOWNLOAD_KEEP_ARCHIVE: bool = Field(
+        default=True,
+        description="When stream-extracting, also keep the archive under DATA_DIR/raw"
+    )
+    GSOD_ZERO_DISK: bool = Field(
+        default=False,
+        description="Keep extracted GSOD CSVs in memory and parse them from there; only the "
+                    "optional archive copy is written. Holds up to DOWNLOAD_MAX_WORKERS years in RAM"
+    )
+    GSOD_COLUMNAR_TRANSFORM: bool = Field(
+        default=True,
+        description="Convert GSOD station files column-at-a-time with NumPy (same records as "
+                    "the row-by-row builder, which handles whatever the array rules cannot)"
+    )
+    GSOD_VALIDATION: Literal["strict", "batch", "sampled"] = Field(
+        default="strict",
+        description="Row-by-row builder validation: strict validates every row with pydantic; "
+                    "batch validates lists of rows in one TypeAdapter call; sampled validates "
+                    "every 1/GSOD_VALIDATION_SAMPLE-th row and aborts a file on schema drift"
+    )
+    GSOD_VALIDATION_SAMPLE: float = Field(
+        default=0.01, gt=0, le=1,
+        description="Fraction of rows strictly validated under GSOD_VALIDATION=sampled"
+    )
+    GSOD_TRANSFORM_PROCESSES: int = Field(
+        default=0, ge=0,
+        description="Transform GSOD files in this many worker processes, one per core; "
+                    "0 keeps DOWNLOAD_MAX_WORKERS threads, which share one core"
+    )
 
     # LOADER SETTINGS
     LOAD_MAX_WORKERS: PositiveInt = Field(default=4, ge=1, description="Max threads for DB load")
 
+    # pipeline execution
+    PIPELINE_MODE: Literal["batch", "stream", "concurrent"] = Field(
+        default="batch",
+        description="batch: materialize each step's output; stream: pass batches through generators; "
+                    "concurrent: run every step in its own worker pool joined by bounded queues"
+    )
+    STREAM_FILE_BATCH: PositiveInt = Field(
+        default=400, ge=1,
+        description="Station files transformed per batch in stream mode"
+    )
+    PIPELINE_QUEUE_SIZE: PositiveInt = Field(
+        default=4, ge=1,
+        description="Max batches buffered between two stages in concurrent mode"
+    )
+    PIPELINE_STAGE_WORKERS: PositiveInt = Field(
+        default=2, ge=1,
+        description="Worker threads per transform stage in concurrent mode"
+    )
+    ETL_MAX_PARALLEL_PIPELINES: PositiveInt = Field(
+        default=4, ge=1,
+        description="How many independent pipelines (GSOD, CO₂, IPCC, embed) may run at once"
+    )
+
+    # GSOD run manifest (SQLite); defaults to DATA_DIR/manifest.sqlite3
+    MANIFEST_PATH: Optional[Path] = Field(default=None)
+
+    # year-partitioned Parquet dataset of transformed GSOD records (needs pyarrow)
+    GSOD_DATASET_DIR: Optional[Path] = Field(
+        default=None,
+        description="Also write transformed GSOD records here, one year=YYYY partition per year"
+    )
+    GSOD_FROM_DATASET: bool = Field(
+        default=False,
+        description="Load GSOD years straight from GSOD_DATASET_DIR, skipping download and transform"
+    )
+
+    # dead-letter files of rejected rows: {dir}/gsod and {dir}/co2, per year and station/country
+    QUARANTINE_DIR: Optional[Path] = Field(
+        default=None,
+        description="Write rows the GSOD and CO₂ transforms reject here, replayable later"
+    )
+
+    # run metrics (JSON report + Prometheus textfile)
+    METRICS_DIR: Path = Field(default=Path("data/metrics"))
+
     # CO₂-pipeline settings
     CO2_INDICATOR:    str = Field(
         default="EN.GHG.CO2.MT.CE.AR5",
@@ -71,12 +177,33 @@ class ETLConfig(BaseSettings):
         le=datetime.utcnow().year,
         description="Latest CO₂ year to fetch"
     )
+    CO2_EXTRA_INDICATORS: List[str] = Field(
+        default=["SP.POP.TOTL", "NY.GDP.MKTP.CD", "EN.GHG.CH4.MT.CE.AR5"],
+        description="More World Bank indicators stored next to co2Mt in each (iso3, year) doc"
+    )
+    CO2_PAGE_SIZE:    PositiveInt = Field(
+        default=1000, ge=1,
+        description="World Bank API records per page; pages are fetched concurrently"
+    )
+    CO2_CACHE_DIR:    Optional[Path] = Field(
+        default=Path("data/co2_cache"),
+        description="Raw World Bank responses by indicator and year span; unset to disable"
+    )
     IPCC_PDF_URL: str = Field(
         default="https://ipcc.ch/report/ar6/wg1/downloads/report/IPCC_AR6_WGI_SPM.pdf",
         description="Download URL for the AR6 WG-I Summary-for-Policymakers PDF",
     )
     IPCC_PDF_NAME: str = Field(default="IPCC_AR6_WGI_SPM.pdf")
     IPCC_CHUNK_WORDS: int = Field(default=250, ge=50, le=500)
+    IPCC_EXTRACT_PROCESSES: Optional[int] = Field(
+        default=None, ge=1,
+        description="Worker processes extracting PDF text; unset for one per core, 1 to stay in-process"
+    )
+    IPCC_EXTRACT_PAGES: int = Field(default=16, ge=1, description="PDF pages per extraction task")
+    IPCC_CACHE_DIR: Optional[Path] = Field(
+        default=Path("data/ipcc_cache"),
+        description="Extracted PDF text by content hash and pdfminer parameters; unset to disable"
+    )
     EMBED_BATCH_SIZE: PositiveInt = Field(default=1, ge=1)
     VERTEX_PROJECT: Optional[str] = None
     VERTEX_REGION: Optional[str] = "us-central1"
@@ -130,10 +257,36 @@ def get_config(
     download_retry_attempts: Optional[int] = None,
     download_retry_wait: Optional[int] = None,
     download_max_workers: Optional[int] = None,
+    download_max_connections: Optional[int] = None,
+    download_buffer_size: Optional[int] = None,
+    download_adaptive: Optional[bool] = None,
+    download_initial_concurrency: Optional[int] = None,
+    download_range_connections: Optional[int] = None,
+    download_range_part_size: Optional[int] = None,
+    stream_extract: Optional[bool] = None,
+    keep_archive: Optional[bool] = None,
+    zero_disk: Optional[bool] = None,
+    columnar_transform: Optional[bool] = None,
+    validation: Optional[str] = None,
+    validation_sample: Optional[float] = None,
+    transform_processes: Optional[int] = None,
     load_max_workers: Optional[int] = None,
+    pipeline_mode: Optional[str] = None,
+    stream_file_batch: Optional[int] = None,
+    pipeline_queue_size: Optional[int] = None,
+    pipeline_stage_workers: Optional[int] = None,
+    max_parallel_pipelines: Optional[int] = None,
+    metrics_dir: Optional[str] = None,
+    manifest_path: Optional[str] = None,
+    dataset_dir: Optional[str] = None,
+    from_dataset: Optional[bool] = None,
+    quarantine_dir: Optional[str] = None,
     co2_indicator: Optional[str] = None,
     co2_start_year: Optional[int] = None,
     co2_end_year: Optional[int] = None,
+    co2_extra_indicators: Optional[List[str]] = None,
+    co2_page_size: Optional[int] = None,
+    co2_cache_dir: Optional[str] = None,
     skip_gsod: Optional[bool] = None,
     skip_co2: Optional[bool]  = None,
     skip_ipcc: Optional[bool] = None,
@@ -141,6 +294,9 @@ def get_config(
     ipcc_pdf_url: Optional[str] = None,
     ipcc_pdf_name: Optional[str] = None,
     ipcc_chunk_words: Optional[int] = None,
+    ipcc_extract_processes: Optional[int] = None,
+    ipcc_extract_pages: Optional[int] = None,
+    ipcc_cache_dir: Optional[str] = None,
     embed_batch_size: Optional[int] = None,
     vertex_project: Optional[str] = None,
     vertex_region: Optional[str] = None,
@@ -178,14 +334,66 @@ def get_config(
         overrides["DOWNLOAD_RETRY_WAIT"] = download_retry_wait
     if download_max_workers is not None:
         overrides["DOWNLOAD_MAX_WORKERS"] = download_max_workers
+    if download_max_connections is not None:
+        overrides["DOWNLOAD_MAX_CONNECTIONS"] = download_max_connections
+    if download_buffer_size is not None:
+        overrides["DOWNLOAD_BUFFER_SIZE"] = download_buffer_size
+    if download_adaptive is not None:
+        overrides["DOWNLOAD_ADAPTIVE"] = download_adaptive
+    if download_initial_concurrency is not None:
+        overrides["DOWNLOAD_INITIAL_CONCURRENCY"] = download_initial_concurrency
+    if download_range_connections is not None:
+        overrides["DOWNLOAD_RANGE_CONNECTIONS"] = download_range_connections
+    if download_range_part_size is not None:
+        overrides["DOWNLOAD_RANGE_PART_SIZE"] = download_range_part_size
+    if stream_extract is not None:
+        overrides["DOWNLOAD_STREAM_EXTRACT"] = stream_extract
+    if keep_archive is not None:
+        overrides["DOWNLOAD_KEEP_ARCHIVE"] = keep_archive
+    if zero_disk is not None:
+        overrides["GSOD_ZERO_DISK"] = zero_disk
+    if columnar_transform is not None:
+        overrides["GSOD_COLUMNAR_TRANSFORM"] = columnar_transform
+    if validation is not None:
+        overrides["GSOD_VALIDATION"] = validation
+    if validation_sample is not None:
+        overrides["GSOD_VALIDATION_SAMPLE"] = validation_sample
+    if transform_processes is not None:
+        overrides["GSOD_TRANSFORM_PROCESSES"] = transform_processes
     if load_max_workers is not None:
         overrides["LOAD_MAX_WORKERS"] = load_max_workers
+    if pipeline_mode is not None:
+        overrides["PIPELINE_MODE"] = pipeline_mode
+    if stream_file_batch is not None:
+        overrides["STREAM_FILE_BATCH"] = stream_file_batch
+    if pipeline_queue_size is not None:
+        overrides["PIPELINE_QUEUE_SIZE"] = pipeline_queue_size
+    if pipeline_stage_workers is not None:
+        overrides["PIPELINE_STAGE_WORKERS"] = pipeline_stage_workers
+    if max_parallel_pipelines is not None:
+        overrides["ETL_MAX_PARALLEL_PIPELINES"] = max_parallel_pipelines
+    if metrics_dir is not None:
+        overrides["METRICS_DIR"] = Path(metrics_dir)
+    if manifest_path is not None:
+        overrides["MANIFEST_PATH"] = Path(manifest_path)
+    if dataset_dir is not None:
+        overrides["GSOD_DATASET_DIR"] = Path(dataset_dir)
+    if from_dataset is not None:
+        overrides["GSOD_FROM_DATASET"] = from_dataset
+    if quarantine_dir is not None:
+        overrides["QUARANTINE_DIR"] = Path(quarantine_dir)
     if co2_indicator is not None:
         overrides["CO2_INDICATOR"] = co2_indicator
     if co2_start_year is not None:
         overrides["CO2_START_YEAR"] = co2_start_year
     if co2_end_year is not None:
         overrides["CO2_END_YEAR"] = co2_end_year
+    if co2_extra_indicators is not None:
+        overrides["CO2_EXTRA_INDICATORS"] = co2_extra_indicators
+    if co2_page_size is not None:
+        overrides["CO2_PAGE_SIZE"] = co2_page_size
+    if co2_cache_dir is not None:
+        overrides["CO2_CACHE_DIR"] = Path(co2_cache_dir) if co2_cache_dir else None
     if skip_gsod is not None:
         overrides["SKIP_GSOD"] = skip_gsod
     if skip_co2 is not None:
@@ -200,6 +408,12 @@ def get_config(
         overrides["IPCC_PDF_NAME"] = ipcc_pdf_name
     if ipcc_chunk_words is not None:    
         overrides["IPCC_CHUNK_WORDS"] = ipcc_chunk_words
+    if ipcc_extract_processes is not None:
+        overrides["IPCC_EXTRACT_PROCESSES"] = ipcc_extract_processes
+    if ipcc_extract_pages is not None:
+        overrides["IPCC_EXTRACT_PAGES"] = ipcc_extract_pages
+    if ipcc_cache_dir is not None:
+        overrides["IPCC_CACHE_DIR"] = Path(ipcc_cache_dir) if ipcc_cache_dir else None
     if embed_batch_size is not None:
         overrides["EMBED_BATCH_SIZE"] = embed_batch_size        
     if vertex_project is not None:
@@ -1,76 +1,205 @@
 # etl/downloader/co2_downloader.py
 
+import asyncio
+import json
 import logging
-import time
 from pathlib import Path
-from typing import Iterable, List, Any, Optional, Mapping
+from typing import Dict, Iterable, List, Any, Optional, Mapping, Sequence, Tuple, Union
 
-import requests
 from etl.downloader.protocols import Downloader
+from etl.downloader.engine import DownloadEngine, shared_engine
+from etl.downloader.throttle import backoff_delay
+from etl import metrics
 
 
 class CO2Downloader(Downloader):
     """
-    Downloads CO₂ emissions data for a given indicator from the
-    World Bank API, over a span of years, with retry support.
+    Downloads CO₂ emissions data for a given indicator (or several – e.g.
+    CO₂, population, GDP) from the World Bank API, over a span of years,
+    with retry support. All indicators are fetched concurrently.
+
+    Results are paginated (`page_size` records per page): page 1 reports
+    the page count in `payload[0]["pages"]` and the remaining pages are
+    fetched concurrently on the shared DownloadEngine.
+
+    With `cache_dir`, the raw records of every fetched span are kept in
+    `{cache_dir}/{indicator}/{start}-{end}.json`; later calls only request
+    the years no cached span covers. Years after the last one with any
+    value are not published yet: they are asked for again on every call,
+    and the newest span covering a year wins.
     """
 
     def __init__(
         self,
-        indicator: str,
+        indicator: Union[str, Sequence[str]],
         retry_attempts: int = 3,
         retry_wait: int = 5,
-        session: Optional[requests.Session] = None,
+        engine: Optional[DownloadEngine] = None,
         logger: Optional[logging.Logger] = None,
+        base_url: str = "https://api.worldbank.org/v2",
+        page_size: int = 1000,
+        cache_dir: Optional[Path] = None,
     ) -> None:
-        self.indicator      = indicator
+        self.indicators     = [indicator] if isinstance(indicator, str) else list(indicator)
+        self.indicator      = self.indicators[0]
+        self.base_url       = base_url.rstrip("/")
         self.retry_attempts = retry_attempts
         self.retry_wait     = retry_wait
-        self.session        = session or requests.Session()
+        self.engine         = engine or shared_engine()
         self.logger         = logger or logging.getLogger(self.__class__.__name__)
+        self.page_size      = page_size
+        self.cache_dir      = cache_dir
 
     def download_years(
         self,
         years: Iterable[int],
         dest_dir: Optional[Path] = None,
-        max_workers: int = 1,
+        max_workers: int = 4,
     ) -> List[Mapping[str, Any]]:
         """
-        Fetch CO₂ JSON for `self.indicator` across the [min(years), max(years)] range.
-        `dest_dir` and `max_workers` are accepted for interface compatibility but unused.
-        Returns the list of raw records (the second element of the JSON response).
+        Fetch World Bank JSON for every indicator for `years`, serving what
+        it can from the cache. `max_workers` caps concurrent page requests;
+        `dest_dir` is accepted for interface compatibility but unused.
+        Returns the raw records (the second element of each JSON page).
         """
-        start, end = min(years), max(years)
+        years = sorted(set(years))
+        cached = {ind: self._read_cache(ind) for ind in self.indicators}
+        todo = [
+            (ind, start, end)
+            for ind in self.indicators
+            for start, end in _spans([y for y in years if y not in cached[ind]])
+        ]
+        for ind in self.indicators:
+            hits = sum(y in cached[ind] for y in years)
+            if hits:
+                self.logger.info(f"CO₂ {ind}: {hits}/{len(years)} years served from cache")
+
+        if todo:
+            self.logger.info(
+                "Downloading World Bank " + ", ".join(f"{i} {s}–{e}" for i, s, e in todo)
+            )
+            try:
+                fetched = self.engine.run(self._fetch_all(todo, max_workers))
+            except Exception:
+                # propagates: counted by the step it fails
+                self.logger.error("World Bank download failed")
+                raise
+            for (ind, start, end), records in zip(todo, fetched):
+                self._write_cache(ind, start, end, records)
+                by_year = cached[ind]
+                for y in range(start, end + 1):
+                    by_year[y] = []
+                for rec in records:
+                    by_year.setdefault(_year_of(rec), []).append(rec)
+
+        return [rec for ind in self.indicators for y in years for rec in cached[ind].get(y, [])]
+
+    # ------------------------------------------------------------------ #
+    async def _fetch_all(
+        self, todo: List[Tuple[str, int, int]], max_workers: int
+    ) -> List[List[Mapping[str, Any]]]:
+        # one page budget across every indicator and span
+        limit = asyncio.Semaphore(max(1, max_workers))
+        return await asyncio.gather(*(self._fetch_span(i, s, e, limit) for i, s, e in todo))
+
+    async def _fetch_span(
+        self, indicator: str, start: int, end: int, limit: asyncio.Semaphore
+    ) -> List[Mapping[str, Any]]:
+        async def page(n: int) -> Tuple[Mapping[str, Any], List[Mapping[str, Any]]]:
+            async with limit:
+                return await self._fetch_page(indicator, start, end, n)
+
+        meta, records = await page(1)
+        pages = int(meta.get("pages") or 1)
+
+        for _, more in await asyncio.gather(*(page(n) for n in range(2, pages + 1))):
+            records.extend(more)
+
+        total = meta.get("total")
+        if isinstance(total, int) and total != len(records):
+            raise IOError(f"expected {total} records over {pages} pages, got {len(records)}")
+        self.logger.info(f"✔ {indicator}: {len(records)} records in {pages} page(s)")
+        return records
+
+    async def _fetch_page(
+        self, indicator: str, start: int, end: int, page: int
+    ) -> Tuple[Mapping[str, Any], List[Mapping[str, Any]]]:
         url = (
-            f"https://api.worldbank.org/v2/country/all/indicator/"
-            f"{self.indicator}?date={start}:{end}&format=json&per_page=20000"
+            f"{self.base_url}/country/all/indicator/{indicator}"
+            f"?date={start}:{end}&format=json&per_page={self.page_size}&page={page}"
         )
-        self.logger.info(f"Downloading CO₂ indicator {self.indicator} for {start}–{end}")
-        self.logger.debug(f"GET {url}")
-
-        last_error: Optional[Exception] = None
         for attempt in range(1, self.retry_attempts + 1):
             try:
-                resp = self.session.get(url, timeout=60)
+                resp = await self.engine.afetch(url)
                 resp.raise_for_status()
-                payload = resp.json()
-                # payload[0] is metadata, payload[1] is the data list
+                payload = json.loads(resp.body)
+                # payload[0] is metadata, payload[1] is the data list (null when empty)
                 if not (isinstance(payload, list) and len(payload) >= 2):
-                    raise ValueError("Unexpected API response shape")
-                records = payload[1]
-                self.logger.info(f"✔ Retrieved {len(records)} records on attempt {attempt}")
-                return records
+                    raise ValueError(f"Unexpected API response shape: {payload!r:.200}")
+                return payload[0], list(payload[1] or [])
             except Exception as e:
-                last_error = e
                 self.logger.warning(
-                    f"Attempt {attempt}/{self.retry_attempts} failed: {e!r}"
+                    f"{indicator} page {page} attempt {attempt}/{self.retry_attempts} failed: {e!r}"
                 )
                 if attempt < self.retry_attempts:
-                    time.sleep(self.retry_wait)
+                    metrics.incr("retries")
+                    await asyncio.sleep(backoff_delay(attempt, self.retry_wait, e))
                 else:
-                    self.logger.error(
-                        f"All {self.retry_attempts} CO₂ download attempts failed"
-                    )
+                    raise
+
+    def _cache_root(self, indicator: str) -> Optional[Path]:
+        return self.cache_dir / indicator if self.cache_dir else None
+
+    def _read_cache(self, indicator: str) -> Dict[int, List[Mapping[str, Any]]]:
+        """
+        Cached records by year, from the newest span covering each. A year
+        is present once a span covered it, unless no year from it on has
+        any value yet (the World Bank has not published it).
+        """
+        by_year: Dict[int, List[Mapping[str, Any]]] = {}
+        root = self._cache_root(indicator)
+        if root is None or not root.is_dir():
+            return by_year
+        for f in sorted(root.glob("*-*.json"), key=lambda f: (f.stat().st_mtime_ns, f.name)):
+            try:
+                entry = json.loads(f.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Ignoring unreadable cache file {f}: {e!r}")
+                continue
+            for y in range(entry["start"], entry["end"] + 1):
+                by_year[y] = []
+            for rec in entry["records"]:
+                by_year.setdefault(_year_of(rec), []).append(rec)
+        published = [y for y, recs in by_year.items() if any(r.get("value") is not None for r in recs)]
+        latest = max(published, default=None)
+        return {y: recs for y, recs in by_year.items() if latest is not None and y <= latest}
+
+    def _write_cache(
+        self, indicator: str, start: int, end: int, records: List[Mapping[str, Any]]
+    ) -> None:
+        root = self._cache_root(indicator)
+        if root is None:
+            return
+        root.mkdir(parents=True, exist_ok=True)
+        target = root / f"{start}-{end}.json"
+        tmp = target.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"indicator": indicator, "start": start, "end": end, "records": records}),
+            encoding="utf-8",
+        )
+        tmp.replace(target)
+
+
+def _year_of(record: Mapping[str, Any]) -> int:
+    return int(record["date"])
+
 
-        # if we exit the loop without returning, re-raise the last error
-        raise last_error  # type: ignore
+def _spans(years: List[int]) -> List[Tuple[int, int]]:
+    """Sorted years → contiguous (start, end) spans: [1,2,3,7] → [(1,3), (7,7)]."""
+    spans: List[Tuple[int, int]] = []
+    for y in years:
+        if spans and spans[-1][1] == y - 1:
+            spans[-1] = (spans[-1][0], y)
+        else:
+            spans.append((y, y))
+    return spans
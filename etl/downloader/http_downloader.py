@@ -1,17 +1,44 @@
 # etl/downloader/http_downloader.py
+import asyncio
+import io
+import json
 import logging
 import time
+from collections import deque
 from pathlib import Path
-from typing import Iterable, List, Optional, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Awaitable, BinaryIO, Callable, Iterable, List, Mapping, Optional, TypeVar
 
-import requests as _requests
-from etl.downloader.protocols import Downloader
+from etl.downloader.protocols import StreamingDownloader
+from etl.downloader.engine import DownloadEngine, RangeMismatch, shared_engine
+from etl.downloader.throttle import backoff_delay
+from etl import metrics
 
-class HTTPDownloader(Downloader):
+T = TypeVar("T")
+
+class HTTPDownloader(StreamingDownloader):
     """
     Downloads year‐tar.gz files via HTTPS with retry and parallelism.
     Implements the same interface as FTPDownloader.
+
+    Transfers run as coroutines on a shared DownloadEngine (pooled keep-alive
+    connections), so `max_workers` years download concurrently without a
+    thread each.
+
+    Each archive gets a `<archive>.meta.json` sidecar with the server's
+    ETag / Last-Modified / Content-Length. Later runs send those back as a
+    conditional GET, so an unchanged year costs one 304, and a transfer that
+    died half-way resumes from its `.part` file with an HTTP Range request.
+
+    Fresh downloads ask for the first `range_part_size` bytes only. If the
+    server answers 206 and the archive is bigger than that, the file is
+    preallocated and the rest is fetched as further byte ranges over up to
+    `range_connections` connections, each written at its own offset. A server
+    that ignores Range answers 200 and the same request simply becomes a
+    plain single-stream download. The sidecar lists the slices already
+    written, so an interrupted ranged download fetches only the rest.
+
+    `stream_year` instead hands the body to a consumer (e.g. a streaming tar
+    extractor) while it downloads, so extraction overlaps the transfer.
     """
     def __init__(
         self,
@@ -19,13 +46,17 @@ class HTTPDownloader(Downloader):
         retry_attempts: int = 3,
         retry_wait: int = 5,
         logger: Optional[logging.Logger] = None,
-        session: Optional[Any] = None,
+        engine: Optional[DownloadEngine] = None,
+        range_connections: int = 4,
+        range_part_size: int = 16 << 20,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.retry_attempts = retry_attempts
         self.retry_wait = retry_wait
         self.logger = logger or logging.getLogger(self.__class__.__name__)
-        self.session = session or _requests
+        self.engine = engine or shared_engine()
+        self.range_connections = max(1, range_connections)
+        self.range_part_size = max(1, range_part_size)
 
     def download_years(
         self,
@@ -33,30 +64,20 @@ class HTTPDownloader(Downloader):
         dest_dir: Path,
         max_workers: int = 4,
     ) -> List[Path]:
+        years = list(years)
         dest_dir.mkdir(parents=True, exist_ok=True)
-        self.logger.info(f"Parallel HTTP download for years: {list(years)}")
+        self.logger.info(f"Parallel HTTP download for years: {years}")
         start = time.perf_counter()
-        results: List[Path] = []
+        outcomes = self.engine.run(self._download_all(years, dest_dir, max_workers))
 
-        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http-downloader") as exe:
-            futures = {
-                exe.submit(self.download_year_tar, y, dest_dir): y
-                for y in years
-            }
-            try:
-                for fut in as_completed(futures):
-                    y = futures[fut]
-                    try:
-                       results.append(fut.result())
-                    except Exception as e:
-                        self.logger.error(f"✖ Year {y} failed: {e!r}")
-            except KeyboardInterrupt:
-                self.logger.warning("Interrupted, shutting down HTTP threads…")
-                exe.shutdown(wait=False)
-                raise
-            finally:
-                elapsed = time.perf_counter() - start
-        self.logger.info(f"HTTP downloads complete in {elapsed:.1f}s")
+        results: List[Path] = []
+        for y, outcome in zip(years, outcomes):
+            if isinstance(outcome, BaseException):
+                metrics.incr("errors")
+                self.logger.error(f"✖ Year {y} failed: {outcome!r}")
+            else:
+                results.append(outcome)
+        self.logger.info(f"HTTP downloads complete in {time.perf_counter() - start:.1f}s")
         return results
 
     def download_year_tar(self, year: int, dest_dir: Path) -> Path:
@@ -64,6 +85,97 @@ class HTTPDownloader(Downloader):
         Fetch {year}.tar.gz into dest_dir/{year}/{year}.tar.gz,
         retrying up to `retry_attempts` times.
         """
+        return self.engine.run(self._download_year(year, dest_dir))
+
+    def stream_year(
+        self,
+        year: int,
+        consume: Callable[[BinaryIO], T],
+        archive_copy: Optional[Path] = None,
+    ) -> T:
+        """
+        GET {year}.tar.gz and call `consume(stream)` on the body as it arrives.
+        With `archive_copy` the archive is also saved there (and revalidated
+        with a conditional GET next time; on 304 the saved copy is consumed).
+        A failed attempt restarts the whole stream, so `consume` must be
+        idempotent – re-extracting the same members is. Unlike
+        `download_years` it neither resumes nor splits into byte ranges.
+        """
+        url = f"{self.base_url}/{year}.tar.gz"
+        self.logger.info(f"Streaming HTTP {year}")
+        for attempt in range(1, self.retry_attempts + 1):
+            try:
+                result = self._stream_once(url, consume, archive_copy)
+                self.logger.info(f"✔ Year {year} streamed in attempt {attempt}")
+                return result
+            except Exception as e:
+                self.logger.warning(
+                    f"Attempt {attempt}/{self.retry_attempts} for year {year} failed: {e!r}"
+                )
+                if attempt < self.retry_attempts:
+                    metrics.incr("retries")
+                    time.sleep(backoff_delay(attempt, self.retry_wait, e))
+                else:
+                    raise
+
+    # ------------------------------------------------------------------ #
+    def _stream_once(
+        self,
+        url: str,
+        consume: Callable[[BinaryIO], T],
+        archive_copy: Optional[Path],
+    ) -> T:
+        headers = {}
+        part = None
+        if archive_copy is not None:
+            archive_copy.parent.mkdir(parents=True, exist_ok=True)
+            part = archive_copy.with_name(archive_copy.name + ".part")
+            meta = self._read_meta(archive_copy)
+            if archive_copy.exists() and meta.get("complete"):
+                if meta.get("etag"):
+                    headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    headers["If-Modified-Since"] = meta["last_modified"]
+
+        with self.engine.open_stream(url, headers=headers, copy_to=part) as body:
+            if body.status == 304:
+                self.logger.info(f"{archive_copy.name} unchanged upstream, using local copy")
+                metrics.incr("downloads_not_modified")
+                with open(archive_copy, "rb") as f:
+                    return consume(f)
+            body.raise_for_status()
+            reader = io.BufferedReader(body, self.engine.buffer_size)   # closing it would close `body`
+            result = consume(reader)
+            if part is None:
+                return result
+
+            # the consumer may stop at the end-of-archive marker: pull the
+            # remaining bytes so the copy is complete before keeping it
+            body.drain()
+            total = body.headers.get("content-length", "")
+            size = part.stat().st_size
+            if total.isdigit() and size != int(total):
+                raise IOError(f"incomplete transfer: {size}/{total} bytes")
+            part.replace(archive_copy)
+            self._write_meta(archive_copy, {
+                "url": url,
+                "etag": body.headers.get("etag"),
+                "last_modified": body.headers.get("last-modified"),
+                "content_length": size,
+                "complete": True,
+            })
+            return result
+
+    async def _download_all(self, years: List[int], dest_dir: Path, max_workers: int) -> list:
+        limit = asyncio.Semaphore(max(1, max_workers))
+
+        async def one(year: int) -> Path:
+            async with limit:
+                return await self._download_year(year, dest_dir)
+
+        return await asyncio.gather(*(one(y) for y in years), return_exceptions=True)
+
+    async def _download_year(self, year: int, dest_dir: Path) -> Path:
         year_dir = dest_dir / str(year)
         year_dir.mkdir(parents=True, exist_ok=True)
         filename = f"{year}.tar.gz"
@@ -73,11 +185,7 @@ class HTTPDownloader(Downloader):
         self.logger.info(f"Downloading HTTP {year} → {out_path}")
         for attempt in range(1, self.retry_attempts + 1):
             try:
-                resp = self.session.get(url, stream=True, timeout=60)
-                resp.raise_for_status()
-                with open(out_path, "wb") as f:
-                    for chunk in resp.iter_content(chunk_size=8192):
-                        f.write(chunk)
+                await self._fetch(url, out_path)
                 self.logger.info(f"✔ Year {year} downloaded in attempt {attempt}")
                 return out_path
             except Exception as e:
@@ -85,6 +193,231 @@ class HTTPDownloader(Downloader):
                     f"Attempt {attempt}/{self.retry_attempts} for year {year} failed: {e!r}"
                 )
                 if attempt < self.retry_attempts:
-                    time.sleep(self.retry_wait)
+                    metrics.incr("retries")
+                    await asyncio.sleep(backoff_delay(attempt, self.retry_wait, e))
                 else:
                     raise
+
+    async def _fetch(self, url: str, out_path: Path) -> None:
+        """
+        One transfer attempt: conditional GET when a complete copy exists,
+        Range resume when a partial one does, full download otherwise – split
+        into ranges when `range_connections` allows and the file is big enough.
+        """
+        meta = self._read_meta(out_path)
+        part = out_path.with_name(out_path.name + ".part")
+        validator = meta.get("etag") or meta.get("last_modified")
+        headers = {}
+        offset = 0
+        if out_path.exists() and meta.get("complete"):
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        elif part.exists() and validator and meta.get("ranged") and meta.get("part_size"):
+            # (a ranged .part is preallocated: its size says nothing about progress)
+            return await self._resume_ranged(url, out_path, part, meta)
+        elif part.exists() and validator and not meta.get("ranged"):
+            offset = part.stat().st_size
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator   # server sends the whole file if it changed
+        if offset == 0 and self.range_connections > 1:
+            await self._fetch_ranged(url, out_path, part, headers)
+        else:
+            await self._fetch_single(url, out_path, part, headers, offset, meta)
+
+    async def _fetch_single(
+        self, url: str, out_path: Path, part: Path, headers: Mapping[str, str], offset: int, meta: dict
+    ) -> None:
+        def on_response(status: int, resp_headers: Mapping[str, str]) -> None:
+            # record validators before the body so a crash mid-transfer can resume
+            nonlocal meta
+            if status == 206:
+                total = resp_headers.get("content-range", "").rpartition("/")[2]
+                self.logger.info(f"Resuming {out_path.name} at byte {offset}")
+                metrics.incr("downloads_resumed")
+            elif status == 200:
+                total = resp_headers.get("content-length", "")
+                meta = {}
+            else:
+                return
+            meta = self._new_meta(url, resp_headers, total, prev=meta)
+            self._write_meta(out_path, meta)
+
+        try:
+            result = await self.engine.afetch(
+                url, part, headers=headers, offset=offset, on_response=on_response
+            )
+        except RangeMismatch:
+            part.unlink(missing_ok=True)     # Content-Range did not line up with our partial file
+            raise
+        if result.status == 304:
+            self._not_modified(out_path)
+            return
+        if result.status == 416:
+            # our partial file is bogus (longer than the remote one): start over
+            part.unlink(missing_ok=True)
+        result.raise_for_status()
+        self._finish(out_path, part, meta)
+
+    async def _fetch_ranged(
+        self, url: str, out_path: Path, part: Path, headers: Mapping[str, str]
+    ) -> None:
+        """
+        Fetch the first `range_part_size` bytes; if the 206 says there is
+        more, preallocate `part` and fetch the remaining slices concurrently.
+        Slices carry If-Range, so an archive replaced mid-download fails the
+        attempt (RangeMismatch) rather than splicing two versions together.
+        """
+        first = self.range_part_size
+        slices: deque = deque()
+        workers: List[asyncio.Task] = []
+        meta: dict = {}
+        slice_headers: dict = {}
+
+        def fetch_slices() -> Awaitable[None]:
+            return self._fetch_slices(url, out_path, part, slices, slice_headers, meta)
+
+        def on_response(status: int, resp_headers: Mapping[str, str]) -> None:
+            nonlocal meta, slice_headers
+            if status == 200:
+                # Range ignored: this response is the whole archive
+                meta = self._new_meta(url, resp_headers, resp_headers.get("content-length", ""))
+            elif status == 206:
+                total = resp_headers.get("content-range", "").rpartition("/")[2]
+                meta = self._new_meta(url, resp_headers, total)
+                size = meta["content_length"]
+                ranged = size is not None and size > first
+                with open(part, "wb") as f:
+                    if ranged:
+                        f.truncate(size)             # slices are written in place
+                if ranged:
+                    meta.update(ranged=True, part_size=first, done=[])
+                    slices.extend(
+                        (s, min(s + first, size) - 1) for s in range(first, size, first)
+                    )
+                    validator = meta["etag"] or meta["last_modified"]
+                    slice_headers = {"If-Range": validator} if validator else {}
+                    n = min(self.range_connections - 1, len(slices))
+                    workers.extend(asyncio.create_task(fetch_slices()) for _ in range(n))
+                    metrics.incr("downloads_ranged")
+                    self.logger.info(
+                        f"{out_path.name}: {size} bytes in {len(slices) + 1} ranges "
+                        f"over {n + 1} connections"
+                    )
+            else:
+                return
+            self._write_meta(out_path, meta)
+
+        try:
+            result = await self.engine.afetch(
+                url, part, headers={**headers, "Range": f"bytes=0-{first - 1}"},
+                position=0, on_response=on_response,
+            )
+            if result.status == 304:
+                self._not_modified(out_path)
+                return
+            if result.status == 416:
+                # nothing to slice (an empty archive): ask for it plainly
+                return await self._fetch_single(url, out_path, part, {}, 0, {})
+            result.raise_for_status()
+            expected = min(first, meta["content_length"] or first)
+            if result.status == 206 and result.nbytes != expected:
+                raise IOError(f"short first range: {result.nbytes}/{expected} bytes")
+            if meta.get("ranged"):
+                meta["done"].append(0)
+                self._write_meta(out_path, meta)
+            if workers:
+                await fetch_slices()               # this connection joins in once free
+                await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        self._finish(out_path, part, meta)
+
+    async def _resume_ranged(self, url: str, out_path: Path, part: Path, meta: dict) -> None:
+        """Fetch the slices of an interrupted ranged download its sidecar does not list as done."""
+        size, step = meta["content_length"], meta["part_size"]
+        done = set(meta.get("done", []))
+        slices = deque((s, min(s + step, size) - 1) for s in range(0, size, step) if s not in done)
+        validator = meta["etag"] or meta["last_modified"]
+        self.logger.info(f"Resuming {out_path.name}: {len(slices)} of {len(slices) + len(done)} ranges left")
+        metrics.incr("downloads_resumed")
+        n = max(1, min(self.range_connections, len(slices)))
+        await asyncio.gather(*(
+            self._fetch_slices(url, out_path, part, slices, {"If-Range": validator}, meta)
+            for _ in range(n)
+        ))
+        self._finish(out_path, part, meta)
+
+    async def _fetch_slices(
+        self, url: str, out_path: Path, part: Path, slices: deque, headers: Mapping[str, str], meta: dict
+    ) -> None:
+        """
+        Fetch `slices` into `part` in place, one at a time, each recorded in
+        the sidecar once written. A changed archive (If-Range answered with
+        the full body) discards the partial download: its slices would
+        splice two versions together.
+        """
+        def whole_body(status: int, resp_headers: Mapping[str, str]) -> None:
+            if status == 200:
+                raise RangeMismatch("archive changed upstream mid-download")
+
+        while slices:
+            start, end = slices.popleft()
+            try:
+                res = await self.engine.afetch(
+                    url, part, headers={**headers, "Range": f"bytes={start}-{end}"},
+                    position=start, on_response=whole_body,
+                )
+            except RangeMismatch:
+                part.unlink(missing_ok=True)
+                self._write_meta(out_path, {})
+                raise
+            res.raise_for_status()
+            if res.nbytes != end - start + 1:
+                raise IOError(f"short slice {start}-{end}: {res.nbytes} bytes")
+            meta["done"].append(start)
+            self._write_meta(out_path, meta)
+
+    def _new_meta(
+        self, url: str, resp_headers: Mapping[str, str], total: str, prev: Optional[dict] = None
+    ) -> dict:
+        prev = prev or {}
+        return {
+            "url": url,
+            "etag": resp_headers.get("etag") or prev.get("etag"),
+            "last_modified": resp_headers.get("last-modified") or prev.get("last_modified"),
+            "content_length": int(total) if total.isdigit() else None,
+            "complete": False,
+        }
+
+    def _not_modified(self, out_path: Path) -> None:
+        self.logger.info(f"{out_path.name} unchanged upstream, skipping download")
+        metrics.incr("downloads_not_modified")
+
+    def _finish(self, out_path: Path, part: Path, meta: dict) -> None:
+        """Check the assembled length, then move the `.part` into place."""
+        size = part.stat().st_size
+        if meta["content_length"] is not None and size != meta["content_length"]:
+            raise IOError(f"incomplete transfer: {size}/{meta['content_length']} bytes")
+        part.replace(out_path)
+        meta["complete"] = True
+        self._write_meta(out_path, meta)
+
+    @staticmethod
+    def _meta_path(out_path: Path) -> Path:
+        return out_path.with_name(out_path.name + ".meta.json")
+
+    def _read_meta(self, out_path: Path) -> dict:
+        try:
+            return json.loads(self._meta_path(out_path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, out_path: Path, meta: dict) -> None:
+        tmp = self._meta_path(out_path).with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        tmp.replace(self._meta_path(out_path))
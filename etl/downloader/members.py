@@ -0,0 +1,36 @@
+# etl/downloader/members.py
+import io
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Optional
+
+
+@dataclass(frozen=True)
+class MemberBlob:
+    """
+    An archive member held in memory instead of extracted to disk.
+
+    `path` is where it would have been extracted (DATA_DIR/{year}/{name}),
+    so code that only looks at `.name` / `.stem` / `.parent` (logging, the
+    run manifest) and `.open()` (CsvReader) treats it like a Path.
+    """
+    path: Path
+    data: bytes
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def stem(self) -> str:
+        return self.path.stem
+
+    @property
+    def parent(self) -> Path:
+        return self.path.parent
+
+    def open(self, mode: str = "r", encoding: Optional[str] = None, newline: Optional[str] = None) -> IO:
+        raw = io.BytesIO(self.data)
+        if "b" in mode:
+            return raw
+        return io.TextIOWrapper(raw, encoding=encoding or "utf-8", newline=newline)
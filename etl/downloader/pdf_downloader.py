@@ -1,9 +1,11 @@
 import logging
 import pathlib
 import time
-import requests
 from typing import Optional
 from etl.downloader.protocols import Downloader
+from etl.downloader.engine import DownloadEngine, shared_engine
+from etl.downloader.throttle import backoff_delay
+from etl import metrics
 
 class PDFDownloader(Downloader):
     """
@@ -16,10 +18,12 @@ class PDFDownloader(Downloader):
         retry_attempts: int,
         retry_wait: int,
         logger: Optional[logging.Logger] = None,
+        engine: Optional[DownloadEngine] = None,
     ):
         self.url, self.dest_dir = url, dest_dir
         self.retry_attempts, self.retry_wait = retry_attempts, retry_wait
         self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.engine = engine or shared_engine()
 
     # keep the same method name used by other downloaders so a generic Step can call it
     def download_years(self, years=None, dest_dir=None, max_workers=1):   # type: ignore
@@ -34,11 +38,10 @@ class PDFDownloader(Downloader):
         for attempt in range(1, self.retry_attempts + 1):
             try:
                 start = time.perf_counter()
-                resp = requests.get(self.url, timeout=60, stream=True)
-                resp.raise_for_status()
-                with open(out_path, "wb") as f:
-                    for chunk in resp.iter_content(8192):
-                        f.write(chunk)
+                # stream into .part so an interrupted download is never mistaken for the PDF
+                part = out_path.with_name(out_path.name + ".part")
+                self.engine.fetch(self.url, part).raise_for_status()
+                part.replace(out_path)
                 self.logger.info(
                     f"✔ PDF downloaded ({out_path.stat().st_size/1e6:.1f} MB) "
                     f"in {time.perf_counter()-start:.1f}s"
@@ -48,4 +51,5 @@ class PDFDownloader(Downloader):
                 self.logger.warning(f"Attempt {attempt} failed: {e!r}")
                 if attempt == self.retry_attempts:
                     raise
-                time.sleep(self.retry_wait)
+                metrics.incr("retries")
+                time.sleep(backoff_delay(attempt, self.retry_wait, e))
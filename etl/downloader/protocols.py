@@ -1,6 +1,8 @@
 # etl/downloader/protocols.py
 from pathlib import Path
-from typing import Iterable, List, Protocol
+from typing import BinaryIO, Callable, Iterable, List, Optional, Protocol, TypeVar, runtime_checkable
+
+T = TypeVar("T")
 
 class Downloader(Protocol):
     """
@@ -16,9 +18,31 @@ class Downloader(Protocol):
     ) -> List[Path]:
         ...
 
+@runtime_checkable
+class StreamingDownloader(Downloader, Protocol):
+    """
+    A Downloader that can hand a year's archive to `consume` as a stream
+    while it is still downloading, optionally keeping a copy on disk.
+    """
+    def stream_year(
+        self,
+        year: int,
+        consume: Callable[[BinaryIO], T],
+        archive_copy: Optional[Path] = None,
+    ) -> T:
+        ...
+
 class ArchiveExtractor(Protocol):
     """
     Unpacks a (possibly compressed) tar archive into a destination folder.
     """
     def extract(self, archive_path: Path, dest_dir: Path) -> List[Path]:
         ...
+
+@runtime_checkable
+class StreamingExtractor(ArchiveExtractor, Protocol):
+    """
+    An ArchiveExtractor that can also unpack from a forward-only stream.
+    """
+    def extract_stream(self, fileobj: BinaryIO, dest_dir: Path) -> List[Path]:
+        ...
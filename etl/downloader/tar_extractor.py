@@ -1,51 +1,84 @@
 # etl/downloader/tar_extractor.py
 import logging
+import shutil
 import tarfile
 import time
 from pathlib import Path
-from typing import List, Optional
+from typing import BinaryIO, List, Optional, Union
 
 from etl.downloader.protocols import ArchiveExtractor
+from etl.downloader.members import MemberBlob
 
 class TarExtractor(ArchiveExtractor):
     """
     Extracts only `.csv` files from a (possibly gzipped) tar archive.
     Prevents path traversal and logs progress.
+
+    With `in_memory=True` nothing is written: each CSV comes back as a
+    MemberBlob (bytes + the path it would have had) for the reader to parse
+    directly.
     """
-    def __init__(self, logger: Optional[logging.Logger] = None) -> None:
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        buffer_size: int = 1 << 20,
+        in_memory: bool = False,
+    ) -> None:
         self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.buffer_size = buffer_size
+        self.in_memory = in_memory
 
-    def extract(self, archive_path: Path, dest_dir: Path) -> List[Path]:
-        dest_dir.mkdir(parents=True, exist_ok=True)
-        extracted: List[Path] = []
+    def extract(self, archive_path: Path, dest_dir: Path) -> List[Union[Path, MemberBlob]]:
         self.logger.info(f"Extracting {archive_path.name} → {dest_dir}")
+        with tarfile.open(archive_path, mode="r:*") as tf:
+            return self._extract_members(tf, dest_dir)
+
+    def extract_stream(self, fileobj: BinaryIO, dest_dir: Path) -> List[Union[Path, MemberBlob]]:
+        """
+        Extract from a forward-only stream (e.g. an HTTP body still being
+        downloaded): members are written out as they arrive, with no seeking
+        and no archive on disk.
+        """
+        self.logger.info(f"Streaming extraction → {dest_dir}")
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tf:
+            return self._extract_members(tf, dest_dir)
+
+    # alias for backward‐compatibility
+    def extract_csv(self, archive_path: Path, dest_dir: Path) -> List[Path]:
+        return self.extract(archive_path, dest_dir)
+
+    # ------------------------------------------------------------------ #
+    def _extract_members(self, tf: tarfile.TarFile, dest_dir: Path) -> List[Union[Path, MemberBlob]]:
+        if not self.in_memory:
+            dest_dir.mkdir(parents=True, exist_ok=True)
+        extracted: List[Union[Path, MemberBlob]] = []
         t0 = time.perf_counter()
 
         def safe(member, target_dir: Path) -> bool:
             target = (target_dir / Path(member.name).name).resolve()
             return str(target).startswith(str(target_dir.resolve()))
 
-        with tarfile.open(archive_path, mode="r:*") as tf:
-            for member in tf.getmembers():
-                if not member.isfile() or not member.name.lower().endswith(".csv"):
-                    continue
-                filename = Path(member.name).name
-                target = dest_dir / filename
-                if not safe(member, dest_dir):
-                    self.logger.warning("Skipping unsafe path %s", member.name)
-                    continue
-                src = tf.extractfile(member)
-                if not src:
-                    self.logger.error("Failed to read %s", member.name)
-                    continue
-                with open(target, "wb") as out:
-                    out.write(src.read())
-                extracted.append(target)
+        # iterate instead of getmembers() so stream mode never has to rewind
+        for member in tf:
+            if not member.isfile() or not member.name.lower().endswith(".csv"):
+                continue
+            filename = Path(member.name).name
+            target = dest_dir / filename
+            if not safe(member, dest_dir):
+                self.logger.warning("Skipping unsafe path %s", member.name)
+                continue
+            src = tf.extractfile(member)
+            if not src:
+                self.logger.error("Failed to read %s", member.name)
+                continue
+            if self.in_memory:
+                extracted.append(MemberBlob(target, src.read()))
+                continue
+            with open(target, "wb") as out:
+                shutil.copyfileobj(src, out, self.buffer_size)
+            extracted.append(target)
 
         elapsed = time.perf_counter() - t0
-        self.logger.info(f"Extracted {len(extracted)} CSV files in {elapsed:.1f}s")
+        where = "into memory" if self.in_memory else "to disk"
+        self.logger.info(f"Extracted {len(extracted)} CSV files {where} in {elapsed:.1f}s")
         return extracted
-
-    # alias for backward‐compatibility
-    def extract_csv(self, archive_path: Path, dest_dir: Path) -> List[Path]:
-        return self.extract(archive_path, dest_dir)
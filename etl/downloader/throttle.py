@@ -0,0 +1,159 @@
+# etl/downloader/throttle.py
+"""
+Adaptive concurrency for the download engine.
+
+An AdaptiveLimiter sits in front of every request to one host and sizes its
+concurrency AIMD-style, like TCP congestion control:
+
+• every healthy response raises the limit by 1/limit, i.e. by one after a
+  full window of successes (additive increase) – or, until the first
+  congestion signal, by one per success (slow start: doubling per window)
+• a 429, a 5xx, a transport error or time-to-first-byte drifting well above
+  its long-run baseline multiplies the limit by `decrease` (multiplicative
+  decrease), at most once per window so a burst of failures of requests that
+  were already in flight counts as one congestion signal
+• a `Retry-After` header pauses new requests to the host until it expires
+
+Decisions are published through etl.metrics: counters `throttle_increase`,
+`throttle_decrease`, `throttle_retry_after`, and a `download_limit.<host>` gauge.
+"""
+import asyncio
+import email.utils
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Mapping, Optional
+
+from etl import metrics
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), if any."""
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(
+    attempt: int,
+    base: float,
+    error: Optional[BaseException] = None,
+    cap: float = 300.0,
+) -> float:
+    """
+    Seconds to sleep before retry `attempt + 1`: the server's Retry-After when
+    `error` carries one (HTTPStatusError), else exponential backoff from
+    `base` with jitter (half fixed, half random) so failed clients do not
+    retry in lockstep.
+    """
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        delay = min(cap, retry_after)
+    else:
+        ceiling = min(cap, base * 2 ** (attempt - 1))
+        delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+    metrics.incr("backoff_seconds", delay)
+    return delay
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one host; lives on the engine's event loop."""
+    def __init__(
+        self,
+        name: str,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease: float = 0.5,
+        latency_factor: float = 2.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.logger = (logger or logging.getLogger(__name__)).getChild(self.__class__.__name__)
+        self.in_flight = 0
+        self.baseline: Optional[float] = None     # slow EWMA of time to first byte
+        self.recent: Optional[float] = None       # fast EWMA of time to first byte
+        self._paused_until = 0.0
+        self._last_cut = 0.0
+        self._slow_start = True
+        self._cond: Optional[asyncio.Condition] = None
+        self._publish()
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the start time to pass back to `observe`."""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                    continue
+                if self.in_flight < int(self.limit):
+                    break
+                await self._cond.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def release(self) -> None:
+        self.in_flight -= 1
+        async with self._cond:
+            self._cond.notify_all()
+
+    def observe(
+        self,
+        started: float,
+        status: Optional[int],
+        ttfb: Optional[float] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Feed one outcome back: `status` None means the request failed in transport."""
+        if retry_after is not None and (status == 429 or status == 503):
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            metrics.incr("throttle_retry_after")
+            self.logger.warning(f"{self.name}: server asked to retry after {retry_after:.1f}s")
+        if status is None or status == 429 or status >= 500:
+            self._cut(started, f"HTTP {status}" if status else "transport error")
+            return
+        if ttfb is None:
+            return
+        self.recent = ttfb if self.recent is None else 0.7 * self.recent + 0.3 * ttfb
+        self.baseline = ttfb if self.baseline is None else 0.95 * self.baseline + 0.05 * ttfb
+        if self.recent > self.latency_factor * self.baseline and self.recent > 0.05:
+            self._cut(started, f"latency {self.recent * 1000:.0f} ms vs {self.baseline * 1000:.0f} ms")
+            return
+        if self.limit < self.max_limit:
+            step = 1.0 if self._slow_start else 1 / self.limit
+            self.limit = min(self.max_limit, self.limit + step)
+            metrics.incr("throttle_increase")
+            self._publish()
+
+    # ------------------------------------------------------------------ #
+    def _cut(self, started: float, reason: str) -> None:
+        if started < self._last_cut:
+            return              # sent before the last cut: same congestion episode
+        self._last_cut = time.monotonic()
+        self._slow_start = False
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        if self.recent is not None and self.baseline is not None:
+            self.recent = self.baseline        # judge the new window on its own latency
+        metrics.incr("throttle_decrease")
+        self.logger.info(f"{self.name}: {reason} → concurrency {int(self.limit)}")
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.gauge(f"download_limit.{self.name}", int(self.limit))
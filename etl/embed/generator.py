@@ -9,6 +9,7 @@ import logging
 import time
 from typing import Any, List, Mapping, Optional
 
+from etl import metrics
 from etl.transformer.protocols import Transformer
 from .vertex_client import VertexEmbeddingClient
 
@@ -52,6 +53,7 @@ class EmbeddingGenerator(Transformer):
             try:
                 vecs = self.client.embed_batch(texts)
             except Exception as exc:
+                metrics.incr("errors")
                 # Log the error, but don't 'continue' immediately
                 self.logger.error(
                     f"Batch {batch_idx} FAILED "
@@ -60,7 +60,7 @@ class IndexCreator:
         self._ensure(e, [("iso3", 1)])
         self._ensure(e, [("country", 1)])
         self._ensure(e, [("year", 1)])
-        self._ensure(e, [("iso3", 1), ("year", 1)], name="iso3_year")
+        self._ensure(e, [("iso3", 1), ("year", 1)], name="iso3_year", unique=True)
         self.logger.info("Emissions B-tree indexes ensured.")
 
     # ──────────────────────────────────────────────
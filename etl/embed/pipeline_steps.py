@@ -1,7 +1,7 @@
 # etl/embed/pipeline_steps.py
 from __future__ import annotations
 import logging
-from typing import Iterable, List, Mapping, Any, Optional
+from typing import Iterable, Iterator, List, Mapping, Any, Optional
 
 from etl.pipeline.protocols import Step
 from etl.config import ETLConfig
@@ -25,6 +25,14 @@ class EmbedStep(Step[Iterable[Mapping[str, Any]], List[Mapping[str, Any]]]):
         self.logger.debug(f"EmbedStep got {len(docs_list)} docs")
         return self.generator.transform(docs_list)
 
+    def stream(self, batches: Iterable[Iterable[Mapping[str, Any]]]) -> Iterator[List[Mapping[str, Any]]]:
+        """Embed CHUNK_SIZE docs at a time so vectors reach Mongo progressively."""
+        chunk_size = self.cfg.CHUNK_SIZE
+        for docs in batches:
+            docs_list = list(docs)
+            for i in range(0, len(docs_list), chunk_size):
+                yield self.execute(docs_list[i : i + chunk_size])
+
 
 class IndexStep(Step[None, None]):
     """
@@ -40,3 +48,9 @@ class IndexStep(Step[None, None]):
         self.logger.info("Ensuring Atlas Vector Search index")
         self.builder.ensure()
         return None
+
+    def stream(self, batches: Iterable[Any]) -> Iterator[None]:
+        # drain upstream first: the index is built once, after all loads
+        for _ in batches:
+            pass
+        yield self.execute()
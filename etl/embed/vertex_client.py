@@ -15,6 +15,7 @@ from typing import List, Optional
 import vertexai                              
 from vertexai.language_models import TextEmbeddingModel
 from google.api_core import exceptions as gexc
+from etl import metrics
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -70,6 +71,7 @@ class VertexEmbeddingClient:
         ),
         wait=wait_exponential(multiplier=1, min=1, max=30),
         stop=stop_after_attempt(5),
+        before_sleep=lambda _state: metrics.incr("retries"),
         reraise=True,
     )
     def _call_with_retry(self, texts: List[str]) -> List[List[float]]:
@@ -1,33 +1,69 @@
 # etl/loader/emissions_repository.py
 import logging
-from pymongo import MongoClient
-from pymongo.errors import BulkWriteError
-from typing import Any, Dict, List
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import OperationFailure
+from typing import Any, Dict, Iterable, List, Optional
 from etl.config import ETLConfig
 
 class EmissionsRepository:
-    """Mongo operations on the `emissions` collection."""
+    """
+    Mongo operations on the `emissions` collection: one wide doc per
+    (iso3, year) holding every indicator, unique on that pair.
+    """
     def __init__(self, cfg: ETLConfig, logger: logging.Logger) -> None:
         self.logger = logger.getChild(self.__class__.__name__)
         client = MongoClient(cfg.MONGODB_URI)
         self._col = client[cfg.DB_NAME]["emissions"]
+        self.ensure_indexes()
 
-    def count_for_year(self, year: int) -> int:
-        """How many CO₂ docs do we already have for this calendar year?"""
+    def ensure_indexes(self) -> None:
+        """Unique (iso3, year) index, replacing the older non-unique one of the same name."""
+        existing = self._col.index_information().get("iso3_year")
+        if existing and existing.get("unique"):
+            return
+        if existing:
+            self.logger.info("Replacing non-unique iso3_year index with a unique one")
+            self._col.drop_index("iso3_year")
+        try:
+            self._col.create_index([("iso3", 1), ("year", 1)], unique=True, name="iso3_year")
+        except OperationFailure as e:
+            # duplicates left by pre-upsert loads: keep the lookup index, flag the data
+            self.logger.error(f"Cannot make iso3_year unique ({e}); dedupe `emissions` and rerun")
+            self._col.create_index([("iso3", 1), ("year", 1)], name="iso3_year")
+
+    def count_for_year(self, year: int, fields: Optional[Iterable[str]] = None) -> int:
+        """
+        How many CO₂ docs do we already have for this calendar year?
+        With `fields`, only docs that already carry all of them count.
+        """
         self.logger.debug(f"Counting CO₂ docs for {year}")
-        cnt = self._col.count_documents({"year": year})
+        query: Dict[str, Any] = {"year": year}
+        for f in fields or ():
+            query[f] = {"$exists": True}
+        cnt = self._col.count_documents(query)
         self.logger.debug(f" → found {cnt}")
         return cnt
 
+    def find_country_year(self, iso3: str, year: int) -> Optional[Dict[str, Any]]:
+        """Every indicator for one country-year: a single point lookup on iso3_year."""
+        return self._col.find_one({"iso3": iso3, "year": year})
+
     def bulk_insert(self, docs: List[Dict[str, Any]]) -> None:
-        """Insert many, ignoring duplicate‐key errors."""
-        try:
-            self._col.insert_many(docs, ordered=False)
-        except BulkWriteError as bwe:
-            errs = bwe.details.get("writeErrors", [])
-            dupes = [e for e in errs if e["code"] == 11000]
-            others = [e for e in errs if e["code"] != 11000]
-            if dupes:
-                self.logger.warning(f"Skipped {len(dupes)} duplicate CO₂ docs")
-            if others:
-                self.logger.error(f"{len(others)} other errors: {others}")
+        """
+        Merge docs into their (iso3, year) doc, so indicators loaded in
+        separate batches or runs end up side by side.
+        """
+        if not docs:
+            return
+        ops = [
+            UpdateOne(
+                {"iso3": d["iso3"], "year": d["year"]},
+                {"$set": {k: v for k, v in d.items() if k != "_id"}},
+                upsert=True,
+            )
+            for d in docs
+        ]
+        res = self._col.bulk_write(ops, ordered=False)
+        self.logger.debug(
+            f"Emissions upserted: ins={res.upserted_count} modified={res.modified_count}"
+        )
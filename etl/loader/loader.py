@@ -3,16 +3,20 @@
 import logging
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections.abc import Sequence
 from typing import Iterable, Mapping, Any, Optional as optional
 
-from .protocols import Loader, RecordPreparer, Repository
+from etl import metrics
+from .protocols import BatchPreparer, Loader, RecordPreparer, Repository
 
 class BatchLoader(Loader):
     """
     Coordinates:
-      - preparing each record via injected RecordPreparer
+      - preparing each record via injected RecordPreparer (a whole batch
+        at once when it is also a BatchPreparer)
       - inserting via injected Repository
-      - splitting into batches
+      - splitting into batches (slices, so a RecordBatch stays columnar
+        until each batch is prepared for insertion)
       - optional concurrent execution
     """
     def __init__(
@@ -35,14 +39,16 @@ class BatchLoader(Loader):
         self.retry_attempts= retry_attempts
         self.retry_wait    = retry_wait
 
-    def load(self, records: Iterable[Mapping[str, Any]]) -> None:
-        raw = list(records)
+    def load(self, records: Iterable[Mapping[str, Any]]) -> list[Mapping[str, Any]]:
+        """Insert all records; returns the raw records of batches that finally failed."""
+        raw = records if isinstance(records, Sequence) else list(records)
         total = len(raw)
         batches = [
             raw[i : i + self.batch_size]
             for i in range(0, total, self.batch_size)
         ]
         self.logger.info(f"Loading {total} docs in {len(batches)} batches")
+        failed: list[Mapping[str, Any]] = []
 
         with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch-loader") as exe:
             futures = {
@@ -54,16 +60,22 @@ class BatchLoader(Loader):
                 try:
                     fut.result()
                 except Exception as e:
+                    metrics.incr("errors")
+                    failed.extend(batches[num - 1])
                     self.logger.error(f"Batch {num} finally failed: {e!r}")
                 else:
                     self.logger.info(f"Batch {num} done")
         self.logger.info("All batches complete")
+        return failed
 
     def _load_with_retry(self, batch_num: int, batch: list[Mapping[str, Any]]):
         attempts = 0
         while True:
             try:
-                docs = [ self.preparer.prepare(r) for r in batch ]
+                if isinstance(self.preparer, BatchPreparer):
+                    docs = self.preparer.prepare_many(batch)
+                else:
+                    docs = [ self.preparer.prepare(r) for r in batch ]
                 self._insert_fn(docs)
                 return
             except Exception as e:
@@ -71,4 +83,5 @@ class BatchLoader(Loader):
                 self.logger.error(f"Batch {batch_num} attempt {attempts} error: {e!r}")
                 if attempts >= self.retry_attempts:
                     raise
+                metrics.incr("retries")
                 time.sleep(self.retry_wait)
@@ -2,7 +2,12 @@
 
 import logging
 from datetime import date, datetime, time
-from typing import Any, Mapping
+from typing import Any, List, Mapping, Optional, Sequence
+
+from etl.transformer.batch import RecordBatch
+
+# GSOD fields the document shape replaces: stationId, recordDate, location
+_MOVED = ("station", "record_date", "latitude", "longitude")
 
 class DefaultRecordPreparer:
     """Rename fields and normalize dates."""
@@ -22,3 +27,46 @@ class DefaultRecordPreparer:
             # MongoDB expects [longitude, latitude]
             rec["location"] = {"type": "Point", "coordinates": [lon, lat]}
         return rec
+
+    def prepare_many(self, records: Sequence[Mapping[str, Any]]) -> List[dict[str, Any]]:
+        """
+        `prepare` for every record. A RecordBatch of GSOD rows skips the
+        per-row dicts altogether: each document is built once, in its final
+        shape, straight from the columns.
+        """
+        if isinstance(records, RecordBatch) and all(k in records.keys for k in _MOVED):
+            try:
+                return _documents(records)
+            except ValueError:          # record_date holds something other than dates
+                pass
+        return [self.prepare(r) for r in records]
+
+
+def _point(lon: Any, lat: Any) -> Optional[dict[str, Any]]:
+    if lat is None or lon is None:
+        return None
+    # MongoDB expects [longitude, latitude]
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+
+def _documents(batch: RecordBatch) -> List[dict[str, Any]]:
+    """What `prepare` makes of each row of `batch`, keys in the same order."""
+    keys = [k for k in batch.keys if k not in _MOVED] + ["stationId", "recordDate", "location"]
+    values = [batch.column(k) for k in keys[:-3]]
+    values += [
+        batch.column("station"),
+        batch.datetimes("record_date"),
+        list(map(_point, batch.column("longitude"), batch.column("latitude"))),
+    ]
+    # copies of one template come presized: filling them beats growing a dict per row
+    template = dict.fromkeys(keys)
+    docs = []
+    for row in zip(*values):
+        doc = template.copy()
+        doc.update(zip(keys, row))
+        docs.append(doc)
+    if None in values[-1]:
+        for doc in docs:
+            if doc["location"] is None:
+                del doc["location"]
+    return docs
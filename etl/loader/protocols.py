@@ -1,18 +1,35 @@
 # etl/loader/protocols.py
 
-from typing import Protocol, Iterable, Any, Mapping
+from typing import Protocol, Iterable, Any, List, Mapping, Optional, Sequence, runtime_checkable
 
 class RecordPreparer(Protocol):
     """Transform one raw record → ready-to-insert dict."""
     def prepare(self, raw: Mapping[str, Any]) -> dict[str, Any]:
         ...
 
+@runtime_checkable
+class BatchPreparer(Protocol):
+    """Transform a whole batch of raw records → ready-to-insert dicts, in order."""
+    def prepare_many(self, records: Sequence[Mapping[str, Any]]) -> list[dict[str, Any]]:
+        ...
+
 class Repository(Protocol):
     """Abstract persistent store for prepared records."""
     def bulk_insert(self, docs: list[dict[str, Any]]) -> None:
         ...
 
+class ChunkRepository(Protocol):
+    """Store of report chunks kept in step with a source's latest chunking."""
+    def sync(self, source: str, docs: Iterable[dict[str, Any]]) -> dict[str, int]:
+        ...
+
+    def retire_unsourced(self) -> int:
+        ...
+
 class Loader(Protocol):
-    """High-level ETL loader orchestration."""
-    def load(self, records: Iterable[Mapping[str, Any]]) -> None:
+    """
+    High-level ETL loader orchestration.
+    Returns the records that could not be inserted (None/empty on success).
+    """
+    def load(self, records: Iterable[Mapping[str, Any]]) -> Optional[List[Mapping[str, Any]]]:
         ...
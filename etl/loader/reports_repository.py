@@ -1,29 +1,50 @@
 # etl/loader/reports_repository.py
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 
 from pymongo import MongoClient, UpdateOne
 import pymongo
 from pymongo.errors import OperationFailure
 
 from etl.config import ETLConfig
+from etl.transformer.ipcc_transformer import chunk_hash
 
 
 class ReportsRepository:
-    """Upsert IPCC report chunks; unique on (section, paragraph)."""
+    """
+    IPCC report chunks, unique on (source, hash): `hash` is the chunk's
+    content hash (its text, see `chunk_hash`), `source` the PDF.
+
+    `sync` makes a source's stored chunks match a fresh chunking by hash:
+    new hashes are inserted, vanished ones retired (deleted), and chunks
+    already stored are left alone – text and embedding included – apart
+    from their section / paragraph metadata, so re-chunking only costs
+    embeddings for the text that actually changed.
+
+    Chunks stored before sources were recorded belong to no PDF: a sync
+    claims those whose text it wants, and `retire_unsourced` deletes the
+    rest once every source has been synced.
+    """
 
     def __init__(self, cfg: ETLConfig, logger: logging.Logger) -> None:
         self.logger = logger.getChild(self.__class__.__name__)
         client      = MongoClient(cfg.MONGODB_URI)
         db          = client[cfg.DB_NAME]
         self.col    = db["reports"]
+        self.batch_size = getattr(cfg, "CHUNK_SIZE", 1000)
 
+        # (section, paragraph) no longer identifies a chunk: a paragraph can
+        # span several, and old and new chunkings overlap during a sync
+        if "uix_section_paragraph" in self.col.index_information():
+            self.col.drop_index("uix_section_paragraph")
         # Ensure unique compound index, but swallow “already exists” clash
         try:
             self.col.create_index(
-                [("section", 1), ("paragraph", 1)],
+                [("source", 1), ("hash", 1)],
                 unique=True,
-                name="uix_section_paragraph",
+                name="uix_source_hash",
+                # chunks stored before hashing have none until their first sync
+                partialFilterExpression={"hash": {"$exists": True}},
             )
         except OperationFailure as e:
             if e.code == 85:          # IndexOptionsConflict
@@ -40,12 +61,13 @@ class ReportsRepository:
 
     # real work --------------------------------------------------------- #
     def bulk_upsert(self, docs: List[Dict[str, Any]]) -> None:
+        """Insert chunks not stored yet (by source + hash); never retires any."""
         if not docs:
             return
         ops = [
             UpdateOne(
-                {"section": d["section"], "paragraph": d["paragraph"]},
-                {"$setOnInsert": d},
+                {"source": d.get("source"), "hash": _hash(d)},
+                {"$setOnInsert": {**d, "hash": _hash(d)}},
                 upsert=True,
             )
             for d in docs
@@ -58,16 +80,77 @@ class ReportsRepository:
             result.modified_count,
         )
 
+    def sync(self, source: str, docs: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Make the stored chunks of `source` those of `docs`, by content hash.
+        Stored hashes are recomputed from the stored text, so chunks hashed
+        another way before (or not at all) keep their embeddings too; so do
+        unsourced chunks with wanted text, which this source claims.
+        Returns how many chunks were inserted, moved (metadata updated),
+        retired and unchanged.
+        """
+        wanted: Dict[str, Dict[str, Any]] = {}
+        for d in docs:
+            h = chunk_hash(d["text"])
+            wanted.setdefault(h, {**d, "source": source, "hash": h})   # same text, one chunk
+
+        fields = {"_id": 1, "hash": 1, "source": 1, "section": 1, "paragraph": 1, "text": 1}
+        stored: Dict[str, Dict[str, Any]] = {}
+        retired: List[Any] = []
+        for doc in self.col.find({"source": source}, fields):
+            h = chunk_hash(doc.get("text", ""))
+            if h in wanted and h not in stored:
+                stored[h] = doc
+            else:
+                retired.append(doc["_id"])
+        # unsourced chunks may belong to any PDF: claim the wanted ones, leave the rest
+        for doc in self.col.find({"source": None}, fields):
+            h = chunk_hash(doc.get("text", ""))
+            if h in wanted and h not in stored:
+                stored[h] = doc
+
+        new = [d for h, d in wanted.items() if h not in stored]
+        moves = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {
+                "source": source,
+                "hash": h,
+                "section": wanted[h]["section"],
+                "paragraph": wanted[h]["paragraph"],
+            }})
+            for h, doc in stored.items()
+            if (doc.get("source"), doc.get("hash"), doc.get("section"), doc.get("paragraph"))
+               != (source, h, wanted[h]["section"], wanted[h]["paragraph"])
+        ]
+        # retire first: a moved legacy chunk may take the (source, hash) of a retired copy
+        for i in range(0, len(retired), self.batch_size):
+            self.col.delete_many({"_id": {"$in": retired[i : i + self.batch_size]}})
+        for i in range(0, len(moves), self.batch_size):
+            self.col.bulk_write(moves[i : i + self.batch_size], ordered=False)
+        for i in range(0, len(new), self.batch_size):
+            self.col.insert_many(new[i : i + self.batch_size], ordered=False)
+
+        counts = {
+            "inserted": len(new),
+            "moved": len(moves),
+            "retired": len(retired),
+            "unchanged": len(stored) - len(moves),
+        }
+        self.logger.info(
+            f"Reports synced for {source}: " + ", ".join(f"{k}={v}" for k, v in counts.items())
+        )
+        return counts
+
     def bulk_upsert_embeddings(self, docs: List[Dict[str, Any]]) -> None:
         """
-        Upsert {section, paragraph} and add / update 'embedding'.
+        Add / update 'embedding' on the chunks the docs were read from (by
+        _id), or by (source, hash) for docs without one.
         """
         if not docs:
             return
 
         ops = [
             pymongo.UpdateOne(
-                {"section": d["section"], "paragraph": d["paragraph"]},
+                {"_id": d["_id"]} if "_id" in d else {"source": d.get("source"), "hash": _hash(d)},
                 {"$set": {"embedding": d["embedding"]}},
                 upsert=False,   # assume base doc exists – skip silently otherwise
             )
@@ -77,4 +160,19 @@ class ReportsRepository:
         self.logger.info(
             f"Embeddings upserted: matched={res.matched_count} "
             f"modified={res.modified_count}"
-        )
\ No newline at end of file
+        )
+
+    def retire_unsourced(self) -> int:
+        """
+        Delete the chunks stored before sources that no sync claimed. Run it
+        once every source has been synced: until then any of them may still
+        claim one.
+        """
+        n = self.col.delete_many({"source": None}).deleted_count
+        if n:
+            self.logger.info(f"Retired {n} unsourced chunks no source claimed")
+        return n
+
+
+def _hash(doc: Dict[str, Any]) -> str:
+    return doc.get("hash") or chunk_hash(doc.get("text", ""))
@@ -17,18 +17,28 @@ class MongoRepository:
     def count_for_year(self, year: int) -> int:
         """
         Return how many documents we already have for a given calendar year.
-        We treat any doc whose `record_date` is ≥ Jan 1 of that year
+        We treat any doc whose `recordDate` is ≥ Jan 1 of that year
         and < Jan 1 of the next year as “in that year.”
+        (`DefaultRecordPreparer` renames `record_date` → `recordDate`.)
         """
         start = datetime(year, 1, 1)
         end   = datetime(year + 1, 1, 1)
         self.logger.debug(f"Counting docs for {year}: {start!r}→{end!r}")
         cnt = self._col.count_documents({
-            "record_date": {"$gte": start, "$lt": end}
+            "recordDate": {"$gte": start, "$lt": end}
         })
         self.logger.debug(f"Found {cnt} docs for year {year}")
         return cnt
     
+    def delete_station_year(self, station: str, year: int) -> int:
+        """Remove one station's docs for a year (used to redo a half-loaded file)."""
+        res = self._col.delete_many({
+            "stationId": station,
+            "recordDate": {"$gte": datetime(year, 1, 1), "$lt": datetime(year + 1, 1, 1)},
+        })
+        self.logger.debug(f"Deleted {res.deleted_count} docs for {station}/{year}")
+        return res.deleted_count
+
     def bulk_insert(self, docs: List[Dict[str, Any]]) -> None:
         try:
             self._col.insert_many(docs, ordered=False)
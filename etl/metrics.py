@@ -0,0 +1,270 @@
+# etl/metrics.py
+"""
+Per-step run metrics
+────────────────────
+• process-wide event counters (`incr("retries")`) that any component can bump,
+  and gauges (`gauge("download_limit.host", 8)`) for current values
+• MeteredStep – wraps a pipeline Step and records wall / CPU time, records
+  in/out, bytes read/written, peak RSS, retries and errors for it
+• MetricsCollector – gathers StepMetrics and writes a JSON report plus a
+  Prometheus text-exposition file at the end of a run
+
+Process-wide meters (CPU, I/O bytes, counters) are attributed to a step by
+taking deltas around the step's own work and subtracting the time spent
+pulling from upstream, so chained stream generators are not double counted.
+In concurrent mode stages overlap, so those meters become approximate.
+They stay process-wide: pipelines PipelineDAG runs side by side share
+them, so a step's figures include whatever the other pipelines did
+meanwhile. Only records in/out and batches are the step's own.
+
+An error is counted once, where it is handled: a component that logs
+one and carries on bumps "errors" itself; one that propagates out of a
+step is counted by MeteredStep, so components re-raising must not.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sized, Tuple
+
+try:                                   # not available on Windows
+    import resource
+except ImportError:                    # pragma: no cover
+    resource = None  # type: ignore
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_gauges: Dict[str, float] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Bump a process-wide event counter (e.g. "retries", "errors")."""
+    with _lock:
+        _counters[name] += value
+
+
+def counters() -> Dict[str, float]:
+    """Snapshot of every process-wide counter."""
+    with _lock:
+        return dict(_counters)
+
+
+def gauge(name: str, value: float) -> None:
+    """Set a process-wide gauge (a current value, e.g. an adaptive limit)."""
+    with _lock:
+        _gauges[name] = value
+
+
+def gauges() -> Dict[str, float]:
+    """Snapshot of every process-wide gauge."""
+    with _lock:
+        return dict(_gauges)
+
+
+def _io_bytes() -> Tuple[int, int]:
+    """(bytes read, bytes written) through read/write syscalls, Linux only."""
+    try:
+        with open("/proc/self/io", encoding="ascii") as f:
+            stats = dict(line.split(":", 1) for line in f)
+        return int(stats["rchar"]), int(stats["wchar"])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+def peak_rss_bytes() -> int:
+    """High-water mark of the process resident set size."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+_METERS = ("wall_s", "cpu_s", "bytes_read", "bytes_written", "retries", "errors")
+
+
+def _sample() -> Tuple[float, ...]:
+    rd, wr = _io_bytes()
+    with _lock:
+        retries, errors = _counters["retries"], _counters["errors"]
+    return (time.perf_counter(), time.process_time(), rd, wr, retries, errors)
+
+
+def _count(batch: Any) -> Optional[int]:
+    return len(batch) if isinstance(batch, Sized) else None
+
+
+@dataclass
+class StepMetrics:
+    pipeline: str
+    step: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    records_in: int = 0
+    records_out: int = 0
+    batches: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    peak_rss_bytes: int = 0
+    retries: int = 0
+    errors: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, delta: Iterable[float]) -> None:
+        with self._lock:
+            for name, value in zip(_METERS, delta):
+                setattr(self, name, getattr(self, name) + type(getattr(self, name))(value))
+            self.peak_rss_bytes = max(self.peak_rss_bytes, peak_rss_bytes())
+
+    def count(self, records_in: Any = None, records_out: Any = None) -> None:
+        with self._lock:
+            self.records_in += _count(records_in) or 0
+            self.records_out += _count(records_out) or 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self) if not f.name.startswith("_")}
+
+
+def _diff(after: Tuple[float, ...], before: Tuple[float, ...]) -> List[float]:
+    return [a - b for a, b in zip(after, before)]
+
+
+class MeteredStep:
+    """
+    Transparent proxy around a Step that meters `execute` and `stream`.
+    Used by Pipeline so every step is instrumented without touching it.
+    """
+    def __init__(self, step: Any, metrics: StepMetrics) -> None:
+        self.step = step
+        self.metrics = metrics
+        self.name = getattr(step, "name", step.__class__.__name__)
+
+    def execute(self, data: Any) -> Any:
+        before = _sample()
+        try:
+            out = self.step.execute(data)
+        except Exception:
+            incr("errors")
+            raise
+        finally:
+            self.metrics.add(_diff(_sample(), before))
+        self.metrics.count(data, out)
+        with self.metrics._lock:
+            self.metrics.batches += 1
+        return out
+
+    def stream(self, batches: Iterable[Any]) -> Iterator[Any]:
+        upstream = [0.0] * len(_METERS)
+
+        def pull() -> Iterator[Any]:
+            it = iter(batches)
+            while True:
+                before = _sample()
+                try:
+                    batch = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    for i, v in enumerate(_diff(_sample(), before)):
+                        upstream[i] += v
+                self.metrics.count(records_in=batch)
+                yield batch
+
+        out = iter(self.step.stream(pull()))
+        while True:
+            before, up_before = _sample(), list(upstream)
+            try:
+                batch = next(out)
+            except StopIteration:
+                return
+            except Exception:
+                incr("errors")
+                raise
+            finally:
+                own = _diff(_sample(), before)
+                self.metrics.add(o - (u - ub) for o, u, ub in zip(own, upstream, up_before))
+            self.metrics.count(records_out=batch)
+            with self.metrics._lock:
+                self.metrics.batches += 1
+            yield batch
+
+
+class MetricsCollector:
+    """Collects StepMetrics for every pipeline of a run and exports them."""
+    def __init__(self, logger: Optional[logging.Logger] = None) -> None:
+        self.logger = (logger or logging.getLogger(__name__)).getChild(self.__class__.__name__)
+        self.started = datetime.now(timezone.utc)
+        self.steps: List[StepMetrics] = []
+        self._lock = threading.Lock()
+
+    def wrap(self, pipeline: str, step: Any) -> MeteredStep:
+        metrics = StepMetrics(pipeline=pipeline, step=getattr(step, "name", step.__class__.__name__))
+        with self._lock:
+            self.steps.append(metrics)
+        return MeteredStep(step, metrics)
+
+    # ------------------------------------------------------------------ #
+    def report(self) -> Dict[str, Any]:
+        return {
+            "started": self.started.isoformat(),
+            "finished": datetime.now(timezone.utc).isoformat(),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "counters": counters(),
+            "gauges": gauges(),
+            "steps": [m.as_dict() for m in self.steps],
+        }
+
+    def to_prometheus(self) -> str:
+        series = {
+            "wall_seconds":   ("wall_s",         "Wall-clock seconds spent in the step"),
+            "cpu_seconds":    ("cpu_s",          "Process CPU seconds attributed to the step"),
+            "records_in":     ("records_in",     "Records received by the step"),
+            "records_out":    ("records_out",    "Records emitted by the step"),
+            "batches":        ("batches",        "Batches processed by the step"),
+            "bytes_read":     ("bytes_read",     "Bytes read via syscalls during the step"),
+            "bytes_written":  ("bytes_written",  "Bytes written via syscalls during the step"),
+            "peak_rss_bytes": ("peak_rss_bytes", "Process peak RSS when the step finished"),
+            "retries":        ("retries",        "Retries counted process-wide while the step ran"),
+            "errors":         ("errors",         "Errors counted process-wide while the step ran"),
+        }
+        lines: List[str] = []
+        for metric, (attr, help_text) in series.items():
+            name = f"etl_step_{metric}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for m in self.steps:
+                lines.append(
+                    f'{name}{{pipeline="{m.pipeline}",step="{m.step}"}} {getattr(m, attr)}'
+                )
+        lines.append("# HELP etl_events_total Process-wide ETL event counters")
+        lines.append("# TYPE etl_events_total counter")
+        for event, value in sorted(counters().items()):
+            lines.append(f'etl_events_total{{event="{event}"}} {value}')
+        lines.append("# HELP etl_gauge Process-wide ETL gauges (e.g. adaptive download limits)")
+        lines.append("# TYPE etl_gauge gauge")
+        for name, value in sorted(gauges().items()):
+            lines.append(f'etl_gauge{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, out_dir: Path) -> Tuple[Path, Path]:
+        """
+        Write `etl-metrics-<UTC timestamp>.json` (one per run, for comparing
+        nightly runs) and `etl-metrics.prom` (overwritten, for a textfile scraper).
+        """
+        out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = self.started.strftime("%Y%m%dT%H%M%SZ")
+        json_path = out_dir / f"etl-metrics-{stamp}.json"
+        prom_path = out_dir / "etl-metrics.prom"
+        json_path.write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+        tmp = prom_path.with_suffix(".prom.tmp")
+        tmp.write_text(self.to_prometheus(), encoding="utf-8")
+        tmp.replace(prom_path)        # atomic swap so scrapers never see half a file
+        self.logger.info(f"Metrics written → {json_path}, {prom_path}")
+        return json_path, prom_path
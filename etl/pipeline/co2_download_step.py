@@ -30,14 +30,16 @@ class CO2DownloadStep(Step[Iterable[int], List[Mapping[str,Any]]]):
             years = range(self.config.CO2_START_YEAR, self.config.CO2_END_YEAR + 1)
         years = sorted(set(years))
         self.logger.info(
-            "Starting CO₂ download: indicator=%s, years=%s",
-            self.downloader.indicator, years
+            "Starting CO₂ download: indicators=%s, years=%s",
+            self.downloader.indicators, years
         )
 
         # time the fetch
         start_ts = time.perf_counter()
         try:
-            records = self.downloader.download_years(years=years)
+            records = self.downloader.download_years(
+                years=years, max_workers=self.config.DOWNLOAD_MAX_WORKERS
+            )
         except Exception as e:
             self.logger.error(
                 "CO₂ download failed after %.2f sec for years %s: %s",
@@ -0,0 +1,177 @@
+# etl/pipeline/dataset.py
+"""
+Year-partitioned Parquet dataset of transformed GSOD records.
+
+    {root}/year=2021/part-<ns>-<id>.parquet
+
+TransformStep writes every batch it produces as one part file per year it
+covers; a later run can load straight from the dataset (DatasetSourceStep)
+without downloading or parsing anything, and the same files serve offline
+analytics – `pyarrow.dataset.dataset(root, partitioning="hive")` reads
+them memory-mapped.
+
+Re-transforming a station file writes its rows again in a newer part. Each
+part lists its stations in the Parquet footer, and readers only take a
+station's rows from the newest part that has it, so resumed or repeated
+runs never double-count; `prune` deletes parts left with nothing current.
+Parquet keeps min/max/null counts per column chunk; `stats` reads them
+back per file from the footers alone.
+
+pyarrow is optional: it is imported on first use, with an error naming the
+setting that needs it.
+"""
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from etl.transformer.batch import RecordBatch
+
+_STATIONS = b"climatelens.stations"
+
+
+def _arrow() -> Tuple[Any, Any, Any]:
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError as e:            # pragma: no cover - depends on the install
+        raise RuntimeError("GSOD_DATASET_DIR needs pyarrow (pip install pyarrow)") from e
+    return pa, pc, pq
+
+
+@dataclass
+class PartStats:
+    """Footer statistics of one part file."""
+    path: Path
+    year: int
+    rows: int
+    stations: List[str]
+    first_date: Optional[date]
+    last_date: Optional[date]
+    null_counts: Dict[str, int]
+
+
+class ParquetDataset:
+    def __init__(self, root: Path, logger: Optional[logging.Logger] = None, compression: str = "zstd"):
+        self.root = Path(root)
+        self.compression = compression
+        self.logger = (logger or logging.getLogger(__name__)).getChild(self.__class__.__name__)
+
+    # ── writing ─────────────────────────────────────────────────────────
+    def write(self, records: Sequence[Mapping[str, Any]]) -> List[Path]:
+        """Append `records` as one new part per year they cover; returns the part files."""
+        if not len(records):
+            return []
+        pa, pc, pq = _arrow()
+        batch = records if isinstance(records, RecordBatch) else RecordBatch.from_records(records)
+        table = batch.to_arrow()
+        years = pc.year(table["record_date"])
+        written = []
+        for year in sorted(pc.unique(years).to_pylist()):
+            part = table.filter(pc.equal(years, year))
+            stations = sorted(set(part["station"].to_pylist()))
+            metadata = {**(part.schema.metadata or {}), _STATIONS: json.dumps(stations).encode()}
+            part = part.replace_schema_metadata(metadata)
+            path = self._partition(year) / f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".part")
+            # write aside and rename, so readers never see half a file
+            pq.write_table(part, tmp, compression=self.compression, write_statistics=True)
+            os.replace(tmp, path)
+            written.append(path)
+            self.logger.debug(f"Wrote {part.num_rows} rows for {year} to {path.name}")
+        return written
+
+    def prune(self, years: Optional[Sequence[int]] = None) -> int:
+        """Delete parts every station of which has a newer part; returns how many."""
+        removed = 0
+        for year in years if years is not None else self.years():
+            current = self._current(year)
+            for path in self._parts(year):
+                if path not in current:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+        if removed:
+            self.logger.info(f"Pruned {removed} superseded dataset parts")
+        return removed
+
+    # ── reading ─────────────────────────────────────────────────────────
+    def years(self) -> List[int]:
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            int(d.name.split("=", 1)[1]) for d in self.root.glob("year=*")
+            if d.is_dir() and any(d.glob("*.parquet"))
+        )
+
+    def read_year(self, year: int, batch_size: int = 65536) -> Iterator[RecordBatch]:
+        """The year's current rows, `batch_size` at a time, read memory-mapped."""
+        pa, pc, pq = _arrow()
+        for path, stations in self._current(year).items():
+            f = pq.ParquetFile(path, memory_map=True)
+            keep = None if stations is None else pa.array(sorted(stations))
+            for chunk in f.iter_batches(batch_size=batch_size):
+                if keep is not None:
+                    chunk = chunk.filter(pc.is_in(chunk.column("station"), value_set=keep))
+                if chunk.num_rows:
+                    yield RecordBatch.from_arrow(chunk)
+
+    def stats(self, year: int) -> List[PartStats]:
+        """Per-part row counts, stations, date range and null counts, from the footers."""
+        _, _, pq = _arrow()
+        out = []
+        for path in self._parts(year):
+            meta = pq.read_metadata(path)
+            names = meta.schema.to_arrow_schema().names
+            nulls: Dict[str, int] = dict.fromkeys(names, 0)
+            first = last = None
+            for g in range(meta.num_row_groups):
+                group = meta.row_group(g)
+                for c, name in enumerate(names):
+                    s = group.column(c).statistics
+                    if s is None:
+                        continue
+                    nulls[name] += s.null_count
+                    if name == "record_date" and s.has_min_max:
+                        first = s.min if first is None else min(first, s.min)
+                        last = s.max if last is None else max(last, s.max)
+            out.append(PartStats(path, year, meta.num_rows, self._stations(meta), first, last, nulls))
+        return out
+
+    # ------------------------------------------------------------------ #
+    def _partition(self, year: int) -> Path:
+        return self.root / f"year={year}"
+
+    def _parts(self, year: int) -> List[Path]:
+        # names start with the write time, so sorting puts them in write order
+        return sorted(self._partition(year).glob("part-*.parquet"))
+
+    @staticmethod
+    def _stations(meta: Any) -> List[str]:
+        raw = (meta.metadata or {}).get(_STATIONS)
+        return json.loads(raw) if raw else []
+
+    def _current(self, year: int) -> Dict[Path, Optional[set]]:
+        """
+        Part → the stations to read from it (None: all of them), taking each
+        station from the newest part that has it.
+        """
+        _, _, pq = _arrow()
+        listed = {path: self._stations(pq.read_metadata(path)) for path in self._parts(year)}
+        newest: Dict[str, Path] = {}
+        for path, stations in listed.items():
+            for station in stations:
+                newest[station] = path
+        owned: Dict[Path, set] = {}
+        for station, path in newest.items():
+            owned.setdefault(path, set()).add(station)
+        return {
+            path: None if len(owned[path]) == len(stations) else owned[path]
+            for path, stations in listed.items() if path in owned
+        }
@@ -0,0 +1,35 @@
+# etl/pipeline/dataset_step.py
+from typing import Iterable, Iterator, List
+import logging
+
+from etl.config import ETLConfig
+from etl.pipeline.dataset import ParquetDataset
+from etl.pipeline.protocols import Step
+from etl.transformer.batch import RecordBatch
+
+class DatasetSourceStep(Step[Iterable[int], RecordBatch]):
+    """
+    Stands in for download + transform: each year's records come straight
+    from the Parquet dataset, CHUNK_SIZE rows at a time.
+    """
+    def __init__(self, config: ETLConfig, dataset: ParquetDataset, logger: logging.Logger):
+        self.config  = config
+        self.dataset = dataset
+        self.logger  = logger.getChild(self.__class__.__name__)
+
+    def execute(self, years: Iterable[int]) -> RecordBatch:
+        return RecordBatch.concat(self._read(list(years)))
+
+    def stream(self, batches: Iterable[Iterable[int]]) -> Iterator[RecordBatch]:
+        for years in batches:
+            yield from self._read(list(years))
+
+    def _read(self, years: List[int]) -> Iterator[RecordBatch]:
+        available = set(self.dataset.years())
+        for year in years:
+            if year not in available:
+                self.logger.warning(f"No dataset partition for {year}; transform it without --from-dataset first")
+                continue
+            parts = self.dataset.stats(year)
+            self.logger.info(f"Reading {year} from the dataset: {len(parts)} part files")
+            yield from self.dataset.read_year(year, batch_size=self.config.CHUNK_SIZE)
@@ -1,12 +1,14 @@
 # etl/pipeline/download_step.py
 from pathlib import Path
-from typing import List, Iterable, Optional
+from typing import List, Iterable, Iterator, Optional
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
-from etl.downloader.protocols import Downloader, ArchiveExtractor
+from etl.downloader.protocols import Downloader, ArchiveExtractor, StreamingDownloader, StreamingExtractor
 from etl.config import ETLConfig
 from etl.pipeline.protocols import Step
+from etl import metrics
+from etl.pipeline.manifest import RunManifest
 
 class DownloadStep(Step[Iterable[int], List[Path]]):
     def __init__(
@@ -15,43 +17,136 @@ class DownloadStep(Step[Iterable[int], List[Path]]):
         downloader: Downloader,
         extractor: ArchiveExtractor,
         logger: logging.Logger,
+        manifest: Optional[RunManifest] = None,
     ):
         self.config     = config
         self.downloader = downloader
         self.extractor  = extractor
         self.logger     = logger.getChild(self.__class__.__name__)
+        self.manifest   = manifest
 
     def execute(self, years: Optional[Iterable[int]] = None) -> List[Path]:
-        # if no explicit years list provided, use the full config range
-        if years is None:
-            years = range(self.config.START_YEAR, self.config.END_YEAR + 1)
-        years = list(years)
+        years = self._resolve_years(years)
         self.logger.info(f"Downloading years {years}")
-        
-        raw_dir = self.config.DATA_DIR / "raw"
-        raw_dir.mkdir(parents=True, exist_ok=True)
 
-        archives = self.downloader.download_years(
-            years=years,
-            dest_dir=raw_dir,
-            max_workers=self.config.DOWNLOAD_MAX_WORKERS,
-        )
         all_csv: List[Path] = []
         with ThreadPoolExecutor(
             max_workers=self.config.DOWNLOAD_MAX_WORKERS,
-            thread_name_prefix="tar-extract"
+            thread_name_prefix="year-fetch"
         ) as exe:
-            futures = {}
-            for arch in archives:
-                year_dir_name = Path(arch.name).name.split(".", 1)[0]
-                dest = self.config.DATA_DIR / year_dir_name
-                futures[exe.submit(self.extractor.extract, arch, dest)] = arch
-            # as each extraction finishes, collect its CSVs
+            futures = {exe.submit(self._fetch_year, y): y for y in years}
+            # as each year is downloaded + extracted, collect its CSVs
             for fut in as_completed(futures):
-                archive = futures[fut]
+                year = futures[fut]
                 try:
                     all_csv.extend(fut.result())
                 except Exception as e:
-                    self.logger.error(f"Extraction of {archive.name} failed: {e!r}")
-            self.logger.info(f"DownloadStep: extracted total {len(all_csv)} CSV files")
-            return all_csv
\ No newline at end of file
+                    metrics.incr("errors")
+                    self.logger.error(f"✖ Year {year} failed: {e!r}")
+        self.logger.info(f"DownloadStep: extracted total {len(all_csv)} CSV files")
+        return all_csv
+
+    def stream(self, batches: Iterable[Optional[Iterable[int]]]) -> Iterator[List[Path]]:
+        """
+        Download + extract one year per task and yield that year's CSV paths
+        as soon as it is ready (completion order), so transform/load can start
+        on the first year while later ones are still in flight. At most
+        DOWNLOAD_MAX_WORKERS years are in flight, so a slow consumer holds
+        back further downloads.
+        """
+        max_workers = self.config.DOWNLOAD_MAX_WORKERS
+        for years in batches:
+            pending_years = self._resolve_years(years)
+            self.logger.info(f"Streaming download for years {pending_years}")
+            with ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="year-fetch"
+            ) as exe:
+                in_flight = {}
+                while pending_years or in_flight:
+                    while pending_years and len(in_flight) < max_workers:
+                        y = pending_years.pop(0)
+                        in_flight[exe.submit(self._fetch_year, y)] = y
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        year = in_flight.pop(fut)
+                        try:
+                            csvs = fut.result()
+                        except Exception as e:
+                            metrics.incr("errors")
+                            self.logger.error(f"✖ Year {year} failed: {e!r}")
+                            continue
+                        self.logger.info(f"DownloadStep: year {year} ready with {len(csvs)} CSV files")
+                        if csvs:
+                            yield csvs
+
+    # ------------------------------------------------------------------ #
+    def _resolve_years(self, years: Optional[Iterable[int]]) -> List[int]:
+        # if no explicit years list provided, use the full config range
+        if years is None:
+            years = range(self.config.START_YEAR, self.config.END_YEAR + 1)
+        return list(years)
+
+    def _raw_dir(self) -> Path:
+        raw_dir = self.config.DATA_DIR / "raw"
+        raw_dir.mkdir(parents=True, exist_ok=True)
+        return raw_dir
+
+    def _fetch_year(self, year: int) -> List[Path]:
+        if self.manifest is not None:
+            pending = self.manifest.pending_files(year)
+            if pending is not None:
+                self.logger.info(f"Resuming year {year}: {len(pending)} station files left to load")
+                return pending
+            archive = self.manifest.verified_archive(year)
+            if archive is not None:
+                self.logger.info(f"Year {year} archive already downloaded → {archive}")
+                csvs = self._extract(archive)
+            else:
+                csvs = self._download_and_extract(year)
+        else:
+            csvs = self._download_and_extract(year)
+
+        if self.manifest is not None:
+            csvs = self.manifest.mark_extracted(year, csvs)
+        return csvs
+
+    def _download_and_extract(self, year: int) -> List[Path]:
+        if self._can_stream():
+            # extract while the archive downloads; the optional copy lands
+            # where a regular download would have put it
+            archive = None
+            if self.config.DOWNLOAD_KEEP_ARCHIVE:
+                archive = self._raw_dir() / str(year) / f"{year}.tar.gz"
+            csvs = self.downloader.stream_year(
+                year,
+                lambda body: self.extractor.extract_stream(body, self.config.DATA_DIR / str(year)),
+                archive_copy=archive,
+            )
+            if self.manifest is not None and archive is not None:
+                self.manifest.mark_downloaded(year, archive)
+            return csvs
+
+        archives = self._download(year)
+        csvs: List[Path] = []
+        for arch in archives:
+            if self.manifest is not None:
+                self.manifest.mark_downloaded(year, arch)
+            csvs.extend(self._extract(arch))
+        return csvs
+
+    def _can_stream(self) -> bool:
+        return (
+            isinstance(self.downloader, StreamingDownloader)
+            and isinstance(self.extractor, StreamingExtractor)
+            and self.config.DOWNLOAD_STREAM_EXTRACT
+        )
+
+    def _download(self, year: int) -> List[Path]:
+        return self.downloader.download_years(
+            years=[year], dest_dir=self._raw_dir(), max_workers=1
+        )
+
+    def _extract(self, archive: Path) -> List[Path]:
+        year_dir_name = Path(archive.name).name.split(".", 1)[0]
+        return self.extractor.extract(archive, self.config.DATA_DIR / year_dir_name)
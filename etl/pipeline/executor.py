@@ -0,0 +1,197 @@
+# etl/pipeline/executor.py
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+from etl.pipeline.protocols import Step
+
+_DONE = object()          # end-of-stream sentinel passed between stages
+_POLL = 0.1               # seconds between stop-flag checks while blocked
+
+
+@dataclass
+class StageStats:
+    """Counters for one stage of a QueuedExecutor run."""
+    name: str
+    workers: int
+    batches_in: int = 0
+    batches_out: int = 0
+    busy_s: float = 0.0          # time spent inside Step.stream
+    starved_s: float = 0.0       # time blocked waiting on the input queue
+    blocked_s: float = 0.0       # time blocked on a full output queue (backpressure)
+    max_queue_depth: int = 0     # deepest the *output* queue got
+    _depth_total: int = 0
+    _depth_samples: int = 0
+
+    @property
+    def avg_queue_depth(self) -> float:
+        return self._depth_total / self._depth_samples if self._depth_samples else 0.0
+
+    def utilisation(self, wall_s: float) -> float:
+        """Fraction of the stage's worker-seconds spent doing real work."""
+        capacity = wall_s * self.workers
+        return self.busy_s / capacity if capacity else 0.0
+
+
+class QueuedExecutor:
+    """
+    Runs every Step of a pipeline concurrently: each stage gets its own
+    worker pool and stages are joined by bounded queues, so a slow stage
+    pushes back on its producers instead of letting batches pile up in RAM.
+
+    Each worker pulls one batch, feeds it to `step.stream([batch])` and
+    pushes every output batch downstream.
+    """
+    def __init__(
+        self,
+        workers: Optional[Sequence[int]] = None,
+        queue_size: int = 4,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.workers    = list(workers) if workers else None
+        self.queue_size = max(1, queue_size)
+        self.logger     = (logger or logging.getLogger(__name__)).getChild(self.__class__.__name__)
+        self.stats: List[StageStats] = []
+        self.wall_s = 0.0
+
+    def run(self, steps: Sequence[Step[Any, Any]], initial_input: Any = None) -> Any:
+        workers = self.workers or [1] * len(steps)
+        if len(workers) != len(steps):
+            raise ValueError(f"Got {len(workers)} worker counts for {len(steps)} steps")
+
+        # queues[0] only holds the seed batch + sentinel; the rest are bounded
+        queues = [queue.Queue()] + [
+            queue.Queue(maxsize=self.queue_size) for _ in range(len(steps))
+        ]
+        self.stats = [
+            StageStats(name=getattr(step, "name", step.__class__.__name__), workers=max(1, n))
+            for step, n in zip(steps, workers)
+        ]
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        lock = threading.Lock()
+
+        queues[0].put(initial_input)
+        queues[0].put(_DONE)
+
+        t0 = time.perf_counter()
+        pools = []
+        for idx, step in enumerate(steps):
+            stats = self.stats[idx]
+            remaining = [stats.workers]
+            pool = ThreadPoolExecutor(
+                max_workers=stats.workers,
+                thread_name_prefix=f"stage-{stats.name}",
+            )
+            for _ in range(stats.workers):
+                pool.submit(
+                    self._worker, step, stats, queues[idx], queues[idx + 1],
+                    remaining, lock, stop, errors,
+                )
+            pools.append(pool)
+
+        last = None
+        try:
+            while True:
+                item = self._get(queues[-1], stop)
+                if item is _DONE:
+                    break
+                last = item
+        finally:
+            stop.set()       # no-op on success; unblocks workers on error / Ctrl-C
+            for pool in pools:
+                pool.shutdown(wait=True)
+            self.wall_s = time.perf_counter() - t0
+            self._report()
+
+        if errors:
+            raise errors[0]
+        return last
+
+    # ------------------------------------------------------------------ #
+    def _worker(self, step, stats, in_q, out_q, remaining, lock, stop, errors) -> None:
+        try:
+            while not stop.is_set():
+                tic = time.perf_counter()
+                item = self._get(in_q, stop)
+                with lock:
+                    stats.starved_s += time.perf_counter() - tic
+                if item is _DONE:
+                    self._put(in_q, _DONE, stop)   # let sibling workers see it too
+                    break
+                with lock:
+                    stats.batches_in += 1
+
+                tic = time.perf_counter()
+                blocked = 0.0
+                for out in step.stream(iter([item])):
+                    put_tic = time.perf_counter()
+                    self._put(out_q, out, stop)
+                    put_s = time.perf_counter() - put_tic
+                    blocked += put_s
+                    with lock:
+                        stats.batches_out += 1
+                        stats.blocked_s += put_s
+                        depth = out_q.qsize()
+                        stats.max_queue_depth = max(stats.max_queue_depth, depth)
+                        stats._depth_total += depth
+                        stats._depth_samples += 1
+                    if stop.is_set():
+                        break
+                with lock:
+                    stats.busy_s += time.perf_counter() - tic - blocked
+        except Exception as e:
+            self.logger.error(f"Stage {stats.name} failed: {e!r}")
+            with lock:
+                errors.append(e)
+            stop.set()
+        finally:
+            with lock:
+                remaining[0] -= 1
+                last_worker = remaining[0] == 0
+            if last_worker:
+                self._put(out_q, _DONE, stop, force=True)
+
+    @staticmethod
+    def _get(q: queue.Queue, stop: threading.Event) -> Any:
+        while True:
+            try:
+                return q.get(timeout=_POLL)
+            except queue.Empty:
+                if stop.is_set():
+                    return _DONE
+
+    @staticmethod
+    def _put(q: queue.Queue, item: Any, stop: threading.Event, force: bool = False) -> None:
+        while True:
+            try:
+                q.put(item, timeout=_POLL)
+                return
+            except queue.Full:
+                if stop.is_set():
+                    if force:
+                        # make room for the sentinel; the run is aborting anyway
+                        try:
+                            q.get_nowait()
+                        except queue.Empty:
+                            pass
+                    else:
+                        return
+
+    def _report(self) -> None:
+        if not self.stats:
+            return
+        self.logger.info(f"Concurrent pipeline finished in {self.wall_s:.1f}s")
+        for s in self.stats:
+            self.logger.info(
+                f"  {s.name:<18} workers={s.workers} in={s.batches_in} out={s.batches_out} "
+                f"busy={s.busy_s:.1f}s starved={s.starved_s:.1f}s blocked={s.blocked_s:.1f}s "
+                f"util={s.utilisation(self.wall_s):.0%} "
+                f"queue max={s.max_queue_depth} avg={s.avg_queue_depth:.1f}"
+            )
+        bottleneck = max(self.stats, key=lambda s: s.utilisation(self.wall_s))
+        self.logger.info(f"  bottleneck stage: {bottleneck.name}")
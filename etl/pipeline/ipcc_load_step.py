@@ -2,14 +2,24 @@ from typing import List, Dict, Any, Optional
 import logging
 from etl.pipeline.protocols import Step
 from etl.config import ETLConfig
-from etl.loader.loader import BatchLoader   # ← already written earlier
+from etl.loader.protocols import ChunkRepository
 
 class IPCCLoadStep(Step[List[Dict[str, Any]], None]):
-    def __init__(self, cfg: ETLConfig, loader: BatchLoader, logger: Optional[logging.Logger]=None):
-        self.cfg, self.loader = cfg, loader
+    """
+    Sync each PDF's chunks into the repository by content hash: only new
+    text is written (and later embedded), vanished text is retired. Chunks
+    stored before sources were recorded are retired once all are synced.
+    """
+    def __init__(self, cfg: ETLConfig, repository: ChunkRepository, logger: Optional[logging.Logger]=None):
+        self.cfg, self.repository = cfg, repository
         self.logger = (logger or logging.getLogger(__name__)).getChild(self.__class__.__name__)
 
     def execute(self, docs: List[Dict[str, Any]]) -> None:
         self.logger.info(f"Loading {len(docs)} report chunks")
-        self.loader.load(docs)
+        by_source: Dict[str, List[Dict[str, Any]]] = {}
+        for d in docs:
+            by_source.setdefault(d["source"], []).append(d)
+        for source, chunks in by_source.items():
+            self.repository.sync(source, chunks)
+        self.repository.retire_unsourced()
         self.logger.info("LoadStep complete")
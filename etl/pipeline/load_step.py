@@ -1,23 +1,28 @@
 # etl/pipeline/load_step.py
-from typing import List, Dict, Any
+from typing import Dict, Any, Optional, Sequence
 import logging
 
 from etl.config import ETLConfig
 from etl.loader.protocols import Loader
 from etl.pipeline.protocols import Step
+from etl.pipeline.manifest import RunManifest
 
-class LoadStep(Step[List[Dict[str,Any]], None]):
+class LoadStep(Step[Sequence[Dict[str,Any]], None]):
     def __init__(
         self,
         config: ETLConfig,
         loader: Loader,
         logger: logging.Logger,
+        manifest: Optional[RunManifest] = None,
     ):
         self.config = config
         self.loader = loader
         self.logger = logger.getChild(self.__class__.__name__)
+        self.manifest = manifest
 
-    def execute(self, records: List[Dict[str,Any]]) -> None:
+    def execute(self, records: Sequence[Dict[str,Any]]) -> None:
         self.logger.info(f"Loading {len(records)} records")
-        self.loader.load(records)
+        failed = self.loader.load(records)
+        if self.manifest is not None:
+            self.manifest.mark_loaded(records, failed)
         self.logger.info("LoadStep complete")
@@ -0,0 +1,256 @@
+# etl/pipeline/manifest.py
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from etl.transformer.batch import RecordBatch
+
+# ordered lifecycle of a GSOD year / station file
+STAGES = ("downloaded", "extracted", "transformed", "loaded")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS years (
+    year           INTEGER PRIMARY KEY,
+    stage          TEXT NOT NULL,
+    archive_path   TEXT,
+    archive_sha256 TEXT,
+    updated_at     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    year        INTEGER NOT NULL,
+    station     TEXT NOT NULL,
+    path        TEXT NOT NULL,
+    sha256      TEXT NOT NULL,
+    stage       TEXT NOT NULL,
+    rows        INTEGER NOT NULL DEFAULT 0,
+    loaded_rows INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT NOT NULL,
+    PRIMARY KEY (year, station)
+);
+"""
+
+
+def sha256_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _digest(path: Any) -> str:
+    # MemberBlob (zero-disk mode) carries its bytes; anything else is on disk
+    data = getattr(path, "data", None)
+    return hashlib.sha256(data).hexdigest() if data is not None else sha256_file(path)
+
+
+def file_key(path: Path) -> Tuple[int, str]:
+    """GSOD layout: DATA_DIR/{year}/{station}.csv → (year, station)."""
+    return int(path.parent.name), path.stem
+
+
+def record_key(rec: Mapping[str, Any]) -> Tuple[int, str]:
+    return rec["record_date"].year, rec["station"]
+
+
+def record_keys(records: Iterable[Mapping[str, Any]]) -> Counter:
+    """(year, station) → rows; read straight from the columns of a RecordBatch."""
+    if isinstance(records, RecordBatch) and len(records):
+        years = map(attrgetter("year"), records.column("record_date"))
+        return Counter(zip(years, records.column("station")))
+    return Counter(map(record_key, records))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class RunManifest:
+    """
+    Durable SQLite record of how far each GSOD year and station file got
+    (downloaded → extracted → transformed → loaded), with checksums, so a
+    crashed backfill resumes where it stopped instead of starting over.
+    """
+    def __init__(self, path: Path, logger: Optional[logging.Logger] = None) -> None:
+        self.path = path
+        self.logger = (logger or logging.getLogger(__name__)).getChild(self.__class__.__name__)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ── year level ──────────────────────────────────────────────────────
+    def year_stage(self, year: int) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT stage FROM years WHERE year=?", (year,)).fetchone()
+        return row[0] if row else None
+
+    def known_years(self) -> Dict[int, str]:
+        with self._lock:
+            return dict(self._db.execute("SELECT year, stage FROM years").fetchall())
+
+    def mark_downloaded(self, year: int, archive: Path) -> None:
+        digest = sha256_file(archive)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO years (year, stage, archive_path, archive_sha256, updated_at) "
+                "VALUES (?, 'downloaded', ?, ?, ?) "
+                "ON CONFLICT(year) DO UPDATE SET stage='downloaded', archive_path=excluded.archive_path, "
+                "archive_sha256=excluded.archive_sha256, updated_at=excluded.updated_at",
+                (year, str(archive), digest, _now()),
+            )
+        self.logger.debug(f"year {year} downloaded sha256={digest[:12]}")
+
+    def verified_archive(self, year: int) -> Optional[Path]:
+        """Archive recorded for `year`, if it is still on disk with the same checksum."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT archive_path, archive_sha256 FROM years WHERE year=?", (year,)
+            ).fetchone()
+        if not row or not row[0]:
+            return None
+        archive = Path(row[0])
+        if archive.exists() and sha256_file(archive) == row[1]:
+            return archive
+        return None
+
+    # ── station-file level ──────────────────────────────────────────────
+    def mark_extracted(self, year: int, csv_paths: Iterable[Path]) -> List[Path]:
+        """
+        Record the station files of a freshly extracted year and return the
+        ones that still need loading: a file already loaded with the same
+        checksum keeps its state, a changed file starts over.
+        """
+        paths = list(csv_paths)
+        now = _now()
+        rows = [(year, p.stem, str(getattr(p, "path", p)), _digest(p), now) for p in paths]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT INTO years (year, stage, updated_at) VALUES (?, 'extracted', ?) "
+                "ON CONFLICT(year) DO UPDATE SET stage='extracted', updated_at=excluded.updated_at",
+                (year, now),
+            )
+            self._db.executemany(
+                "INSERT INTO files (year, station, path, sha256, stage, updated_at) "
+                "VALUES (?, ?, ?, ?, 'extracted', ?) "
+                "ON CONFLICT(year, station) DO UPDATE SET "
+                "  stage = CASE WHEN sha256 = excluded.sha256 THEN stage ELSE 'extracted' END, "
+                "  rows = CASE WHEN sha256 = excluded.sha256 THEN rows ELSE 0 END, "
+                "  loaded_rows = CASE WHEN sha256 = excluded.sha256 THEN loaded_rows ELSE 0 END, "
+                "  path = excluded.path, sha256 = excluded.sha256, updated_at = excluded.updated_at",
+                rows,
+            )
+            loaded = {
+                station for (station,) in self._db.execute(
+                    "SELECT station FROM files WHERE year=? AND stage='loaded'", (year,)
+                )
+            }
+            self._db.execute("COMMIT")
+        self._promote_years([year])
+        return [p for p in paths if p.stem not in loaded]
+
+    def pending_files(self, year: int) -> Optional[List[Path]]:
+        """
+        Station files of an extracted year that still need loading, or None
+        when the year must be (re-)extracted (never extracted, or files gone –
+        always the case for in-memory members).
+        """
+        if self.year_stage(year) not in ("extracted", "transformed", "loaded"):
+            return None
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path, stage FROM files WHERE year=?", (year,)
+            ).fetchall()
+        pending = [Path(p) for p, stage in rows if stage != "loaded"]
+        if not all(p.exists() for p in pending):
+            return None
+        return pending
+
+    def partially_loaded(self) -> List[Tuple[int, str]]:
+        """
+        (year, station) files whose insert may have been interrupted: every
+        transformed file not yet loaded. Loads are only counted once the
+        loader returns, so a crash mid-insert can leave rows in Mongo while
+        `loaded_rows` is still 0.
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT year, station FROM files WHERE stage = 'transformed'"
+            ).fetchall()
+
+    def reset_loaded(self, year: int, station: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE files SET loaded_rows=0, updated_at=? WHERE year=? AND station=?",
+                (_now(), year, station),
+            )
+
+    def mark_transformed(self, paths: Iterable[Path], records: Iterable[Mapping[str, Any]]) -> None:
+        tally = record_keys(records)
+        now = _now()
+        updates = [(tally.get(file_key(p), 0), now, *file_key(p)) for p in paths]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "UPDATE files SET stage='transformed', rows=?, loaded_rows=0, updated_at=? "
+                "WHERE year=? AND station=? AND stage != 'loaded'",
+                updates,
+            )
+            # files with no valid rows have nothing left to load
+            self._db.execute(
+                "UPDATE files SET stage='loaded' WHERE stage='transformed' AND rows=0"
+            )
+            self._db.execute("COMMIT")
+        self._promote_years({year for _, _, year, _ in updates})
+
+    def mark_loaded(
+        self,
+        records: Iterable[Mapping[str, Any]],
+        failed: Optional[Iterable[Mapping[str, Any]]] = None,
+    ) -> None:
+        # `failed` is a subset of `records`: count what is left per station
+        tally = record_keys(records) - record_keys(failed or ())
+        if not tally:
+            return
+        now = _now()
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "UPDATE files SET loaded_rows = loaded_rows + ?, updated_at=? "
+                "WHERE year=? AND station=?",
+                [(n, now, year, station) for (year, station), n in tally.items()],
+            )
+            self._db.execute(
+                "UPDATE files SET stage='loaded' "
+                "WHERE stage='transformed' AND loaded_rows >= rows"
+            )
+            self._db.execute("COMMIT")
+        self._promote_years({year for year, _ in tally})
+
+    def _promote_years(self, years: Iterable[int]) -> None:
+        """Advance a year's stage to the least-advanced stage among its files."""
+        with self._lock:
+            for year in years:
+                stages = {
+                    s for (s,) in self._db.execute(
+                        "SELECT DISTINCT stage FROM files WHERE year=?", (year,)
+                    )
+                }
+                if not stages:
+                    continue
+                stage = min(stages, key=STAGES.index)
+                self._db.execute(
+                    "UPDATE years SET stage=?, updated_at=? WHERE year=?", (stage, _now(), year)
+                )
@@ -1,15 +1,59 @@
-from typing import Any, List
+from typing import Any, Iterable, Iterator, List, Optional
+from etl.metrics import MetricsCollector
 from etl.pipeline.protocols import Step
+from etl.pipeline.executor import QueuedExecutor
+
+PIPELINE_MODES = ("batch", "stream", "concurrent")
 
 class Pipeline:
     """
     Chains a sequence of Steps: Download → Transform → Load
+
+    • batch      – each Step.execute gets the fully materialized output of the previous one
+    • stream     – Step.stream generators are chained, so batches flow through every
+                   step as soon as they are produced and peak memory is bounded by
+                   the batch size instead of the dataset size
+    • concurrent – like stream, but every step runs in its own worker pool joined
+                   by bounded queues (see QueuedExecutor), so stages overlap
+
+    Every step is metered (see etl.metrics); pass a shared MetricsCollector to
+    gather several pipelines into one report.
     """
-    def __init__(self, steps: List[Step[Any, Any]]):
+    def __init__(
+        self,
+        steps: List[Step[Any, Any]],
+        mode: str = "batch",
+        executor: Optional[QueuedExecutor] = None,
+        name: str = "pipeline",
+        metrics: Optional[MetricsCollector] = None,
+    ):
+        if mode not in PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode {mode!r}; expected one of {PIPELINE_MODES}")
         self.steps = steps
+        self.mode = mode
+        self.executor = executor or QueuedExecutor()
+        self.name = name
+        self.metrics = metrics or MetricsCollector()
+        self._metered = [self.metrics.wrap(name, step) for step in steps]
 
     def run(self, initial_input: Any = None) -> Any:
+        if self.mode == "concurrent":
+            return self.executor.run(self._metered, initial_input)
+
+        if self.mode == "stream":
+            last = None
+            for last in self.stream(initial_input):
+                pass
+            return last
+
         data = initial_input
-        for step in self.steps:
+        for step in self._metered:
             data = step.execute(data)
-        return data
\ No newline at end of file
+        return data
+
+    def stream(self, initial_input: Any = None) -> Iterator[Any]:
+        """Lazily chain every step's `stream`; the initial input is one batch."""
+        data: Iterable[Any] = iter([initial_input])
+        for step in self._metered:
+            data = step.stream(data)
+        return iter(data)
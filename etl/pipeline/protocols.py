@@ -1,6 +1,6 @@
 # etl/pipeline/protocols.py
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from typing import Generic, Iterable, Iterator, TypeVar
 
 T = TypeVar("T")
 R = TypeVar("R")
@@ -12,3 +12,12 @@ class Step(ABC, Generic[T, R]):
     @abstractmethod
     def execute(self, data: T) -> R:
         ...
+
+    def stream(self, batches: Iterable[T]) -> Iterator[R]:
+        """
+        Streaming variant of `execute`: consume an iterator of input batches
+        and lazily yield output batches. The default runs `execute` once per
+        batch; steps that can emit smaller / earlier batches override it.
+        """
+        for batch in batches:
+            yield self.execute(batch)
@@ -1,25 +1,81 @@
 # etl/pipeline/transform_step.py
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Sequence
 import logging
 
+from etl import metrics
 from etl.config import ETLConfig
-from etl.transformer.protocols import Transformer
+from etl.transformer.batch import RecordBatch
+from etl.transformer.protocols import StreamingTransformer, Transformer
 from etl.pipeline.protocols import Step
+from etl.pipeline.manifest import RunManifest
+from etl.pipeline.dataset import ParquetDataset
 
-class TransformStep(Step[List[Path], List[dict]]):
+class TransformStep(Step[List[Path], Sequence[dict]]):
     def __init__(
         self,
         config: ETLConfig,
         transformer: Transformer,
         logger: logging.Logger,
+        manifest: Optional[RunManifest] = None,
+        dataset: Optional[ParquetDataset] = None,
     ):
         self.config      = config
         self.transformer = transformer
         self.logger      = logger.getChild(self.__class__.__name__)
+        self.manifest    = manifest
+        self.dataset     = dataset
 
-    def execute(self, paths: List[Path]) -> List[dict]:
+    def execute(self, paths: List[Path]) -> Sequence[dict]:
         self.logger.info(f"Transforming {len(paths)} files")
-        records = self.transformer.transform(paths)
+        records = self._transform(paths)
         self.logger.info(f"TransformStep: {len(records)} records ready")
         return records
+
+    def stream(self, batches: Iterable[List[Path]]) -> Iterator[Sequence[dict]]:
+        """
+        Yield records in CHUNK_SIZE slices as files finish transforming. A
+        StreamingTransformer hands over each task's files as they complete;
+        any other transformer gets STREAM_FILE_BATCH files at a time. Either
+        way only a bounded slice of files is held in memory, regardless of
+        how many years are being processed. Slices of a RecordBatch are
+        RecordBatches too: rows stay columnar until the loader encodes them.
+        """
+        file_batch = self.config.STREAM_FILE_BATCH
+        chunk_size = self.config.CHUNK_SIZE
+        for paths in batches:
+            paths = list(paths)
+            self.logger.info(f"Streaming transform of {len(paths)} files")
+            for records in self._stream(paths, file_batch):
+                for j in range(0, len(records), chunk_size):
+                    yield records[j : j + chunk_size]
+
+    def _stream(self, paths: List[Path], file_batch: int) -> Iterator[Sequence[dict]]:
+        if isinstance(self.transformer, StreamingTransformer):
+            for files, records in self.transformer.stream(paths):
+                self._record(files, records)
+                yield records
+            return
+        for i in range(0, len(paths), file_batch):
+            yield self._transform(paths[i : i + file_batch])
+
+    def _transform(self, paths: List[Path]) -> Sequence[dict]:
+        if isinstance(self.transformer, StreamingTransformer):
+            # per task: only the files it read are recorded as transformed
+            return RecordBatch.concat(self._stream(paths, len(paths)))
+        records = self.transformer.transform(paths)
+        self._record(paths, records)
+        return records
+
+    def _record(self, paths: List[Path], records: Sequence[dict]) -> None:
+        # the dataset gets whole transformer batches: one part file per batch and year
+        if self.dataset is not None:
+            try:
+                self.dataset.write(records)
+            except ValueError as e:
+                # a value Arrow cannot type (e.g. an int past 64 bits) costs the
+                # dataset these files, not the load
+                metrics.incr("errors")
+                self.logger.error(f"Dataset write of {len(paths)} files failed: {e}")
+        if self.manifest is not None:
+            self.manifest.mark_transformed(paths, records)
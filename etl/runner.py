@@ -0,0 +1,491 @@
+# etl/runner.py
+"""
+Library entry point for the ClimateLens ETL.
+
+`run_etl(cfg)` wires the GSOD, CO₂, IPCC and embedding pipelines into a
+PipelineDAG (embedding depends on IPCC, index builds on everything that
+writes) and runs independent pipelines in parallel. `etl.main` is only a
+CLI wrapper around it.
+"""
+import logging
+from typing import Dict, List, Optional
+
+from etl.config import ETLConfig
+from etl.metrics import MetricsCollector
+from etl.pipeline.dag import NodeResult, PipelineDAG
+from etl.pipeline.executor import QueuedExecutor
+from etl.pipeline.manifest import RunManifest
+from etl.pipeline.pipeline import Pipeline
+
+from etl.downloader.engine import DownloadEngine
+
+# GSOD imports
+from etl.downloader.http_downloader import HTTPDownloader
+from etl.downloader.tar_extractor import TarExtractor
+from etl.pipeline.download_step import DownloadStep
+from etl.pipeline.transform_step import TransformStep
+from etl.pipeline.load_step import LoadStep
+from etl.pipeline.dataset import ParquetDataset
+from etl.pipeline.dataset_step import DatasetSourceStep
+from etl.transformer.concurrent import ConcurrentTransformer
+from etl.loader.loader import BatchLoader
+from etl.loader.preparer import DefaultRecordPreparer
+from etl.loader.repository import MongoRepository
+
+# CO₂ imports
+from etl.downloader.co2_downloader import CO2Downloader
+from etl.pipeline.co2_download_step import CO2DownloadStep
+from etl.transformer.co2_transformer import PRIMARY_FIELD, CO2Transformer, field_for
+from etl.transformer.quarantine import Quarantine
+from etl.pipeline.co2_transform_step import CO2TransformStep
+from etl.loader.emissions_repository import EmissionsRepository
+
+# IPCC imports
+from etl.downloader.pdf_downloader import PDFDownloader
+from etl.pipeline.ipcc_download_step import IPCCDownloadStep
+from etl.transformer.ipcc_transformer import IPCCTransformer
+from etl.pipeline.ipcc_load_step import IPCCLoadStep
+from etl.loader.reports_repository import ReportsRepository
+from etl.pipeline.ipcc_transform_step import IPCCTransformStep
+from etl.loader.IdentityPreparer import IdentityPreparer
+
+
+class ETLRunError(RuntimeError):
+    """Raised by run_etl when one or more pipelines failed."""
+    def __init__(self, results: Dict[str, NodeResult]) -> None:
+        self.results = results
+        failed = [r.name for r in results.values() if r.status == "failed"]
+        super().__init__(f"ETL pipelines failed: {failed}")
+
+
+def _executor(cfg: ETLConfig, logger: logging.Logger, workers=None) -> QueuedExecutor:
+    return QueuedExecutor(workers=workers, queue_size=cfg.PIPELINE_QUEUE_SIZE, logger=logger)
+
+
+def _engine(cfg: ETLConfig, logger: logging.Logger) -> DownloadEngine:
+    return DownloadEngine(
+        max_connections=cfg.DOWNLOAD_MAX_CONNECTIONS,
+        buffer_size=cfg.DOWNLOAD_BUFFER_SIZE,
+        logger=logger,
+        adaptive=cfg.DOWNLOAD_ADAPTIVE,
+        initial_concurrency=cfg.DOWNLOAD_INITIAL_CONCURRENCY,
+    )
+
+
+# ── GSOD pipeline ─────────────────────────────────────────────────────────────
+def run_gsod(
+    cfg: ETLConfig,
+    logger: logging.Logger,
+    dry_run: bool,
+    run_metrics: MetricsCollector,
+    engine: DownloadEngine,
+) -> None:
+    # 1) build the full list of candidate years
+    all_gsod_years = list(range(cfg.START_YEAR, cfg.END_YEAR + 1))
+    dataset = ParquetDataset(cfg.GSOD_DATASET_DIR, logger) if cfg.GSOD_DATASET_DIR else None
+    if cfg.GSOD_FROM_DATASET:
+        if dataset is None:
+            raise ValueError("GSOD_FROM_DATASET needs GSOD_DATASET_DIR")
+        run_gsod_from_dataset(cfg, logger, dry_run, run_metrics, dataset, all_gsod_years)
+        return
+
+    # 2) split into “already loaded” vs “to process”: the run manifest is
+    #    authoritative for years it knows; Mongo is asked about the rest
+    manifest = RunManifest(cfg.MANIFEST_PATH or cfg.DATA_DIR / "manifest.sqlite3", logger)
+    known_years = manifest.known_years()
+    gsod_loaded = [y for y in all_gsod_years if known_years.get(y) == "loaded"]
+    if not dry_run:
+        repo = MongoRepository(cfg, logger)
+        gsod_loaded += [
+            y for y in all_gsod_years
+            if y not in known_years and repo.count_for_year(y) > 0
+        ]
+        # a crash mid-insert can leave part of any transformed station file in
+        # Mongo (which has no unique key to stop a second copy): drop and redo it
+        for year, station in manifest.partially_loaded():
+            repo.delete_station_year(station, year)
+            manifest.reset_loaded(year, station)
+    gsod_loaded.sort()
+    gsod_to_process = [y for y in all_gsod_years if y not in gsod_loaded]
+
+    logger.info(f"Skipping already-loaded GSOD years: {gsod_loaded}")
+    logger.info(f"Will process GSOD years: {gsod_to_process}")
+
+    # 3) if there’s nothing left, bail out early
+    if not gsod_to_process:
+        logger.info("No new GSOD years to ingest; skipping GSOD pipeline.")
+        return
+
+    # 4) wire up the steps to only run on gsod_to_process
+    gsod_downloader = HTTPDownloader(
+        base_url=cfg.DOWNLOAD_BASE_URL,
+        retry_attempts=cfg.DOWNLOAD_RETRY_ATTEMPTS,
+        retry_wait=cfg.DOWNLOAD_RETRY_WAIT,
+        logger=logger,
+        engine=engine,
+        range_connections=cfg.DOWNLOAD_RANGE_CONNECTIONS,
+        range_part_size=cfg.DOWNLOAD_RANGE_PART_SIZE,
+    )
+    gsod_extractor  = TarExtractor(
+        logger,
+        buffer_size=cfg.DOWNLOAD_BUFFER_SIZE,
+        in_memory=cfg.GSOD_ZERO_DISK,
+    )
+    gsod_download   = DownloadStep(cfg, gsod_downloader, gsod_extractor, logger, manifest)
+
+    gsod_transformer = ConcurrentTransformer(
+        max_workers=cfg.GSOD_TRANSFORM_PROCESSES or cfg.DOWNLOAD_MAX_WORKERS,
+        logger=logger,
+        use_processes=cfg.GSOD_TRANSFORM_PROCESSES > 0,
+        columnar=cfg.GSOD_COLUMNAR_TRANSFORM,
+        validation=cfg.GSOD_VALIDATION,
+        validation_sample=cfg.GSOD_VALIDATION_SAMPLE,
+        quarantine_dir=cfg.QUARANTINE_DIR / "gsod" if cfg.QUARANTINE_DIR else None,
+    )
+    gsod_transform   = TransformStep(cfg, gsod_transformer, logger, manifest, dataset)
+
+    steps = [gsod_download, gsod_transform]
+    if not dry_run:
+        preparer = DefaultRecordPreparer(logger)
+        loader   = BatchLoader(
+            preparer=preparer,
+            repository=repo,
+            batch_size=cfg.CHUNK_SIZE,
+            max_workers=cfg.LOAD_MAX_WORKERS,
+            logger=logger,
+        )
+        steps.append(LoadStep(cfg, loader, logger, manifest))
+
+    logger.info("Starting GSOD pipeline")
+    # one download feeder (it has its own pool), N parsers, M loaders
+    executor = _executor(cfg, logger, [1, cfg.PIPELINE_STAGE_WORKERS, cfg.LOAD_MAX_WORKERS][: len(steps)])
+    try:
+        Pipeline(steps, mode=cfg.PIPELINE_MODE, executor=executor,
+                 name="gsod", metrics=run_metrics).run(initial_input=gsod_to_process)
+    finally:
+        gsod_transformer.close()
+    if dataset is not None:
+        dataset.prune(gsod_to_process)
+    logger.info("GSOD pipeline complete")
+
+
+def run_gsod_from_dataset(
+    cfg: ETLConfig,
+    logger: logging.Logger,
+    dry_run: bool,
+    run_metrics: MetricsCollector,
+    dataset: ParquetDataset,
+    years: List[int],
+) -> None:
+    """
+    Load GSOD years from the Parquet dataset: no download, no parsing. The
+    run manifest tracks source files, so only Mongo decides what to skip –
+    the usual case is reloading into a fresh database.
+    """
+    available = set(dataset.years())
+    missing = [y for y in years if y not in available]
+    if missing:
+        logger.warning(f"No dataset partitions for GSOD years {missing}")
+    years = [y for y in years if y in available]
+    steps: list = [DatasetSourceStep(cfg, dataset, logger)]
+    if not dry_run:
+        repo = MongoRepository(cfg, logger)
+        loaded = [y for y in years if repo.count_for_year(y) > 0]
+        logger.info(f"Skipping already-loaded GSOD years: {loaded}")
+        years = [y for y in years if y not in loaded]
+        loader = BatchLoader(
+            preparer=DefaultRecordPreparer(logger),
+            repository=repo,
+            batch_size=cfg.CHUNK_SIZE,
+            max_workers=cfg.LOAD_MAX_WORKERS,
+            logger=logger,
+        )
+        steps.append(LoadStep(cfg, loader, logger))
+    if not years:
+        logger.info("No GSOD years to load from the dataset")
+        return
+
+    logger.info(f"Loading GSOD years {years} from {dataset.root}")
+    executor = _executor(cfg, logger, [1, cfg.LOAD_MAX_WORKERS][: len(steps)])
+    Pipeline(steps, mode=cfg.PIPELINE_MODE, executor=executor,
+             name="gsod", metrics=run_metrics).run(initial_input=years)
+    logger.info("GSOD pipeline complete")
+
+
+# ── CO₂ pipeline ──────────────────────────────────────────────────────────────
+def run_co2(
+    cfg: ETLConfig,
+    logger: logging.Logger,
+    dry_run: bool,
+    run_metrics: MetricsCollector,
+    engine: DownloadEngine,
+) -> None:
+    # pick the years
+    all_co2_years = list(range(cfg.CO2_START_YEAR, cfg.CO2_END_YEAR + 1))
+    logger.info(f"CO₂ pipeline: years {all_co2_years}")
+    # indicator code → field of the wide (iso3, year) doc
+    fields = {cfg.CO2_INDICATOR: PRIMARY_FIELD}
+    for ind in cfg.CO2_EXTRA_INDICATORS:
+        fields.setdefault(ind, field_for(ind))
+
+    # skip any already in Mongo (with every indicator)
+    if not dry_run:
+        em_repo = EmissionsRepository(cfg, logger)
+        loaded = [y for y in all_co2_years if em_repo.count_for_year(y, fields.values()) > 0]
+        to_do  = [y for y in all_co2_years if y not in loaded]
+        logger.info(f"Skipping already-loaded CO₂ years: {loaded}")
+    else:
+        to_do = all_co2_years
+
+    if not to_do:
+        logger.info("Nothing to do; all requested CO₂ years are already ingested.")
+        return
+
+    # Download
+    co2_downloader = CO2Downloader(
+        indicator=list(fields),
+        retry_attempts=cfg.DOWNLOAD_RETRY_ATTEMPTS,
+        retry_wait=cfg.DOWNLOAD_RETRY_WAIT,
+        logger=logger,
+        engine=engine,
+        page_size=cfg.CO2_PAGE_SIZE,
+        cache_dir=cfg.CO2_CACHE_DIR,
+    )
+    co2_dl_step = CO2DownloadStep(cfg, co2_downloader, logger)
+
+    # Transform
+    quarantine = Quarantine(cfg.QUARANTINE_DIR / "co2", logger) if cfg.QUARANTINE_DIR else None
+    co2_transformer = CO2Transformer(logger, fields=fields, quarantine=quarantine)
+    co2_xform_step = CO2TransformStep(cfg, co2_transformer, logger)
+
+    steps = [co2_dl_step, co2_xform_step]
+
+    # Load (unless dry‐run)
+    if not dry_run:
+        prep   = DefaultRecordPreparer(logger)
+        loader = BatchLoader(
+            preparer=prep,
+            repository=em_repo,
+            batch_size=cfg.CHUNK_SIZE,
+            max_workers=cfg.LOAD_MAX_WORKERS,
+            logger=logger,
+        )
+        steps.append(LoadStep(cfg, loader, logger))
+
+    logger.info("Starting CO₂ pipeline")
+    Pipeline(steps, mode=cfg.PIPELINE_MODE, executor=_executor(cfg, logger),
+             name="co2", metrics=run_metrics).run(initial_input=to_do)
+    logger.info("CO₂ pipeline complete")
+
+
+# ── IPCC pipeline ─────────────────────────────────────────────────────────────
+def run_ipcc(
+    cfg: ETLConfig,
+    logger: logging.Logger,
+    dry_run: bool,
+    run_metrics: MetricsCollector,
+    engine: DownloadEngine,
+) -> None:
+    logger.info("IPCC AR6 SPM pipeline")
+
+    pdf_downloader = PDFDownloader(
+        url=cfg.IPCC_PDF_URL,
+        dest_dir=cfg.DATA_DIR_IPCC,
+        retry_attempts=cfg.DOWNLOAD_RETRY_ATTEMPTS,
+        retry_wait=cfg.DOWNLOAD_RETRY_WAIT,
+        logger=logger,
+        engine=engine,
+    )
+    ipcc_download  = IPCCDownloadStep(cfg, pdf_downloader, logger)
+
+    ipcc_transformer = IPCCTransformer(
+        logger,
+        processes=cfg.IPCC_EXTRACT_PROCESSES,
+        pages_per_task=cfg.IPCC_EXTRACT_PAGES,
+        cache_dir=cfg.IPCC_CACHE_DIR,
+        max_words=cfg.IPCC_CHUNK_WORDS,
+    )
+    ipcc_transform   = IPCCTransformStep(cfg, ipcc_transformer, logger)   # re-use generic transform step pattern
+
+    ipcc_steps = [ipcc_download, ipcc_transform]
+
+    if not dry_run:
+        # synced by content hash, so unchanged chunks keep their embeddings
+        ipcc_steps.append(IPCCLoadStep(cfg, ReportsRepository(cfg, logger), logger))
+
+    logger.info("Starting IPCC pipeline")
+    Pipeline(ipcc_steps, mode=cfg.PIPELINE_MODE, executor=_executor(cfg, logger),
+             name="ipcc", metrics=run_metrics).run()
+    logger.info("IPCC pipeline complete")
+
+
+# ── EMBED pipeline ────────────────────────────────────────────────────────────
+def run_embed(cfg: ETLConfig, logger: logging.Logger, dry_run: bool, run_metrics: MetricsCollector) -> None:
+    # embedding deps are heavy (Vertex SDK) – only import them when needed
+    from etl.embed.vertex_client import VertexEmbeddingClient
+    from etl.embed.pipeline_steps import EmbedStep
+    from etl.embed.generator import EmbeddingGenerator
+
+    logger.info("Embedding pipeline")
+
+    # 1. Pull paragraphs without embedding
+    repo = ReportsRepository(cfg, logger)
+    todo = list(repo.col.find({"embedding": {"$exists": False}}, {"_id": 1, "section": 1, "paragraph": 1, "text": 1}))
+    if not todo:
+        logger.info("All paragraphs already embedded.")
+        return
+
+    logger.info(f"{len(todo)} paragraphs need embeddings")
+    client = VertexEmbeddingClient(
+        project=cfg.VERTEX_PROJECT,
+        region=cfg.VERTEX_REGION,
+        model_name=cfg.VERTEX_MODEL,
+        logger=logger,
+    )
+    generator  = EmbeddingGenerator(client, cfg.EMBED_BATCH_SIZE, logger)
+    steps: list = [EmbedStep(cfg, generator, logger)]
+
+    if not dry_run:
+        steps.append(
+            LoadStep(
+                cfg,
+                BatchLoader(
+                    preparer=IdentityPreparer(logger),
+                    repository=repo,
+                    batch_size=cfg.CHUNK_SIZE,
+                    max_workers=cfg.LOAD_MAX_WORKERS,
+                    logger=logger,
+                    insert_fn=repo.bulk_upsert_embeddings,
+                ),
+                logger,
+            )
+        )
+
+    Pipeline(steps, mode=cfg.PIPELINE_MODE, executor=_executor(cfg, logger),
+             name="embed", metrics=run_metrics).run(initial_input=todo)
+
+
+# ── index builds (--reindex) ──────────────────────────────────────────────────
+def run_reindex(cfg: ETLConfig, logger: logging.Logger, dry_run: bool, run_metrics: MetricsCollector) -> None:
+    if not cfg.ATLAS_PROJECT_ID:
+        logger.warning("--reindex ignored → Atlas API keys not configured")
+        return
+
+    from etl.embed.atlas_index import AtlasIndexBuilder
+    from etl.embed.index_creator import IndexCreator
+    from etl.embed.pipeline_steps import IndexStep
+    from etl.embed.synonyms_loader import SynonymsLoader
+    from etl.embed.text_index import AtlasTextIndexBuilder
+
+    # 1) Ensure synonyms collection is populated
+    SynonymsLoader(cfg, logger).load()
+    vector_builder = AtlasIndexBuilder(
+        proj_id=cfg.ATLAS_PROJECT_ID,
+        cluster=cfg.ATLAS_CLUSTER,
+        public_key=cfg.ATLAS_PUBLIC_KEY,
+        private_key=cfg.ATLAS_PRIVATE_KEY,
+        logger=logger,
+    )
+    # 2) Full‐text index on reports.text
+    text_builder = AtlasTextIndexBuilder(
+        mongo_uri   = cfg.MONGODB_URI,
+        proj_id     = cfg.ATLAS_PROJECT_ID,
+        cluster     = cfg.ATLAS_CLUSTER,
+        public_key  = cfg.ATLAS_PUBLIC_KEY,
+        private_key = cfg.ATLAS_PRIVATE_KEY,
+        db_name     = cfg.DB_NAME,
+        coll_name   = "reports",
+        logger      = logger,
+    )
+    text_builder._ensure_text_index()
+
+    creator = IndexCreator(
+        mongodb_uri=cfg.MONGODB_URI,
+        atlas_project_id=cfg.ATLAS_PROJECT_ID,
+        atlas_cluster=cfg.ATLAS_CLUSTER,
+        atlas_public_key=cfg.ATLAS_PUBLIC_KEY,
+        atlas_private_key=cfg.ATLAS_PRIVATE_KEY,
+        db_name=cfg.DB_NAME,
+        synonyms_coll="synonyms",
+        logger=logger,
+    )
+    # 3) Create B-tree indexes
+    creator.create_btree_indexes()
+    # 4) Create Atlas Search & Vector indexes
+    creator.ensure_atlas_search_indexes()
+    logger.info("All index creation steps completed.")
+
+    # 5) Geospatial index on weather.location
+    weather_repo = MongoRepository(cfg, logger)
+    weather_repo.ensure_geo_index()
+
+    # 6) Atlas Vector Search index on reports.embedding
+    Pipeline([IndexStep(vector_builder, logger)], name="index", metrics=run_metrics).run()
+
+
+def build_dag(
+    cfg: ETLConfig,
+    logger: logging.Logger,
+    dry_run: bool = False,
+    run_metrics: Optional[MetricsCollector] = None,
+    engine: Optional[DownloadEngine] = None,
+) -> PipelineDAG:
+    """
+    Declare every enabled pipeline and its dependency edges. All downloaders
+    share one pooled DownloadEngine.
+    """
+    run_metrics = run_metrics or MetricsCollector(logger)
+    engine = engine or _engine(cfg, logger)
+    dag = PipelineDAG(max_workers=cfg.ETL_MAX_PARALLEL_PIPELINES, logger=logger)
+
+    def node(fn, **extra):
+        return lambda: fn(cfg, logger, dry_run, run_metrics, **extra)
+
+    if not cfg.SKIP_GSOD:
+        dag.add("gsod", node(run_gsod, engine=engine))
+    else:
+        logger.info("Skipping GSOD pipeline")
+    if not cfg.SKIP_CO2:
+        dag.add("co2", node(run_co2, engine=engine))
+    else:
+        logger.info("Skipping CO₂ pipeline")
+    if not cfg.SKIP_IPCC:
+        dag.add("ipcc", node(run_ipcc, engine=engine))
+    else:
+        logger.info("Skipping IPCC pipeline")
+
+    if not cfg.SKIP_EMBED:
+        dag.add("embed", node(run_embed), deps=[n for n in ("ipcc",) if n in dag.nodes])
+    elif cfg.REINDEX:
+        logger.info("SKIP_EMBED=true → skipping new embeddings")
+    else:
+        logger.info("Skipping Embedding pipeline (SKIP_EMBED=true and --reindex not requested)")
+
+    if cfg.REINDEX:
+        # indexes are built once everything that writes has finished
+        dag.add("reindex", node(run_reindex), deps=list(dag.nodes))
+    return dag
+
+
+def run_etl(
+    cfg: ETLConfig,
+    dry_run: bool = False,
+    logger: Optional[logging.Logger] = None,
+    run_metrics: Optional[MetricsCollector] = None,
+) -> Dict[str, NodeResult]:
+    """
+    Run every enabled pipeline as a DAG and write run metrics.
+    Returns per-pipeline results; raises ETLRunError if any pipeline failed.
+    """
+    logger = logger or logging.getLogger("etl")
+    run_metrics = run_metrics or MetricsCollector(logger)
+    engine = _engine(cfg, logger)
+    try:
+        results = build_dag(cfg, logger, dry_run, run_metrics, engine).run()
+    finally:
+        engine.close()
+        run_metrics.write(cfg.METRICS_DIR)
+    if any(r.status == "failed" for r in results.values()):
+        raise ETLRunError(results)
+    logger.info("ETL run complete")
+    return results
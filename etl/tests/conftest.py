@@ -0,0 +1,7 @@
+import pytest
+from etl.tests.http_stub import StubHTTPServer
+
+@pytest.fixture
+def http_stub():
+    with StubHTTPServer() as server:
+        yield server
@@ -0,0 +1,96 @@
+# etl/tests/gsod_sample.py
+"""Synthetic GSOD station CSVs shaped like NOAA's (padding, sentinels, flags)."""
+import random
+from datetime import date, timedelta
+from typing import List
+
+HEADER = [
+    "STATION", "DATE", "LATITUDE", "LONGITUDE", "ELEVATION", "NAME",
+    "TEMP", "TEMP_ATTRIBUTES", "DEWP", "DEWP_ATTRIBUTES", "SLP", "SLP_ATTRIBUTES",
+    "STP", "STP_ATTRIBUTES", "VISIB", "VISIB_ATTRIBUTES", "WDSP", "WDSP_ATTRIBUTES",
+    "MXSPD", "GUST", "MAX", "MAX_ATTRIBUTES", "MIN", "MIN_ATTRIBUTES",
+    "PRCP", "PRCP_ATTRIBUTES", "SNDP", "FRSHTT",
+]
+
+# hand-picked rows that exercise every scalar corner case
+DIRTY_ROWS = [
+    # flagged values, sentinels padded and unpadded, attribute blanks
+    ["01001099999", "2020-02-29", "70.93", "-8.66", "9.0", "JAN MAYEN NOR NAVY, NO",
+     "   26.7", " 24", "9999.9", "0", "  999.9", "", "9999.9", "x", "999.9", " 7",
+     "999.9", "24", "  12.0", "999.9", "   30.2*", " ", "  21.4*", "*",
+     " 99.99", "I", "999.9", "010010"],
+    # garbage numerics: strip_flag leftovers that float() rejects or accepts
+    ["X", "2021-12-31", " -0 ", "-.5", "5.", "", "--1", "1", "1.2.3", "2", "-", "3",
+     "ab12.5cd", "4", ".", "5", "1-2", "6", "7A", "8", "12*3", "9", "", "10",
+     "0.00", "G", "  ", "1111111"],
+    # coordinates float() rejects → the whole row is rejected
+    ["BADLAT", "2020-01-01", "abc", "0", "0", "N", "32", "0", "32", "0", "1000", "0",
+     "1000", "0", "10", "0", "5", "0", "5", "5", "32", "0", "32", "0", "0", "", "0", "000000"],
+    # coordinates Python parses but the array rules leave alone
+    ["EXP", "2020-01-01", "1e1", "+3", " null ", "N", "32", "0", "32", "0", "1000", "0",
+     "1000", "0", "10", "0", "5", "0", "5", "5", "32", "0", "32", "0", "0", "", "0", "000000"],
+    # non-ASCII digits and whitespace that str.strip() sees and numpy does not
+    ["UNI", "2020-01-01", "4٣", "0", "0", "Ünïcode", "²32", "\t1\t", "32", "0",
+     "1000", "0", "1000", "0", "10", "0", "5", "0", "5", "5", "32", "0", "32", "0",
+     "0", "", "0", "١٠٠٠٠٠"],
+    # dates pydantic rejects or parses differently
+    ["D1", "2020-13-01", "0", "0", "0", "N", "32", "0", "32", "0", "1000", "0",
+     "1000", "0", "10", "0", "5", "0", "5", "5", "32", "0", "32", "0", "0", "", "0", "000000"],
+    ["D2", "20200101", "0", "0", "0", "N", "32", "0", "32", "0", "1000", "0",
+     "1000", "0", "10", "0", "5", "0", "5", "5", "32", "0", "32", "0", "0", "", "0", "000000"],
+    # too few and too many fields
+    ["SHORT", "2020-01-01", "0", "0"],
+    ["LONG", "2020-01-01", "0", "0", "0", "N", "32", "0", "32", "0", "1000", "0",
+     "1000", "0", "10", "0", "5", "0", "5", "5", "32", "0", "32", "0", "0", "", "0",
+     "000000", "extra"],
+    # huge attribute
+    ["BIGATTR", "2020-01-01", "0", "0", "0", "N", "32", "12345678901234567890123", "32",
+     "0", "1000", "0", "1000", "0", "10", "0", "5", "0", "5", "5", "32", "0", "32", "0",
+     "0", "", "0", "000000"],
+]
+
+
+def _value(rng: random.Random, lo: float, hi: float, width: int, sentinel: str) -> str:
+    if rng.random() < 0.05:
+        return f"{sentinel:>{width}}"
+    return f"{rng.uniform(lo, hi):{width}.1f}"
+
+
+def station_rows(n: int, seed: int = 0, padded: bool = True) -> List[List[str]]:
+    """
+    `n` plausible daily rows for one station. NOAA pads every column to a
+    fixed width; `padded=False` trims the values and glues "*" flags onto
+    some MAX/MIN readings instead, as older exports did.
+    """
+    rng = random.Random(seed)
+    day = date(2020, 1, 1)
+    lat, lon, elev = f"{rng.uniform(-90, 90):.7f}", f"{rng.uniform(-180, 180):.7f}", "9.0"
+    rows = []
+    for i in range(n):
+        row = [
+            f"{seed:011d}", (day + timedelta(days=i % 3000)).isoformat(), lat, lon, elev,
+            "SOME STATION, XX",
+            _value(rng, -40, 110, 6, "9999.9"), f"{rng.randint(4, 24):2d}",
+            _value(rng, -40, 90, 6, "9999.9"), f"{rng.randint(4, 24):2d}",
+            _value(rng, 950, 1050, 6, "9999.9"), f"{rng.randint(0, 24):2d}",
+            _value(rng, 900, 1050, 6, "9999.9"), f"{rng.randint(0, 24):2d}",
+            _value(rng, 0, 20, 5, "999.9"), f"{rng.randint(0, 24):2d}",
+            _value(rng, 0, 40, 5, "999.9"), f"{rng.randint(0, 24):2d}",
+            _value(rng, 0, 60, 5, "999.9"), _value(rng, 0, 80, 5, "999.9"),
+            _value(rng, -30, 120, 6, "9999.9"), rng.choice(" *"),
+            _value(rng, -50, 90, 6, "9999.9"), rng.choice(" *"),
+            f"{rng.uniform(0, 3):5.2f}" if rng.random() > 0.1 else "99.99", rng.choice("ABCDEFGHI"),
+            _value(rng, 0, 30, 5, "999.9"), "".join(rng.choice("0001") for _ in range(6)),
+        ]
+        if not padded:
+            row = [v.strip() for v in row]
+            for col in (20, 22):
+                if row[col + 1] == "*":
+                    row[col] += "*"
+        rows.append(row)
+    return rows
+
+
+def to_csv(rows: List[List[str]]) -> str:
+    lines = [",".join(f'"{v}"' for v in row) for row in [HEADER, *rows]]
+    return "\n".join(lines) + "\n"
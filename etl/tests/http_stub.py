@@ -0,0 +1,187 @@
+# etl/tests/http_stub.py
+"""
+Local HTTP stand-in for NOAA / World Bank / IPCC, used by tests and
+`python -m etl.bench` to exercise the downloaders offline.
+
+Serves in-memory bodies over keep-alive HTTP/1.1 with ETag, conditional GET
+(If-None-Match → 304) and byte ranges (Range / If-Range → 206), and can cut a
+response short to simulate a dropped connection or answer with an error
+status (429 / 503, optionally with Retry-After). `latency` delays every
+response, standing in for a far-away server's time to first byte, and
+`bandwidth` caps each response's rate (bytes/s), like a per-connection
+throughput limit.
+
+Benchmarks run it as a separate process so it does not compete with the
+client for the GIL:
+
+    python -m etl.tests.http_stub --files 200 --size-kb 512 --latency-ms 50 --bandwidth-mbps 20
+"""
+import argparse
+import hashlib
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024              # stdlib default of 5 drops bursts of connects
+
+
+class StubHTTPServer:
+    def __init__(self, latency: float = 0.0, bandwidth: float = 0.0) -> None:
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.files: Dict[str, bytes] = {}
+        self.etags: Dict[str, str] = {}
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        self.connections = 0
+        self.ignore_range = False            # behave like a server without Range support
+        self._cut: Dict[str, int] = {}
+        self._fail: Dict[str, List[Tuple[int, Optional[str]]]] = {}
+        self._lock = threading.Lock()
+        self._httpd = _Server(("127.0.0.1", 0), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add(self, path: str, body: bytes) -> str:
+        """Serve `body` at `path` (a new body gets a new ETag); returns its URL."""
+        self.files[path] = body
+        self.etags[path] = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        return self.url + path
+
+    def cut_next(self, path: str, after: int) -> None:
+        """Drop the connection after `after` body bytes on the next GET of `path`."""
+        self._cut[path] = after
+
+    def fail_next(self, path: str, status: int, times: int = 1, retry_after: Optional[str] = None) -> None:
+        """Answer the next `times` GETs of `path` with `status` (and a Retry-After header)."""
+        self._fail.setdefault(path, []).extend([(status, retry_after)] * times)
+
+    def start(self) -> "StubHTTPServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubHTTPServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ------------------------------------------------------------------ #
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # headers and body go out in separate writes; without this,
+                # Nagle + delayed ACK stall every keep-alive response ~40 ms
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):      # keep test output quiet
+                pass
+
+            def do_GET(self):
+                # an exact "path?query" registration wins over the bare path
+                path = self.path if self.path in stub.files else self.path.split("?", 1)[0]
+                with stub._lock:
+                    stub.requests.append((self.path, dict(self.headers)))
+                    cut = stub._cut.pop(path, None)
+                    fail = stub._fail[path].pop(0) if stub._fail.get(path) else None
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if fail is not None:
+                    self.send_response(fail[0])
+                    if fail[1] is not None:
+                        self.send_header("Retry-After", fail[1])
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, etag = stub.files.get(path), stub.etags.get(path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                start, end = 0, len(body) - 1
+                rng = self.headers.get("Range")
+                if_range = self.headers.get("If-Range")
+                partial = (
+                    rng is not None and not stub.ignore_range
+                    and (if_range is None or if_range == etag)
+                )
+                if partial:
+                    first, _, last = rng[len("bytes="):].partition("-")
+                    start = int(first)
+                    end = min(int(last), end) if last else end
+                    if start >= len(body):
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(body)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+                else:
+                    self.send_response(200)
+                    self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(end - start + 1))
+                self.end_headers()
+                payload = body[start:end + 1]
+                if cut is not None:
+                    self.wfile.write(payload[:cut])
+                    self.close_connection = True
+                    return
+                if not stub.bandwidth:
+                    self.wfile.write(payload)
+                    return
+                step = 64 << 10
+                for i in range(0, len(payload), step):
+                    self.wfile.write(payload[i:i + step])
+                    time.sleep(min(step, len(payload) - i) / stub.bandwidth)
+
+        return Handler
+
+
+def main() -> None:
+    p = argparse.ArgumentParser("stub GSOD archive server")
+    p.add_argument("--files", type=int, default=100, help="serves /1.tar.gz … /N.tar.gz")
+    p.add_argument("--size-kb", type=int, default=512)
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    p.add_argument("--bandwidth-mbps", type=float, default=0.0, help="per-response cap, 0 = unlimited")
+    args = p.parse_args()
+
+    server = StubHTTPServer(latency=args.latency_ms / 1000, bandwidth=args.bandwidth_mbps * 1e6)
+    body = bytes(range(256)) * (args.size_kb * 4)
+    for i in range(1, args.files + 1):
+        server.add(f"/{i}.tar.gz", body)
+    print(server.url, flush=True)            # the parent reads the address from stdout
+    server._httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import logging
+import math
+import pickle
+from datetime import date
+from etl.loader.loader import BatchLoader
+from etl.transformer.batch import RecordBatch
+
+def _typed(records):
+    return [[(k, type(v), repr(v)) for k, v in r.items()] for r in records]
+
+RECORDS = [
+    {"station": "01001099999", "record_date": date(2020, 2, 29), "temp": -0.0,
+     "attr": 24, "big": 10 ** 30, "name": None, "fog": True, "mixed": 1, "raw": [1]},
+    {"station": "01001099999", "record_date": date(1901, 1, 1), "temp": float("nan"),
+     "attr": None, "big": 1, "name": "JAN MAYEN", "fog": False, "mixed": 1.0, "raw": None},
+    {"station": "X", "record_date": date(2024, 12, 31), "temp": None,
+     "attr": -3, "big": None, "name": "JAN MAYEN", "fog": False, "mixed": True, "raw": [2]},
+] * 5
+
+def test_round_trip_keeps_values_types_and_nulls():
+    batch = RecordBatch.from_records(RECORDS)
+    back = list(pickle.loads(pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL)))
+    assert _typed(back) == _typed(RECORDS)
+    assert math.isnan(back[1]["temp"]) and back[2]["temp"] is None
+    assert _typed([batch[-1]]) == _typed(RECORDS[-1:])
+
+def test_slices_and_concat_match_the_records():
+    batch = RecordBatch.from_records(RECORDS)
+    for start in range(len(RECORDS)):
+        for stop in range(start, len(RECORDS) + 1):
+            assert _typed(batch[start:stop]) == _typed(RECORDS[start:stop])
+        parts = [batch[:start], RecordBatch.from_records(RECORDS[start:])]
+        assert _typed(RecordBatch.concat(parts)) == _typed(RECORDS)
+
+def test_gsod_sized_batch_is_smaller_than_pickled_dicts():
+    records = [
+        {"station": f"{i // 366:011d}", "record_date": date.fromordinal(737425 + i % 366),
+         "temp": i * 0.1, "temp_attr": 24, "prcp_attr": "G", "frshtt_fog": i % 7 == 0}
+        for i in range(3660)
+    ]
+    batch = RecordBatch.from_records(records)
+    assert list(batch) == records
+    pickled = len(pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL))
+    assert pickled < len(pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL)) / 2
+
+def test_batch_loader_slices_a_record_batch():
+    inserted = []
+    loader = BatchLoader(
+        preparer=type("P", (), {"prepare": lambda self, r: dict(r)})(),
+        repository=None, batch_size=4, max_workers=2,
+        logger=logging.getLogger("test_batch"), insert_fn=inserted.append,
+    )
+    assert loader.load(RecordBatch.from_records(RECORDS)) == []
+    assert sorted(map(len, inserted)) == [3, 4, 4, 4]
+    assert _typed(sorted((d for docs in inserted for d in docs), key=repr)) == \
+           _typed(sorted(RECORDS, key=repr))
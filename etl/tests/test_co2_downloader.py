@@ -0,0 +1,95 @@
+import json
+import pytest
+from etl.downloader.engine import DownloadEngine
+from etl.downloader.co2_downloader import CO2Downloader
+from etl.transformer.co2_transformer import CO2Transformer
+
+IND = "EN.ATM.CO2E.KT"
+
+@pytest.fixture
+def engine():
+    with DownloadEngine(max_connections=8) as eng:
+        yield eng
+
+def _rows(years, countries=("FRA", "DEU", "USA")):
+    return [{"countryiso3code": c, "date": str(y), "value": float(y)} for y in years for c in countries]
+
+def _serve(stub, start, end, rows, per_page):
+    pages = [rows[i:i + per_page] for i in range(0, len(rows), per_page)] or [[]]
+    for n, chunk in enumerate(pages, 1):
+        meta = {"page": n, "pages": len(pages), "per_page": per_page, "total": len(rows)}
+        stub.add(f"/v2/country/all/indicator/{IND}?date={start}:{end}&format=json"
+                 f"&per_page={per_page}&page={n}", json.dumps([meta, chunk or None]).encode())
+
+def _downloader(stub, engine, **kw):
+    return CO2Downloader(IND, retry_attempts=1, retry_wait=0, engine=engine,
+                         base_url=stub.url + "/v2", page_size=4, **kw)
+
+def test_all_pages_are_fetched(http_stub, engine):
+    rows = _rows(range(2000, 2004))                       # 12 rows → 3 pages of 4
+    _serve(http_stub, 2000, 2003, rows, per_page=4)
+    got = _downloader(http_stub, engine).download_years(range(2000, 2004), max_workers=3)
+    assert sorted(map(json.dumps, got)) == sorted(map(json.dumps, rows))
+    assert len(http_stub.requests) == 3
+
+def test_cache_serves_known_years_and_fetches_only_missing(http_stub, engine, tmp_path):
+    _serve(http_stub, 2000, 2001, _rows([2000, 2001]), per_page=4)
+    dl = _downloader(http_stub, engine, cache_dir=tmp_path)
+    assert len(dl.download_years([2000, 2001])) == 6
+    assert (tmp_path / IND / "2000-2001.json").exists()
+
+    # 2000–2001 come from disk; only 2002–2003 go over the wire
+    _serve(http_stub, 2002, 2003, _rows([2002, 2003]), per_page=4)
+    http_stub.requests.clear()
+    got = _downloader(http_stub, engine, cache_dir=tmp_path).download_years(range(2000, 2004))
+    assert sorted({r["date"] for r in got}) == ["2000", "2001", "2002", "2003"]
+    assert all("date=2002:2003" in path for path, _ in http_stub.requests)
+
+    http_stub.requests.clear()
+    assert len(dl.download_years([2001, 2003])) == 6
+    assert http_stub.requests == []
+
+def test_indicators_are_fetched_together_and_merged_per_country_year(http_stub, engine):
+    fields = {IND: "co2Mt", "SP.POP.TOTL": "population"}
+    for ind in fields:
+        rows = [{"indicator": {"id": ind}, "country": {"value": "France"},
+                 "countryiso3code": "FRA", "date": str(y), "value": y * 2.0} for y in (2000, 2001)]
+        http_stub.add(f"/v2/country/all/indicator/{ind}?date=2000:2001&format=json&per_page=4&page=1",
+                      json.dumps([{"page": 1, "pages": 1, "total": 2}, rows]).encode())
+    dl = CO2Downloader(list(fields), retry_attempts=1, retry_wait=0, engine=engine,
+                       base_url=http_stub.url + "/v2", page_size=4)
+    records = dl.download_years([2000, 2001])
+    assert len(records) == 4
+
+    docs = CO2Transformer(fields=fields).transform(records)
+    assert docs == [
+        {"country": "France", "iso3": "FRA", "year": 2000, "co2Mt": 4000.0, "population": 4000.0},
+        {"country": "France", "iso3": "FRA", "year": 2001, "co2Mt": 4002.0, "population": 4002.0},
+    ]
+
+def test_country_years_without_co2_get_no_doc():
+    fields = {IND: "co2Mt", "SP.POP.TOTL": "population"}
+    def rec(ind, year, value):
+        return {"indicator": {"id": ind}, "country": {"value": "Aruba"},
+                "countryiso3code": "ABW", "date": str(year), "value": value}
+    records = [rec(IND, 2022, 0.5), rec("SP.POP.TOTL", 2022, 106000.0),
+               rec(IND, 2023, None), rec("SP.POP.TOTL", 2023, 107000.0)]
+    docs = CO2Transformer(fields=fields).transform(records)
+    assert docs == [{"country": "Aruba", "iso3": "ABW", "year": 2022, "co2Mt": 0.5, "population": 106000.0}]
+
+def test_unpublished_years_are_fetched_again(http_stub, engine, tmp_path):
+    unpublished = [{**r, "value": None} for r in _rows([2023])]
+    _serve(http_stub, 2021, 2023, _rows([2021, 2022]) + unpublished, per_page=4)
+    dl = _downloader(http_stub, engine, cache_dir=tmp_path)
+    assert len(dl.download_years(range(2021, 2024))) == 9
+
+    # 2023 is out now: asked for again, and its fresh records replace the null ones
+    _serve(http_stub, 2023, 2023, _rows([2023]), per_page=4)
+    http_stub.requests.clear()
+    got = dl.download_years(range(2021, 2024))
+    assert all("date=2023:2023" in path for path, _ in http_stub.requests) and http_stub.requests
+    assert sorted((r["date"], r["value"]) for r in got if r["date"] == "2023") == [("2023", 2023.0)] * 3
+
+    http_stub.requests.clear()
+    assert len(dl.download_years(range(2021, 2024))) == 9
+    assert http_stub.requests == []
@@ -0,0 +1,71 @@
+import logging
+import pytest
+from etl import metrics
+from etl.downloader.members import MemberBlob
+from etl.tests.gsod_sample import DIRTY_ROWS, HEADER, station_rows, to_csv
+from etl.transformer.builder import PydanticRecordBuilder
+from etl.transformer.columnar import ColumnarReader
+from etl.transformer.concurrent import ConcurrentTransformer
+from etl.transformer.parser import CsvParser
+from etl.transformer.reader import CsvReader
+
+logger = logging.getLogger("test_columnar")
+
+def _typed(records):
+    # == alone would let 1 == 1.0 and -0.0 == 0.0 through
+    return [[(k, type(v), repr(v)) for k, v in r.items()] for r in records]
+
+def _scalar(path):
+    return CsvReader(CsvParser(logger), PydanticRecordBuilder(logger), logger).read(path)
+
+@pytest.mark.parametrize("rows", [
+    station_rows(400, seed=1),                                  # NOAA fixed-width layout
+    station_rows(400, seed=2, padded=False),                    # ragged widths, glued flags
+    station_rows(20, seed=3) + [DIRTY_ROWS[i] for i in (0, 1, 2, 3, 5, 6, 9)],
+    station_rows(20, seed=4) + DIRTY_ROWS,                      # unicode, short and long rows
+], ids=["grid", "ragged", "quoted-dirty", "csv-dirty"])
+def test_records_identical_to_row_builder(tmp_path, rows):
+    path = tmp_path / "s.csv"
+    path.write_text(to_csv(rows), encoding="utf-8")
+    assert _typed(ColumnarReader(logger).read(path)) == _typed(_scalar(path))
+
+def test_unsure_rows_in_fixed_layout_fall_back_and_are_counted(tmp_path):
+    rows = station_rows(50, seed=5)
+    rows[7][1] = "2020-02-30"           # same width, but no such day: pydantic rejects it
+    rows[9][2] = "1e1".rjust(len(rows[9][2]))     # float() parses it, the array rules do not
+    path = tmp_path / "s.csv"
+    path.write_text(to_csv(rows), encoding="utf-8")
+    before = metrics.counters().get("rows_scalar_fallback", 0)
+    got = ColumnarReader(logger).read(path)
+    assert _typed(got) == _typed(_scalar(path))
+    assert len(got) == 49 and got[8]["latitude"] == 10.0
+    assert metrics.counters()["rows_scalar_fallback"] - before == 2
+
+def test_read_many_keeps_files_apart(tmp_path):
+    paths = []
+    for seed, body in enumerate([station_rows(30, 6), [], station_rows(5, 7, padded=False)]):
+        p = tmp_path / f"{seed}.csv"
+        p.write_text(to_csv(body), encoding="utf-8")
+        paths.append(p)
+    odd = tmp_path / "odd.csv"          # no NAME column: the scalar reader's call
+    odd.write_text("\n".join(",".join(r[:5] + r[6:]) for r in [HEADER] + station_rows(3, 8)))
+    paths.append(odd)
+    blob = MemberBlob(tmp_path / "blob.csv", to_csv(station_rows(4, 9)).encode())
+    paths.append(blob)
+
+    got = ColumnarReader(logger).read_many(paths)
+    assert [len(r) for r in got] == [30, 0, 5, 0, 4]
+    for p, records in zip(paths, got):
+        assert _typed(records) == _typed(_scalar(p))
+
+def test_concurrent_transformer_columnar_matches_rows(tmp_path):
+    paths = []
+    for seed in range(6):
+        p = tmp_path / f"{seed}.csv"
+        p.write_text(to_csv(station_rows(40, seed)), encoding="utf-8")
+        paths.append(p)
+    def key(r):
+        return (r["station"], r["record_date"])
+    rows = ConcurrentTransformer(max_workers=2, chunk_size=2, logger=logger).transform(paths)
+    cols = ConcurrentTransformer(max_workers=2, chunk_size=2, logger=logger, columnar=True).transform(paths)
+    assert _typed(sorted(cols, key=key)) == _typed(sorted(rows, key=key))
@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+import pytest
+from etl.pipeline.dag import PipelineDAG
+
+LOG = logging.getLogger("test_dag")
+
+def sleeper(delay, log, name):
+    def run():
+        time.sleep(delay)
+        log.append(name)
+        return name
+    return run
+
+def test_independent_nodes_run_in_parallel():
+    log = []
+    dag = PipelineDAG(max_workers=3, logger=LOG)
+    for name in ("gsod", "co2", "ipcc"):
+        dag.add(name, sleeper(0.1, log, name))
+    t0 = time.perf_counter()
+    results = dag.run()
+    assert time.perf_counter() - t0 < 0.25       # ≈ longest node, not the sum
+    assert {r.status for r in results.values()} == {"ok"}
+    assert results["co2"].value == "co2"
+
+def test_dependent_node_waits_for_upstream():
+    log = []
+    dag = PipelineDAG(max_workers=4, logger=LOG)
+    dag.add("ipcc", sleeper(0.05, log, "ipcc"))
+    dag.add("embed", sleeper(0, log, "embed"), deps=["ipcc"])
+    dag.add("co2", sleeper(0, log, "co2"))
+    dag.run()
+    assert log.index("ipcc") < log.index("embed")
+
+def test_failure_skips_dependents_only():
+    def boom():
+        raise RuntimeError("pdf gone")
+    log = []
+    dag = PipelineDAG(logger=LOG)
+    dag.add("ipcc", boom)
+    dag.add("embed", sleeper(0, log, "embed"), deps=["ipcc"])
+    dag.add("gsod", sleeper(0, log, "gsod"))
+    results = dag.run()
+    assert results["ipcc"].status == "failed"
+    assert isinstance(results["ipcc"].error, RuntimeError)
+    assert results["embed"].status == "skipped"
+    assert results["gsod"].status == "ok"
+    assert log == ["gsod"]
+
+def test_worker_budget_is_respected():
+    active, peak, lock = [0], [0], threading.Lock()
+    def run():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+    dag = PipelineDAG(max_workers=2, logger=LOG)
+    for i in range(5):
+        dag.add(f"n{i}", run)
+    dag.run()
+    assert peak[0] == 2
+
+def test_unknown_dependency_and_cycle_rejected():
+    dag = PipelineDAG(logger=LOG).add("embed", lambda: None, deps=["ipcc"])
+    with pytest.raises(ValueError):
+        dag.run()
+    dag = PipelineDAG(logger=LOG)
+    dag.add("a", lambda: None, deps=["b"]).add("b", lambda: None, deps=["a"])
+    with pytest.raises(ValueError):
+        dag.run()
@@ -0,0 +1,67 @@
+import logging
+import pytest
+from etl.tests.gsod_sample import DIRTY_ROWS, station_rows, to_csv
+from etl.transformer.batch import RecordBatch
+from etl.transformer.concurrent import ConcurrentTransformer
+
+pytest.importorskip("pyarrow")
+
+from etl.pipeline.dataset import ParquetDataset             # noqa: E402
+from etl.pipeline.dataset_step import DatasetSourceStep     # noqa: E402
+
+def _typed(records):
+    return [[(k, type(v), repr(v)) for k, v in r.items()] for r in records]
+
+def _key(r):
+    return r["station"], r["record_date"]
+
+def _transform(tmp_path, seeds, rows=400, dirty=()):
+    paths = []
+    for seed in seeds:
+        p = tmp_path / f"{seed}.csv"
+        p.write_text(to_csv(station_rows(rows, seed=seed) + list(dirty)), encoding="utf-8")
+        paths.append(p)
+    t = ConcurrentTransformer(max_workers=1)
+    try:
+        return t.transform(paths)
+    finally:
+        t.close()
+
+def test_arrow_round_trip_keeps_values_types_and_nulls(tmp_path):
+    batch = _transform(tmp_path, [1, 2], dirty=DIRTY_ROWS[:2])
+    assert _typed(RecordBatch.from_arrow(batch.to_arrow())) == _typed(batch)
+
+def test_values_arrow_cannot_type_raise_value_error(tmp_path):
+    batch = _transform(tmp_path, [1], dirty=DIRTY_ROWS)     # one attribute count past 64 bits
+    with pytest.raises(ValueError):
+        batch.to_arrow()
+
+def test_dataset_partitions_by_year_and_reads_the_newest_part_per_station(tmp_path):
+    ds = ParquetDataset(tmp_path / "ds", logging.getLogger("test_dataset"))
+    first = _transform(tmp_path, [1, 2, 3])
+    assert len(ds.write(first)) == 2
+    assert ds.years() == [2020, 2021]
+    # station 2 transformed again, e.g. by a resumed run: its rows must not double
+    again = _transform(tmp_path, [2])
+    ds.write(again)
+    back = [r for year in ds.years() for b in ds.read_year(year, batch_size=100) for r in b]
+    assert _typed(sorted(back, key=_key)) == _typed(sorted(first, key=_key))
+
+    stats = ds.stats(2021)
+    assert [s.rows for s in stats] == [3 * 34, 34]
+    assert stats[-1].stations == ["00000000002"] and str(stats[-1].last_date) == "2021-02-03"
+    assert ds.prune() == 0                  # the first parts still own stations 1 and 3
+    ds.write(_transform(tmp_path, [1, 3]))
+    assert ds.prune() == 2
+    back = [r for year in ds.years() for b in ds.read_year(year) for r in b]
+    assert len(back) == len(first)
+
+def test_dataset_source_step_streams_chunks_and_skips_missing_years(tmp_path):
+    ds = ParquetDataset(tmp_path / "ds", logging.getLogger("test_dataset"))
+    records = _transform(tmp_path, [1, 2])
+    ds.write(records)
+    cfg = type("C", (), {"CHUNK_SIZE": 64})()
+    step = DatasetSourceStep(cfg, ds, logging.getLogger("test_dataset"))
+    batches = list(step.stream(iter([[2019, 2020]])))
+    assert batches and all(len(b) <= 64 for b in batches)
+    assert sum(map(len, batches)) == sum(r["record_date"].year == 2020 for r in records)
@@ -0,0 +1,55 @@
+import asyncio
+import json
+import pytest
+from etl.downloader.engine import DownloadEngine, RangeMismatch
+from etl.downloader.co2_downloader import CO2Downloader
+from etl.downloader.pdf_downloader import PDFDownloader
+
+@pytest.fixture
+def engine():
+    with DownloadEngine(max_connections=20, buffer_size=1 << 16) as eng:
+        yield eng
+
+def test_fetch_in_memory_and_to_file(http_stub, engine, tmp_path):
+    url = http_stub.add("/a.bin", b"payload" * 1000)
+    assert engine.fetch(url).body == b"payload" * 1000
+    res = engine.fetch(url, tmp_path / "a.bin")
+    assert res.status == 200 and res.nbytes == 7000
+    assert (tmp_path / "a.bin").read_bytes() == b"payload" * 1000
+
+def test_many_concurrent_transfers_on_one_loop(http_stub, engine):
+    urls = [http_stub.add(f"/{i}", bytes([i % 256]) * 100) for i in range(150)]
+
+    async def fetch_all():
+        return await asyncio.gather(*(engine.afetch(u) for u in urls))
+
+    results = engine.run(fetch_all())
+    assert [r.body[0] for r in results] == [i % 256 for i in range(150)]
+    assert http_stub.connections <= engine.max_connections
+
+def test_misaligned_range_is_rejected(http_stub, engine, tmp_path):
+    url = http_stub.add("/a.bin", b"0123456789")
+    with pytest.raises(RangeMismatch):
+        engine.fetch(url, tmp_path / "a.bin", headers={"Range": "bytes=4-"}, offset=2)
+
+def test_pdf_and_co2_downloaders_share_the_engine(http_stub, engine, tmp_path):
+    pdf_url = http_stub.add("/spm.pdf", b"%PDF-1.7 ...")
+    pdf = PDFDownloader(pdf_url, tmp_path, retry_attempts=1, retry_wait=0, engine=engine)
+    assert pdf.download_years()[0].read_bytes() == b"%PDF-1.7 ..."
+
+    rows = [{"countryiso3code": "FRA", "date": "2020", "value": 1.0}]
+    http_stub.add("/v2/country/all/indicator/EN.ATM.CO2E.KT", json.dumps([{"page": 1}, rows]).encode())
+    co2 = CO2Downloader("EN.ATM.CO2E.KT", retry_attempts=1, retry_wait=0, engine=engine,
+                        base_url=http_stub.url + "/v2")
+    assert co2.download_years([2020], max_workers=1) == rows
+
+def test_position_writes_a_slice_in_place(http_stub, engine, tmp_path):
+    url = http_stub.add("/a.bin", b"0123456789")
+    dest = tmp_path / "a.bin"
+    dest.write_bytes(b"." * 10)
+    engine.fetch(url, dest, headers={"Range": "bytes=4-6"}, position=4)
+    assert dest.read_bytes() == b"....456..."
+
+    http_stub.ignore_range = True
+    with pytest.raises(RangeMismatch):
+        engine.fetch(url, dest, headers={"Range": "bytes=4-6"}, position=4)
@@ -1,50 +1,165 @@
+import io
+import tarfile
 import pytest
 from pathlib import Path
+from etl.downloader.engine import DownloadEngine
 from etl.downloader.http_downloader import HTTPDownloader
-
-class FakeResponse:
-    def __init__(self, status=200, chunks=None):
-        self.status = status
-        self._chunks = chunks or [b"abc", b"def"]
-    def raise_for_status(self):
-        if not (200 <= self.status < 300):
-            raise IOError("bad status")
-    def iter_content(self, chunk_size):
-        yield from self._chunks
+from etl.downloader.tar_extractor import TarExtractor
 
 @pytest.fixture
 def tmp_dir(tmp_path):
     return tmp_path / "out"
 
-def test_download_year_tar_success(tmp_dir, monkeypatch):
-    calls = []
-    def fake_get(url, stream, timeout):
-        calls.append(url)
-        return FakeResponse()
-    monkeypatch.setattr("requests.get", fake_get)
+@pytest.fixture
+def engine():
+    with DownloadEngine(max_connections=8) as eng:
+        yield eng
 
-    dl = HTTPDownloader(base_url="http://base", retry_attempts=2, retry_wait=0)
+def test_download_year_tar_success(tmp_dir, http_stub, engine):
+    http_stub.add("/2021.tar.gz", b"abcdef")
+    dl = HTTPDownloader(base_url=http_stub.url, retry_attempts=2, retry_wait=0, engine=engine)
     out = dl.download_year_tar(2021, tmp_dir)
     assert out.exists()
-    assert tmp_dir.joinpath("2021","2021.tar.gz").exists()
-    assert calls == ["http://base/2021.tar.gz"]
+    assert tmp_dir.joinpath("2021","2021.tar.gz").read_bytes() == b"abcdef"
+    assert [path for path, _ in http_stub.requests] == ["/2021.tar.gz"]
 
-def test_download_years_parallel(tmp_dir, monkeypatch):
-    created = []
+def test_download_years_parallel(tmp_dir, http_stub, engine):
+    for year in (2019, 2020):
+        http_stub.add(f"/{year}.tar.gz", str(year).encode())
+    dl = HTTPDownloader(base_url=http_stub.url, retry_wait=0, engine=engine)
+    results = dl.download_years([2019, 2020, 1901], tmp_dir, max_workers=2)
 
-    # signature now takes self, year, dest_dir
-    def fake_year_tar(self, year, dest):
-        p = dest/str(year)/f"{year}.tar.gz"
-        p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_bytes(b"")
-        created.append(year)
-        return p
+    # 1901 is a 404: logged and left out, the others still land
+    assert all(isinstance(p, Path) for p in results)
+    assert sorted(p.read_bytes() for p in results) == [b"2019", b"2020"]
 
-    monkeypatch.setattr(HTTPDownloader, "download_year_tar", fake_year_tar)
-    dl = HTTPDownloader()
-    results = dl.download_years([2019, 2020], tmp_dir, max_workers=2)
+def test_transfers_share_pooled_connections(tmp_dir, http_stub, engine):
+    years = range(1950, 1990)
+    for year in years:
+        http_stub.add(f"/{year}.tar.gz", b"x" * 1000)
+    dl = HTTPDownloader(base_url=http_stub.url, retry_wait=0, engine=engine)
+    assert len(dl.download_years(years, tmp_dir, max_workers=40)) == 40
+    assert http_stub.connections <= engine.max_connections
 
-    assert set(created) == {2019, 2020}
-    assert all(isinstance(p, Path) for p in results)
-    assert len(results) == 2
+def test_unchanged_archive_is_not_refetched(tmp_dir, http_stub, engine):
+    http_stub.add("/2020.tar.gz", b"x" * 100)
+    dl = HTTPDownloader(base_url=http_stub.url, retry_wait=0, engine=engine)
+    out = dl.download_year_tar(2020, tmp_dir)
+    out2 = dl.download_year_tar(2020, tmp_dir)
+    assert out2 == out and out.read_bytes() == b"x" * 100
+    assert http_stub.requests[1][1]["If-None-Match"] == http_stub.etags["/2020.tar.gz"]
+
+def test_interrupted_download_resumes_with_range(tmp_dir, http_stub, engine):
+    body = bytes(range(256)) * 4
+    http_stub.add("/2020.tar.gz", body)
+    http_stub.cut_next("/2020.tar.gz", after=300)
+    dl = HTTPDownloader(base_url=http_stub.url, retry_attempts=2, retry_wait=0, engine=engine)
+    out = dl.download_year_tar(2020, tmp_dir)
+    assert out.read_bytes() == body
+    assert http_stub.requests[1][1]["Range"] == "bytes=300-"
+    assert not out.with_name(out.name + ".part").exists()
+
+def test_changed_upstream_is_downloaded_again(tmp_dir, http_stub, engine):
+    http_stub.add("/2020.tar.gz", b"old")
+    dl = HTTPDownloader(base_url=http_stub.url, retry_wait=0, engine=engine)
+    dl.download_year_tar(2020, tmp_dir)
+    http_stub.add("/2020.tar.gz", b"new!")
+    assert dl.download_year_tar(2020, tmp_dir).read_bytes() == b"new!"
+
+def _tar_gz(members):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+def test_stream_year_extracts_while_downloading(tmp_path, http_stub, engine):
+    archive = _tar_gz({f"{i:05d}.csv": b"row\n" * 2000 for i in range(20)})
+    http_stub.add("/2020.tar.gz", archive)
+    dl = HTTPDownloader(base_url=http_stub.url, retry_wait=0, engine=engine)
+    copy = tmp_path / "raw" / "2020" / "2020.tar.gz"
+    def extract(body):
+        return TarExtractor().extract_stream(body, tmp_path / "2020")
+
+    csvs = dl.stream_year(2020, extract, archive_copy=copy)
+    assert len(csvs) == 20 and copy.read_bytes() == archive
+
+    # unchanged upstream: one 304, members come from the kept copy
+    for p in csvs:
+        p.unlink()
+    assert len(dl.stream_year(2020, extract, archive_copy=copy)) == 20
+    assert http_stub.requests[-1][1]["If-None-Match"] == http_stub.etags["/2020.tar.gz"]
+
+def test_stream_year_without_archive_copy_writes_only_members(tmp_path, http_stub, engine):
+    http_stub.add("/2020.tar.gz", _tar_gz({"a.csv": b"1", "b.csv": b"2"}))
+    dl = HTTPDownloader(base_url=http_stub.url, retry_wait=0, engine=engine)
+    csvs = dl.stream_year(2020, lambda body: TarExtractor().extract_stream(body, tmp_path / "x"))
+    assert sorted(p.name for p in tmp_path.rglob("*") if p.is_file()) == ["a.csv", "b.csv"]
+    assert len(csvs) == 2
+
+def test_large_archive_is_fetched_as_parallel_ranges(tmp_dir, http_stub, engine):
+    body = bytes(range(256)) * 40                      # 10240 bytes → 10 ranges of 1 KiB
+    http_stub.add("/2020.tar.gz", body)
+    dl = HTTPDownloader(base_url=http_stub.url, retry_wait=0, engine=engine,
+                        range_connections=4, range_part_size=1024)
+    assert dl.download_year_tar(2020, tmp_dir).read_bytes() == body
+    ranges = sorted(h["Range"] for _, h in http_stub.requests)
+    assert len(ranges) == 10 and "bytes=9216-10239" in ranges
+    assert all(h.get("If-Range") == http_stub.etags["/2020.tar.gz"]
+               for _, h in http_stub.requests[1:])
+
+def test_ranged_download_falls_back_when_range_is_ignored(tmp_dir, http_stub, engine):
+    body = b"y" * 5000
+    http_stub.add("/2020.tar.gz", body)
+    http_stub.ignore_range = True
+    dl = HTTPDownloader(base_url=http_stub.url, retry_wait=0, engine=engine,
+                        range_connections=4, range_part_size=1024)
+    assert dl.download_year_tar(2020, tmp_dir).read_bytes() == body
+    assert len(http_stub.requests) == 1
+
+def test_broken_ranged_download_restarts_cleanly(tmp_dir, http_stub, engine):
+    body = bytes(range(256)) * 16
+    http_stub.add("/2020.tar.gz", body)
+    http_stub.cut_next("/2020.tar.gz", after=100)
+    dl = HTTPDownloader(base_url=http_stub.url, retry_attempts=2, retry_wait=0, engine=engine,
+                        range_connections=3, range_part_size=1024)
+    out = dl.download_year_tar(2020, tmp_dir)
+    assert out.read_bytes() == body and out.stat().st_size == len(body)
+
+def _interrupt_second_range(dl, dest_dir, engine, monkeypatch):
+    """Download 2020 with every request for bytes 1024-2047 dropping its connection."""
+    afetch = engine.afetch
+
+    async def drop_second_range(url, dest=None, headers=None, **kw):
+        if (headers or {}).get("Range") == "bytes=1024-2047":
+            raise IOError("connection dropped")
+        return await afetch(url, dest, headers, **kw)
+
+    monkeypatch.setattr(engine, "afetch", drop_second_range)
+    with pytest.raises(IOError):
+        dl.download_year_tar(2020, dest_dir)
+    monkeypatch.setattr(engine, "afetch", afetch)
+
+def test_interrupted_ranged_download_fetches_only_missing_ranges(tmp_dir, http_stub, engine, monkeypatch):
+    body = bytes(range(256)) * 8                       # 2048 bytes → 2 ranges of 1 KiB
+    http_stub.add("/2020.tar.gz", body)
+    dl = HTTPDownloader(base_url=http_stub.url, retry_attempts=1, retry_wait=0, engine=engine,
+                        range_connections=2, range_part_size=1024)
+    _interrupt_second_range(dl, tmp_dir, engine, monkeypatch)
+
+    seen = len(http_stub.requests)
+    out = dl.download_year_tar(2020, tmp_dir)
+    assert out.read_bytes() == body
+    assert [h["Range"] for _, h in http_stub.requests[seen:]] == ["bytes=1024-2047"]
+    assert http_stub.requests[-1][1]["If-Range"] == http_stub.etags["/2020.tar.gz"]
+
+def test_ranged_download_of_a_changed_archive_starts_over(tmp_dir, http_stub, engine, monkeypatch):
+    http_stub.add("/2020.tar.gz", b"a" * 2048)
+    dl = HTTPDownloader(base_url=http_stub.url, retry_attempts=2, retry_wait=0, engine=engine,
+                        range_connections=2, range_part_size=1024)
+    _interrupt_second_range(dl, tmp_dir, engine, monkeypatch)
 
+    http_stub.add("/2020.tar.gz", b"b" * 2048)
+    assert dl.download_year_tar(2020, tmp_dir).read_bytes() == b"b" * 2048
@@ -11,6 +11,23 @@ from etl.transformer.concurrent import ConcurrentTransformer
 from etl.loader.loader import BatchLoader
 from etl.loader.preparer import DefaultRecordPreparer
 
+def _gsod_csv():
+    header = (
+        '"STATION","DATE","LATITUDE","LONGITUDE","ELEVATION","NAME",'
+        '"TEMP","TEMP_ATTRIBUTES","DEWP","DEWP_ATTRIBUTES","SLP","SLP_ATTRIBUTES",'
+        '"STP","STP_ATTRIBUTES","VISIB","VISIB_ATTRIBUTES","WDSP","WDSP_ATTRIBUTES",'
+        '"MXSPD","GUST","MAX","MAX_ATTRIBUTES","MIN","MIN_ATTRIBUTES",'
+        '"PRCP","PRCP_ATTRIBUTES","SNDP","FRSHTT"\n'
+    )
+    row = (
+        '"S","2020-01-01","0","0","0","N",'
+        '"32","0","32","0","1000","0",'
+        '"1000","0","10","0","5","0",'
+        '"5","5","32","0","32","0",'
+        '"0","","0","000000"\n'
+    )
+    return (header + row).encode("utf-8")
+
 class InMemoryDownloader(Downloader):
     def download_years(self, years, dest_dir, max_workers=1):
         # create fake tar.gz containing one CSV
@@ -18,21 +35,7 @@ class InMemoryDownloader(Downloader):
         for y in years:
             p = dest_dir/str(y)/f"{y}.tar.gz"
             p.parent.mkdir(parents=True, exist_ok=True)
-            header = (
-                '"STATION","DATE","LATITUDE","LONGITUDE","ELEVATION","NAME",'
-                '"TEMP","TEMP_ATTRIBUTES","DEWP","DEWP_ATTRIBUTES","SLP","SLP_ATTRIBUTES",'
-                '"STP","STP_ATTRIBUTES","VISIB","VISIB_ATTRIBUTES","WDSP","WDSP_ATTRIBUTES",'
-                '"MXSPD","GUST","MAX","MAX_ATTRIBUTES","MIN","MIN_ATTRIBUTES",'
-                '"PRCP","PRCP_ATTRIBUTES","SNDP","FRSHTT"\n'
-            )
-            row = (
-                '"S","2020-01-01","0","0","0","N",'
-                '"32","0","32","0","1000","0",'
-                '"1000","0","10","0","5","0",'
-                '"5","5","32","0","32","0",'
-                '"0","","0","000000"\n'
-            )
-            content = (header + row).encode("utf-8")
+            content = _gsod_csv()
             with tarfile.open(p, "w:gz") as tf:
                 info = tarfile.TarInfo("data.csv")
                 info.size = len(content)
@@ -58,11 +61,12 @@ class DummyRepo:
     def __init__(self): self.docs=[]
     def bulk_insert(self, docs): self.docs.extend(docs)
 
-def test_full_pipeline(tmp_path):
+def _build_pipeline(tmp_path, mode="batch"):
     cfg = type("C", (), {
         "DATA_DIR": tmp_path/"data",
         "DOWNLOAD_MAX_WORKERS": 1,
-        "CHUNK_SIZE": 10
+        "CHUNK_SIZE": 10,
+        "STREAM_FILE_BATCH": 10,
     })()
     logger = logging.getLogger("test_integration_pipeline")
     logger.setLevel(logging.INFO)
@@ -79,7 +83,63 @@ def test_full_pipeline(tmp_path):
                          logger=logger)
     ld_step = LoadStep(cfg, loader, logger=logger)
 
-    pipeline = Pipeline([dl_step, tr_step, ld_step])
+    return Pipeline([dl_step, tr_step, ld_step], mode=mode), repo
+
+def test_full_pipeline(tmp_path):
+    pipeline, repo = _build_pipeline(tmp_path)
     pipeline.run([2025])
     # after run, repo.docs should have at least one record
     assert repo.docs, "No docs loaded"
+
+def test_full_pipeline_stream_mode(tmp_path):
+    pipeline, repo = _build_pipeline(tmp_path, mode="stream")
+    pipeline.run([2024, 2025])
+    assert len(repo.docs) == 2
+
+def test_full_pipeline_concurrent_mode(tmp_path):
+    pipeline, repo = _build_pipeline(tmp_path, mode="concurrent")
+    pipeline.run([2023, 2024, 2025])
+    assert len(repo.docs) == 3
+
+def test_zero_disk_streaming_pipeline(tmp_path, http_stub):
+    from etl.downloader.engine import DownloadEngine
+    from etl.downloader.http_downloader import HTTPDownloader
+    from etl.downloader.tar_extractor import TarExtractor
+    from etl.pipeline.manifest import RunManifest
+
+    for year in (2024, 2025):
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+            for station in ("01001099999", "01002099999"):
+                content = _gsod_csv()
+                info = tarfile.TarInfo(f"{station}.csv")
+                info.size = len(content)
+                tf.addfile(info, io.BytesIO(content))
+        http_stub.add(f"/{year}.tar.gz", buf.getvalue())
+
+    cfg = type("C", (), {
+        "DATA_DIR": tmp_path/"data",
+        "DOWNLOAD_MAX_WORKERS": 2,
+        "DOWNLOAD_STREAM_EXTRACT": True,
+        "DOWNLOAD_KEEP_ARCHIVE": False,
+        "CHUNK_SIZE": 10,
+        "STREAM_FILE_BATCH": 10,
+    })()
+    logger = logging.getLogger("test_integration_pipeline")
+    manifest = RunManifest(tmp_path/"manifest.sqlite3", logger)
+    with DownloadEngine(max_connections=4) as engine:
+        dl_step = DownloadStep(
+            cfg,
+            HTTPDownloader(base_url=http_stub.url, retry_wait=0, engine=engine),
+            TarExtractor(logger, in_memory=True),
+            logger=logger,
+            manifest=manifest,
+        )
+        tr_step = TransformStep(cfg, ConcurrentTransformer(max_workers=2, logger=logger), logger, manifest)
+        records = [r for batch in Pipeline([dl_step, tr_step], mode="stream").stream([2024, 2025])
+                   for r in batch]
+
+    assert len(records) == 4
+    # only the raw/ directory (empty: no archive copy) may exist under DATA_DIR
+    assert [p for p in (tmp_path/"data").rglob("*") if p.is_file()] == []
+    assert set(manifest.known_years()) == {2024, 2025}
@@ -0,0 +1,71 @@
+import logging
+from pdfminer.high_level import extract_text
+from etl.transformer import ipcc_transformer
+from etl.transformer.ipcc_transformer import IPCCTransformer
+
+LOGGER = logging.getLogger("test_ipcc_transformer")
+
+def _pdf(pages):
+    """A minimal PDF: one Helvetica text line per entry of each page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = "".join(f"({line}) Tj 0 -30 Td " for line in lines)
+        stream = f"BT /F1 12 Tf 72 720 Td {ops}ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+PAGES = [[f"Page {p} line {i} of the report text" for i in range(3)] for p in range(7)]
+
+def test_page_ranges_reassemble_to_the_whole_file_text(tmp_path):
+    pdf = tmp_path / "r.pdf"
+    pdf.write_bytes(_pdf(PAGES))
+    whole = extract_text(str(pdf))
+    assert "Page 6 line 2" in whole
+    for processes in (1, 2):
+        t = IPCCTransformer(LOGGER, processes=processes, pages_per_task=3)
+        assert t._extract(pdf) == whole
+
+def test_cache_is_keyed_by_content_and_params(tmp_path, monkeypatch):
+    pdf = tmp_path / "r.pdf"
+    pdf.write_bytes(_pdf(PAGES))
+    cache = tmp_path / "cache"
+    calls = []
+    real = ipcc_transformer._extract_pages
+    monkeypatch.setattr(ipcc_transformer, "_extract_pages", lambda *a: calls.append(a) or real(*a))
+
+    t = IPCCTransformer(LOGGER, processes=1, pages_per_task=4, cache_dir=cache)
+    first = t.transform([pdf])
+    assert len(calls) == 2
+    assert t.transform([pdf]) == first and len(calls) == 2          # served from the cache
+
+    t.laparams.char_margin += 1                                     # other layout → other text
+    t.transform([pdf])
+    assert len(calls) == 4
+    pdf.write_bytes(_pdf(PAGES[:3]))                                # the PDF changed
+    t.transform([pdf])
+    assert len(calls) == 5
+    assert len(list(cache.glob("*.txt"))) == 3
+
+def test_chunks_carry_source_and_content_hash(tmp_path, monkeypatch):
+    t = IPCCTransformer(LOGGER, processes=1, max_words=50)
+    text = "Introduction " + " ".join(f"w{i}" for i in range(120)) + "\n\nA.1\n\nsome finding\n"
+    monkeypatch.setattr(t, "_extract", lambda pdf: text)
+    chunks = t.transform([tmp_path / "spm.pdf"])
+    assert [len(c["text"].split()) for c in chunks] == [50, 50, 21, 2]
+    assert {c["source"] for c in chunks} == {"spm.pdf"}
+    assert chunks[-1]["hash"] == ipcc_transformer.chunk_hash("some finding")
+    assert len({c["hash"] for c in chunks}) == 4
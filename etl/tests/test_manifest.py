@@ -0,0 +1,148 @@
+import io
+import logging
+import tarfile
+from datetime import date
+from etl.pipeline.manifest import RunManifest
+from etl.pipeline.pipeline import Pipeline
+from etl.pipeline.download_step import DownloadStep
+from etl.pipeline.transform_step import TransformStep
+from etl.pipeline.load_step import LoadStep
+from etl.downloader.tar_extractor import TarExtractor
+from etl.tests.gsod_sample import to_csv
+from etl.transformer.concurrent import ConcurrentTransformer
+
+logger = logging.getLogger("test_manifest")
+
+class TarDownloader:
+    """Writes a one-station GSOD archive per year and counts calls."""
+    def __init__(self): self.calls = 0
+    def download_years(self, years, dest_dir, max_workers=1):
+        self.calls += 1
+        out = []
+        for y in years:
+            p = dest_dir / str(y) / f"{y}.tar.gz"
+            p.parent.mkdir(parents=True, exist_ok=True)
+            data = f"STATION,DATE\nS1,{y}-01-01\nS1,{y}-01-02\n".encode()
+            with tarfile.open(p, "w:gz") as tf:
+                info = tarfile.TarInfo("S1.csv")
+                info.size = len(data)
+                tf.addfile(info, io.BytesIO(data))
+            out.append(p)
+        return out
+
+class RowTransformer:
+    def transform(self, paths):
+        recs = []
+        for p in paths:
+            for line in p.read_text().splitlines()[1:]:
+                station, day = line.split(",")
+                recs.append({"station": station, "record_date": date.fromisoformat(day)})
+        return recs
+
+class Loader:
+    def __init__(self, fail=False): self.fail, self.docs = fail, []
+    def load(self, records):
+        if self.fail:
+            raise RuntimeError("mongo down")
+        self.docs.extend(records)
+        return []
+
+def _pipeline(tmp_path, downloader, loader, manifest):
+    cfg = type("C", (), {"DATA_DIR": tmp_path / "data", "DOWNLOAD_MAX_WORKERS": 1,
+                         "CHUNK_SIZE": 10, "STREAM_FILE_BATCH": 10})()
+    return Pipeline([
+        DownloadStep(cfg, downloader, TarExtractor(), logger, manifest),
+        TransformStep(cfg, RowTransformer(), logger, manifest),
+        LoadStep(cfg, loader, logger, manifest),
+    ])
+
+def test_manifest_tracks_stages_and_resumes_after_crash(tmp_path):
+    manifest = RunManifest(tmp_path / "m.sqlite3")
+    dl = TarDownloader()
+    try:
+        _pipeline(tmp_path, dl, Loader(fail=True), manifest).run([2020])
+    except RuntimeError:
+        pass
+    assert manifest.year_stage(2020) == "transformed"
+    assert manifest.verified_archive(2020) is not None
+
+    # "restart": same manifest file, fresh objects
+    manifest = RunManifest(tmp_path / "m.sqlite3")
+    loader = Loader()
+    _pipeline(tmp_path, dl, loader, manifest).run([2020])
+    assert dl.calls == 1                       # nothing re-downloaded
+    assert len(loader.docs) == 2
+    assert manifest.year_stage(2020) == "loaded"
+    assert manifest.pending_files(2020) == []
+
+def test_failed_batches_are_not_marked_loaded(tmp_path):
+    manifest = RunManifest(tmp_path / "m.sqlite3")
+    csv = tmp_path / "2021" / "S2.csv"
+    csv.parent.mkdir()
+    csv.write_text("x")
+    manifest.mark_extracted(2021, [csv])
+    recs = [{"station": "S2", "record_date": date(2021, 1, d)} for d in (1, 2)]
+    manifest.mark_transformed([csv], recs)
+    manifest.mark_loaded(recs, failed=recs[1:])
+    assert manifest.year_stage(2021) == "transformed"
+    assert manifest.partially_loaded() == [(2021, "S2")]
+    manifest.mark_loaded(recs[1:])
+    assert manifest.year_stage(2021) == "loaded"
+
+def test_reextraction_keeps_unchanged_loaded_files(tmp_path):
+    manifest = RunManifest(tmp_path / "m.sqlite3")
+    year_dir = tmp_path / "2022"
+    year_dir.mkdir()
+    a, b = year_dir / "A.csv", year_dir / "B.csv"
+    a.write_text("a")
+    b.write_text("b")
+    assert manifest.mark_extracted(2022, [a, b]) == [a, b]
+    manifest.mark_transformed([a, b], [{"station": "A", "record_date": date(2022, 1, 1)}])
+    manifest.mark_loaded([{"station": "A", "record_date": date(2022, 1, 1)}])
+    assert manifest.year_stage(2022) == "loaded"
+
+    b.write_text("b changed")
+    assert manifest.mark_extracted(2022, [a, b]) == [b]
+    assert manifest.year_stage(2022) == "extracted"
+
+def test_unreadable_files_stay_pending(tmp_path):
+    manifest = RunManifest(tmp_path / "m.sqlite3")
+    year_dir = tmp_path / "2023"
+    year_dir.mkdir()
+    empty, broken = year_dir / "E.csv", year_dir / "B.csv"
+    empty.write_text(to_csv([]), encoding="utf-8")
+    broken.write_bytes(to_csv([]).encode() + b"\xff\xfe\n")
+    manifest.mark_extracted(2023, [empty, broken])
+    cfg = type("C", (), {"CHUNK_SIZE": 10, "STREAM_FILE_BATCH": 10})()
+    for columnar in (False, True):
+        transformer = ConcurrentTransformer(max_workers=1, logger=logger, columnar=columnar)
+        try:
+            assert len(TransformStep(cfg, transformer, logger, manifest).execute([empty, broken])) == 0
+        finally:
+            transformer.close()
+        assert manifest.pending_files(2023) == [broken]    # read, no rows: loaded; unreadable: pending
+
+def test_crash_mid_load_leaves_the_file_for_cleanup(tmp_path):
+    class Crashing(Loader):
+        # rows reach Mongo, then the process dies before the loader returns
+        def load(self, records):
+            self.docs.extend(records[:1])
+            raise RuntimeError("killed mid-insert")
+
+    manifest = RunManifest(tmp_path / "m.sqlite3")
+    dl, crashed = TarDownloader(), Crashing()
+    try:
+        _pipeline(tmp_path, dl, crashed, manifest).run([2020])
+    except RuntimeError:
+        pass
+    assert len(crashed.docs) == 1
+    assert manifest.partially_loaded() == [(2020, "S1")]
+
+    # run_gsod's resume cleanup: delete the station-year, then redo the file
+    loader = Loader()
+    loader.docs = [d for d in crashed.docs if (d["record_date"].year, d["station"]) != (2020, "S1")]
+    for year, station in manifest.partially_loaded():
+        manifest.reset_loaded(year, station)
+    _pipeline(tmp_path, dl, loader, manifest).run([2020])
+    assert len(loader.docs) == 2                # no duplicate of the row inserted before the crash
+    assert manifest.partially_loaded() == []
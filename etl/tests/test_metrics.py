@@ -0,0 +1,62 @@
+import json
+import pytest
+from etl import metrics
+from etl.downloader.co2_downloader import CO2Downloader
+from etl.metrics import MetricsCollector
+from etl.pipeline.pipeline import Pipeline
+from etl.pipeline.protocols import Step
+
+class Double(Step):
+    def execute(self, data):
+        metrics.incr("retries")
+        return [x * 2 for x in data]
+
+class Explode(Step):
+    def execute(self, data):
+        return [y for x in data for y in (x, x)]
+    def stream(self, batches):
+        for batch in batches:
+            for x in batch:
+                yield [x, x]
+
+def test_batch_mode_records_step_metrics():
+    col = MetricsCollector()
+    Pipeline([Double(), Explode()], name="p", metrics=col).run([1, 2, 3])
+    double, explode = col.steps
+    assert (double.pipeline, double.step) == ("p", "Double")
+    assert (double.records_in, double.records_out, double.retries) == (3, 3, 1)
+    assert (explode.records_in, explode.records_out) == (3, 6)
+    assert double.wall_s >= 0 and double.peak_rss_bytes >= 0
+
+def test_stream_mode_counts_batches():
+    col = MetricsCollector()
+    Pipeline([Explode(), Double()], mode="stream", metrics=col).run([1, 2])
+    explode, double = col.steps
+    assert (explode.records_in, explode.records_out, explode.batches) == (2, 4, 2)
+    assert (double.records_in, double.records_out, double.batches) == (4, 4, 2)
+    assert double.retries == 2
+
+def test_write_json_and_prometheus(tmp_path):
+    col = MetricsCollector()
+    Pipeline([Double()], name="gsod", metrics=col).run([1])
+    json_path, prom_path = col.write(tmp_path)
+    report = json.loads(json_path.read_text())
+    assert report["steps"][0]["step"] == "Double"
+    prom = prom_path.read_text()
+    assert "# TYPE etl_step_wall_seconds gauge" in prom
+    assert 'etl_step_records_out{pipeline="gsod",step="Double"} 1' in prom
+    assert 'etl_events_total{event="retries"}' in prom
+
+def test_a_failing_download_counts_one_error(http_stub):
+    class Download(Step):
+        def execute(self, years):
+            # nothing served: the World Bank request 404s and the error propagates
+            return CO2Downloader("X", retry_attempts=1, retry_wait=0,
+                                 base_url=http_stub.url).download_years(years)
+
+    col = MetricsCollector()
+    before = metrics.counters().get("errors", 0)
+    with pytest.raises(IOError):
+        Pipeline([Download()], name="co2", metrics=col).run([2020])
+    assert col.steps[0].errors == 1
+    assert metrics.counters()["errors"] == before + 1
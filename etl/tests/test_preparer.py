@@ -11,3 +11,21 @@ def test_prepare_fields():
     assert out["stationId"] == "S1"
     assert isinstance(out["recordDate"], __import__("datetime").datetime)
     assert out["other"] == 5
+
+def test_prepare_many_builds_gsod_documents_from_columns(tmp_path):
+    from etl.tests.gsod_sample import DIRTY_ROWS, station_rows, to_csv
+    from etl.transformer.batch import RecordBatch
+    from etl.transformer.builder import PydanticRecordBuilder
+    from etl.transformer.parser import CsvParser
+    from etl.transformer.reader import CsvReader
+    logger = logging.getLogger("test_prepare_many")
+    path = tmp_path / "s.csv"
+    path.write_text(to_csv(station_rows(40, seed=5) + DIRTY_ROWS), encoding="utf-8")
+    records = CsvReader(CsvParser(), PydanticRecordBuilder(logger), logger).read(path)
+    records[3] = {**records[3], "latitude": None}          # no location for this one
+    prep = DefaultRecordPreparer(logger)
+    docs = prep.prepare_many(RecordBatch.from_records(records))
+    want = [prep.prepare(r) for r in records]
+    assert [[(k, type(v), repr(v)) for k, v in d.items()] for d in docs] == \
+           [[(k, type(v), repr(v)) for k, v in d.items()] for d in want]
+    assert "location" not in docs[3] and docs[0]["location"]["type"] == "Point"
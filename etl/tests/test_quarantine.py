@@ -0,0 +1,106 @@
+import logging
+from etl import metrics
+from etl.tests.gsod_sample import DIRTY_ROWS, station_rows, to_csv
+from etl.transformer.builder import PydanticRecordBuilder
+from etl.transformer.co2_transformer import CO2Transformer
+from etl.transformer.parser import CsvParser
+from etl.transformer.quarantine import Quarantine, RejectLog, summary
+from etl.transformer.reader import CsvReader
+
+LOGGER = logging.getLogger("test_quarantine")
+
+def _reader(tmp_path, builder=None):
+    builder = builder or PydanticRecordBuilder(LOGGER)
+    return CsvReader(CsvParser(LOGGER), builder, LOGGER, Quarantine(tmp_path / "dead", LOGGER))
+
+def test_rejected_rows_are_counted_by_reason_and_quarantined_by_station(tmp_path):
+    path = tmp_path / "01001099999.csv"
+    path.write_text(to_csv(station_rows(40, seed=1) + DIRTY_ROWS), encoding="utf-8")
+    before = metrics.counters()
+    records = _reader(tmp_path).read(path)
+    after = metrics.counters()
+    rejected = after["rows_rejected"] - before.get("rows_rejected", 0)
+    assert len(records) + rejected == 40 + len(DIRTY_ROWS)
+    assert after["rows_rejected.LATITUDE.conversion_error"] - \
+           before.get("rows_rejected.LATITUDE.conversion_error", 0) == 1
+    assert "DATE/date_from_datetime_parsing ×1" in summary(before, after)
+
+    letters = list(Quarantine(tmp_path / "dead").letters())
+    assert len(letters) == rejected
+    assert {(x.year, x.group, x.source) for x in letters if x.group == "BADLAT"} == \
+           {("2020", "BADLAT", f"{tmp_path.name}/01001099999.csv")}
+    assert all(x.field and x.code and x.error and x.raw["STATION"] == x.group for x in letters)
+
+def test_replay_yields_rows_now_accepted_and_keeps_the_rest(tmp_path):
+    path = tmp_path / "s.csv"
+    path.write_text(to_csv(DIRTY_ROWS), encoding="utf-8")
+    reader = _reader(tmp_path)
+    reader.read(path)
+    quarantined = list(reader.quarantine.letters())
+    assert list(reader.replay()) == []                  # nothing fixed: every row stays
+    assert [x.raw for x in reader.quarantine.letters()] == [x.raw for x in quarantined]
+
+    class Lenient(PydanticRecordBuilder):
+        # say the coordinate converter learnt to read "abc" as missing
+        def build(self, raw):
+            return super().build({**raw, "LATITUDE": ""} if raw.get("LATITUDE") == "abc" else raw)
+
+    again = _reader(tmp_path, Lenient(LOGGER))
+    replayed = list(again.replay(years=[2020]))
+    assert [r["station"] for r in replayed] == ["BADLAT"]
+    assert not (tmp_path / "dead" / "2020" / "BADLAT.jsonl").exists()
+    assert len(list(again.quarantine.letters())) == len(quarantined) - 1
+
+def test_reject_log_samples_at_most_a_burst(caplog):
+    log = RejectLog(LOGGER, metric="test_rejects", burst=2, interval=3600)
+    with caplog.at_level(logging.WARNING, logger=LOGGER.name):
+        for i in range(10):
+            log("f.csv", ValueError(f"bad {i}"))
+    assert len(caplog.records) == 2
+    assert metrics.counters()["test_rejects.row.ValueError"] >= 10
+
+def test_co2_rejects_go_to_quarantine_per_year_and_country(tmp_path):
+    good = {"country": {"value": "Aruba"}, "countryiso3code": "ABW", "date": "2020", "value": 1.5}
+    records = [
+        good,
+        {**good, "date": "2019", "value": "n/a"},
+        {**good, "countryiso3code": None},
+    ]
+    quarantine = Quarantine(tmp_path / "co2")
+    docs = CO2Transformer(LOGGER, quarantine=quarantine).transform(records)
+    assert docs == [{"country": "Aruba", "iso3": "ABW", "year": 2020, "co2Mt": 1.5}]
+    assert sorted((x.year, x.group, x.field, x.code) for x in quarantine.letters()) == [
+        ("2019", "ABW", "value", "conversion_error"),
+        ("2020", "unknown", "countryiso3code", "missing"),
+    ]
+
+    # a later run where 2019 is fixed clears its letter; 2020's stays, it was not transformed
+    CO2Transformer(LOGGER, quarantine=quarantine).transform([{**good, "date": "2019"}])
+    assert [(x.year, x.group) for x in quarantine.letters()] == [("2020", "unknown")]
+
+def test_quarantining_a_file_again_replaces_its_rows(tmp_path):
+    path, other = tmp_path / "s.csv", tmp_path / "t.csv"
+    path.write_text(to_csv(DIRTY_ROWS), encoding="utf-8")
+    other.write_text(to_csv(DIRTY_ROWS[2:3]), encoding="utf-8")          # BADLAT, as in s.csv
+    reader = _reader(tmp_path)
+    reader.read(path)
+    reader.read(other)
+    first = sorted((x.group, x.source, x.code) for x in reader.quarantine.letters())
+    reader.read(path)                                   # a rerun of the same source file
+    assert sorted((x.group, x.source, x.code) for x in reader.quarantine.letters()) == first
+    assert sum(x.source.endswith("/t.csv") for x in reader.quarantine.letters()) == 1
+
+def test_clean_rerun_clears_the_files_letters(tmp_path):
+    path, other = tmp_path / "2020" / "s.csv", tmp_path / "2021" / "s.csv"   # same station, two years
+    path.parent.mkdir()
+    other.parent.mkdir()
+    path.write_text(to_csv(DIRTY_ROWS), encoding="utf-8")
+    other.write_text(to_csv(DIRTY_ROWS[2:3]), encoding="utf-8")
+    reader = _reader(tmp_path)
+    reader.read(path)
+    reader.read(other)
+
+    path.write_text(to_csv(station_rows(5, seed=2)), encoding="utf-8")    # say a converter fix
+    assert len(reader.read(path)) == 5
+    assert [x.source for x in reader.quarantine.letters()] == ["2021/s.csv"]
+    assert list(reader.replay()) == []                  # nothing of 2020/s.csv comes back
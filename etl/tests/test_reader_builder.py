@@ -1,7 +1,11 @@
+import io
 import logging
 import pytest
+from etl import metrics
+from etl.tests.gsod_sample import DIRTY_ROWS, HEADER, station_rows, to_csv
 from etl.transformer.reader import CsvReader
-from etl.transformer.builder import PydanticRecordBuilder
+from etl.transformer.builder import PydanticRecordBuilder, SchemaDriftError
+from etl.transformer.concurrent import ConcurrentTransformer
 from etl.transformer.parser import CsvParser
 
 SAMPLE = '''"STATION","DATE","LATITUDE","LONGITUDE","ELEVATION","NAME",\
@@ -29,3 +33,72 @@ def test_reader_and_builder(tmp_path, caplog):
     assert r["station"] == "01001"
     assert r["temp"] == pytest.approx(0.0)
     assert r["frshtt_fog"] is True
+
+def _dict_path(text, builder):
+    # DictReader → CsvParser → build, one dict per row
+    out = []
+    for raw in CsvParser().parse(io.StringIO(text, newline="")):
+        try:
+            out.append(builder.build(raw))
+        except Exception:
+            pass
+    return out
+
+_NO_FRSHTT = slice(None, -1)
+_DUP_TEMP = lambda row: row[:6] + ["-40"] + row[6:]   # noqa: E731
+
+@pytest.mark.parametrize("header,shape", [
+    (HEADER, list),
+    (HEADER[_NO_FRSHTT], lambda row: row[_NO_FRSHTT]),   # every flag False
+    (_DUP_TEMP(HEADER), _DUP_TEMP),                      # duplicate column: the last wins
+    ([h.lower() if h == "TEMP" else h for h in HEADER], list),  # field name, not alias
+    (HEADER + ["EXTRA"], lambda row: row + ["x"]),
+])
+def test_row_plan_matches_dict_path(header, shape):
+    rows = [shape(row) for row in station_rows(30, seed=7) + DIRTY_ROWS]
+    rows += [rows[0][:-1], rows[0][:5], rows[0] + ["extra"]]     # short and long rows
+    text = "\n".join(",".join(f'"{v}"' for v in row) for row in [header, *rows]) + "\n"
+    builder = PydanticRecordBuilder(logging.getLogger("test_reader_builder"))
+    header_row, parsed = CsvParser().parse_rows(io.StringIO(text, newline=""))
+    plan = builder.compile(header_row)
+    got = []
+    for row in parsed:
+        try:
+            got.append(plan(row))
+        except Exception:
+            pass
+    want = _dict_path(text, builder)
+    assert len(want) > 30
+    assert [[(k, type(v), repr(v)) for k, v in r.items()] for r in got] == \
+           [[(k, type(v), repr(v)) for k, v in r.items()] for r in want]
+
+def _read(path, validation, sample_rate=0.1):
+    logger = logging.getLogger("test_reader_builder")
+    builder = PydanticRecordBuilder(logger, validation, sample_rate)
+    return CsvReader(CsvParser(), builder, logger).read(path)
+
+@pytest.mark.parametrize("validation", ["batch", "sampled"])
+def test_validation_tiers_match_strict(tmp_path, validation):
+    path = tmp_path / "s.csv"
+    path.write_text(to_csv(station_rows(300, seed=9) + DIRTY_ROWS), encoding="utf-8")
+    strict = _read(path, "strict")
+    assert len(strict) > 300
+    assert [[(k, type(v), repr(v)) for k, v in r.items()] for r in _read(path, validation)] == \
+           [[(k, type(v), repr(v)) for k, v in r.items()] for r in strict]
+
+def test_sampled_validation_aborts_file_on_schema_drift(tmp_path):
+    # a header naming TEMP by its field name: no converter runs, pydantic still coerces
+    path = tmp_path / "s.csv"
+    path.write_text(to_csv(station_rows(50, seed=3)).replace('"TEMP"', '"temp"', 1), encoding="utf-8")
+    assert len(_read(path, "strict")) == 50
+    before = metrics.counters().get("files_aborted", 0)
+    with pytest.raises(SchemaDriftError):
+        _read(path, "sampled")
+    assert metrics.counters()["files_aborted"] == before + 1
+
+    # the aborted file is not reported transformed, so the manifest keeps it pending
+    transformer = ConcurrentTransformer(max_workers=1, validation="sampled", validation_sample=0.1)
+    try:
+        assert [(files, len(records)) for files, records in transformer.stream([path])] == [([], 0)]
+    finally:
+        transformer.close()
@@ -3,6 +3,7 @@ import mongomock
 import pytest
 from datetime import datetime
 from etl.loader.repository import MongoRepository
+from etl.loader.emissions_repository import EmissionsRepository
 
 @pytest.fixture(autouse=True)
 def patch_mongo(monkeypatch):
@@ -20,8 +21,8 @@ def test_count_and_insert(tmp_path):
     repo = MongoRepository(cfg=cfg, logger=logger)
     # seed some docs
     repo._col.insert_many([
-        {"record_date": datetime(2020,1,5)},
-        {"record_date": datetime(2021,1,5)}
+        {"recordDate": datetime(2020,1,5)},
+        {"recordDate": datetime(2021,1,5)}
     ])
     assert repo.count_for_year(2020) == 1
     # test bulk_insert with duplicates
@@ -29,3 +30,75 @@ def test_count_and_insert(tmp_path):
     repo.bulk_insert(docs)
     # duplicate key should be skipped but non-duplicates inserted
     assert repo._col.count_documents({}) == 4  # 2 seeded + ids 1 and 2
+
+def test_emissions_upsert_merges_indicators_per_country_year(patch_mongo, monkeypatch):
+    monkeypatch.setattr("etl.loader.emissions_repository.MongoClient", lambda uri: patch_mongo)
+    cfg = type("DummyCfg", (), {"MONGODB_URI": "mongodb://localhost:27017", "DB_NAME": "testdb"})()
+    repo = EmissionsRepository(cfg=cfg, logger=logging.getLogger("test_repository"))
+    assert repo._col.index_information()["iso3_year"]["unique"]
+
+    # mongomock's bulk_write predates pymongo's UpdateOne(sort=…): apply the ops one by one
+    def bulk_write(ops, ordered=True):
+        for op in ops:
+            repo._col.update_one(op._filter, op._doc, upsert=op._upsert)
+        return type("Result", (), {"upserted_count": 0, "modified_count": 0})()
+    repo._col.bulk_write = bulk_write
+
+    repo.bulk_insert([{"country": "France", "iso3": "FRA", "year": 2020, "co2Mt": 1.5}])
+    repo.bulk_insert([{"country": "France", "iso3": "FRA", "year": 2020, "population": 6.7e7}])
+    assert repo._col.count_documents({}) == 1
+    doc = repo.find_country_year("FRA", 2020)
+    assert doc["co2Mt"] == 1.5 and doc["population"] == 6.7e7
+    assert repo.count_for_year(2020, ["co2Mt", "population"]) == 1
+    assert repo.count_for_year(2020, ["co2Mt", "gdpUsd"]) == 0
+
+def _reports(patch_mongo, monkeypatch):
+    from etl.loader.reports_repository import ReportsRepository
+    monkeypatch.setattr("etl.loader.reports_repository.MongoClient", lambda uri: patch_mongo)
+    cfg = type("DummyCfg", (), {"MONGODB_URI": "mongodb://localhost:27017", "DB_NAME": "testdb",
+                                "CHUNK_SIZE": 2})()
+    repo = ReportsRepository(cfg=cfg, logger=logging.getLogger("test_repository"))
+
+    def bulk_write(ops, ordered=True):           # as above: mongomock vs pymongo's UpdateOne
+        for op in ops:
+            repo.col.update_one(op._filter, op._doc, upsert=op._upsert)
+    repo.col.bulk_write = bulk_write
+    return repo
+
+def test_reports_sync_only_writes_changed_chunks(patch_mongo, monkeypatch):
+    from etl.transformer.ipcc_transformer import chunk_hash
+    # unsourced chunks, already embedded: spm.pdf's stored before hashing, wg1.pdf's
+    # hashed the old way (section + text)
+    patch_mongo["testdb"]["reports"].insert_many([
+        {"section": "A.1", "paragraph": 1, "text": "kept", "embedding": [0.1]},
+        {"section": "B.1", "paragraph": 1, "text": "wg1 text", "embedding": [0.3], "hash": "b1-wg1"},
+    ])
+    repo = _reports(patch_mongo, monkeypatch)
+
+    def chunks(*texts, section="A.1"):
+        return [{"section": section, "paragraph": i, "text": t, "source": "spm.pdf",
+                 "hash": chunk_hash(t)} for i, t in enumerate(texts, start=1)]
+
+    assert repo.sync("spm.pdf", chunks("kept", "old")) == \
+           {"inserted": 1, "moved": 1, "retired": 0, "unchanged": 0}
+    repo.col.update_one({"text": "old"}, {"$set": {"embedding": [0.2]}})
+
+    # re-chunked: "old" gone, "new" in front, "kept" moved down a paragraph
+    assert repo.sync("spm.pdf", chunks("new", "kept")) == \
+           {"inserted": 1, "moved": 1, "retired": 1, "unchanged": 0}
+    docs = {d["text"]: d for d in repo.col.find()}
+    assert set(docs) == {"new", "kept", "wg1 text"}
+    assert docs["kept"]["embedding"] == [0.1] and docs["kept"]["paragraph"] == 2
+    assert "embedding" not in docs["new"]
+
+    assert repo.sync("spm.pdf", chunks("new", "kept"))["unchanged"] == 2
+    assert repo.sync("wg2.pdf", chunks("other"))["retired"] == 0      # other sources untouched
+    assert repo.col.count_documents({}) == 4                          # wg1's unsourced chunk too
+
+    # a fixed section regex re-labels chunks: metadata moves, nothing is re-embedded
+    assert repo.sync("spm.pdf", chunks("new", "kept", section="A")) == \
+           {"inserted": 0, "moved": 2, "retired": 0, "unchanged": 0}
+    assert repo.col.find_one({"text": "kept"})["embedding"] == [0.1]
+
+    assert repo.retire_unsourced() == 1                               # once every source is synced
+    assert repo.col.count_documents({}) == 3
@@ -0,0 +1,57 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from etl.downloader.members import MemberBlob
+from etl.transformer.concurrent import ConcurrentTransformer
+from etl.transformer.scheduler import ScheduleRun, SizeAwareScheduler, plan_tasks
+
+def test_plan_tasks_puts_heaviest_files_first_and_keeps_every_file():
+    blobs = [MemberBlob(Path(f"{n}.csv"), b"x" * n) for n in (5, 400, 30, 1, 90, 200, 7)]
+    tasks = plan_tasks(blobs, workers=2, max_files=3)
+    assert [b.name for _, files in tasks for b in files] == \
+           ["400.csv", "200.csv", "90.csv", "30.csv", "7.csv", "5.csv", "1.csv"]
+    assert all(len(files) <= 3 for _, files in tasks)
+    assert sum(size for size, _ in tasks) == 733
+
+def test_freed_worker_takes_heaviest_pending_task_of_any_run():
+    gate, order = threading.Event(), []
+    def work(name):
+        gate.wait()
+        order.append(name)
+    scheduler = SizeAwareScheduler(ThreadPoolExecutor(1), workers=1)
+    scheduler.slots = 1                      # nothing prefetched: the heap decides
+    try:
+        year_a, year_b = ScheduleRun(), ScheduleRun()
+        futures = [scheduler.submit(work, ("blocker",), 1000, year_a)]
+        time.sleep(0.05)
+        futures += [scheduler.submit(work, ("a-small",), 10, year_a),
+                    scheduler.submit(work, ("b-big",), 500, year_b),
+                    scheduler.submit(work, ("a-mid",), 100, year_a)]
+        gate.set()
+        for f in futures:
+            f.result(timeout=5)
+    finally:
+        scheduler.close()
+    assert order == ["blocker", "b-big", "a-mid", "a-small"]
+    report = year_a.report()
+    assert report.tasks == 3 and len(report.busy) == 1
+
+def test_transform_reports_utilisation_and_tail(tmp_path):
+    from etl.tests.gsod_sample import station_rows, to_csv
+    paths = []
+    for i, n in enumerate((366, 5, 200, 40, 300, 10)):
+        p = tmp_path / f"{i}.csv"
+        p.write_text(to_csv(station_rows(n, seed=i)), encoding="utf-8")
+        paths.append(p)
+    t = ConcurrentTransformer(max_workers=2, chunk_size=2)
+    try:
+        assert len(t.transform(paths)) == 921
+        report = t.last_report
+        assert report.tasks == len(plan_tasks(paths, 2, 2))
+        assert 0 < sum(report.busy.values()) <= 2 * report.wall
+        assert all(0 <= u <= 1 for u in report.utilisation().values())
+        assert 0 <= report.tail <= report.wall
+        assert len(t.transform(paths[:2])) == 371      # the pool survives between calls
+    finally:
+        t.close()
@@ -22,3 +22,72 @@ def test_load_step_logs(caplog):
     step.execute([{"a":1}])
     assert loader.called
     assert "Loading 1 records" in caplog.text
+
+def test_pipeline_stream_mode_chains_generators():
+    from etl.pipeline.pipeline import Pipeline
+    from etl.pipeline.protocols import Step
+
+    class Split(Step):
+        def execute(self, data): return data
+        def stream(self, batches):
+            for batch in batches:
+                for x in batch:
+                    yield [x]
+
+    class Double(Step):
+        def __init__(self): self.seen = []
+        def execute(self, data):
+            self.seen.append(list(data))
+            return [x * 2 for x in data]
+
+    double = Double()
+    p = Pipeline([Split(), double], mode="stream")
+    assert list(p.stream([1, 2, 3])) == [[2], [4], [6]]
+    assert double.seen == [[1], [2], [3]]
+    assert p.run([4]) == [8]
+
+def test_transform_step_stream_bounds_batches():
+    import logging
+    from pathlib import Path
+    from etl.pipeline.transform_step import TransformStep
+
+    class T:
+        def __init__(self): self.calls = []
+        def transform(self, paths):
+            self.calls.append(len(paths))
+            return [{"p": p.name, "i": i} for p in paths for i in range(3)]
+
+    cfg = type("C", (), {"STREAM_FILE_BATCH": 2, "CHUNK_SIZE": 4})()
+    t = T()
+    step = TransformStep(cfg, t, logging.getLogger("test_transform_stream"))
+    paths = [Path(f"{i}.csv") for i in range(5)]
+    out = list(step.stream(iter([paths])))
+    assert t.calls == [2, 2, 1]
+    assert all(len(b) <= 4 for b in out)
+    assert sum(len(b) for b in out) == 15
+
+def test_transform_step_stream_marks_each_streamed_batch():
+    import logging
+    from pathlib import Path
+    from etl.pipeline.transform_step import TransformStep
+
+    class T:
+        def transform(self, paths):
+            raise AssertionError("streaming transformers are streamed")
+        def stream(self, paths):
+            for p in paths:
+                yield [p], [{"p": p.name, "i": i} for i in range(3)]
+
+    class Manifest:
+        def __init__(self): self.marked = []
+        def mark_transformed(self, paths, records): self.marked.append((list(paths), len(records)))
+
+    cfg = type("C", (), {"STREAM_FILE_BATCH": 100, "CHUNK_SIZE": 2})()
+    manifest = Manifest()
+    step = TransformStep(cfg, T(), logging.getLogger("test_transform_stream"), manifest)
+    paths = [Path(f"{i}.csv") for i in range(3)]
+    out = step.stream(iter([paths]))
+    assert next(out) == [{"p": "0.csv", "i": 0}, {"p": "0.csv", "i": 1}]
+    assert manifest.marked == [([paths[0]], 3)]
+    assert sum(len(b) for b in out) == 7
+    assert manifest.marked == [([p], 3) for p in paths]
@@ -25,3 +25,29 @@ def test_extract_only_csv(tmp_path, sample_tar):
     assert len(files) == 1
     assert files[0].name == "foo.csv"
     assert (dest/"foo.csv").read_bytes() == b"hello"
+
+class ForwardOnly(io.RawIOBase):
+    """Like an HTTP body: no seek, no tell."""
+    def __init__(self, data): self._src = io.BytesIO(data)
+    def readable(self): return True
+    def readinto(self, b): return self._src.readinto(b)
+
+def test_extract_stream_from_forward_only_gzip(tmp_path):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, data in [("a.csv", b"1,2"), ("skip.txt", b"x"), ("dir/b.csv", b"3,4")]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    files = TarExtractor().extract_stream(ForwardOnly(buf.getvalue()), tmp_path / "out")
+    assert [f.name for f in files] == ["a.csv", "b.csv"]
+    assert (tmp_path / "out" / "b.csv").read_bytes() == b"3,4"
+
+def test_in_memory_extract_writes_nothing(tmp_path, sample_tar):
+    dest = tmp_path / "out"
+    blobs = TarExtractor(in_memory=True).extract(sample_tar, dest)
+    assert not dest.exists()
+    assert [b.name for b in blobs] == ["foo.csv"]
+    assert blobs[0].parent == dest
+    with blobs[0].open(encoding="utf-8", newline="") as f:
+        assert f.read() == "hello"
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from etl import metrics
+from etl.downloader.engine import DownloadEngine, HTTPStatusError
+from etl.downloader.http_downloader import HTTPDownloader
+from etl.downloader.throttle import AdaptiveLimiter, backoff_delay
+
+def test_limiter_grows_then_backs_off_multiplicatively():
+    lim = AdaptiveLimiter("host", initial=2, max_limit=16)
+    t0 = time.monotonic()
+    for _ in range(6):
+        lim.observe(t0, 200, ttfb=0.01)
+    assert lim.limit == 8                              # slow start: +1 per success
+
+    started = time.monotonic()
+    lim.observe(started, 429)
+    lim.observe(started, 503)                          # same episode: one cut only
+    assert lim.limit == 4
+    assert metrics.gauges()["download_limit.host"] == 4
+
+    for _ in range(4):
+        lim.observe(time.monotonic(), 200, ttfb=0.01)
+    assert 4.9 < lim.limit < 5.1                      # congestion avoidance: +1 per window
+
+def test_rising_latency_cuts_the_limit():
+    lim = AdaptiveLimiter("slow", initial=8, max_limit=64)
+    for _ in range(20):
+        lim.observe(time.monotonic(), 200, ttfb=0.1)
+    before = lim.limit
+    for _ in range(3):
+        lim.observe(time.monotonic(), 200, ttfb=1.0)
+    assert lim.limit <= before / 2
+
+def test_limiter_caps_requests_in_flight():
+    lim = AdaptiveLimiter("cap", initial=2, max_limit=2)
+    peak = 0
+
+    async def one():
+        nonlocal peak
+        await lim.acquire()
+        peak = max(peak, lim.in_flight)
+        await asyncio.sleep(0.01)
+        await lim.release()
+
+    async def many():
+        await asyncio.gather(*(one() for _ in range(10)))
+
+    asyncio.run(many())
+    assert peak == 2
+
+def test_backoff_is_jittered_exponential_and_honours_retry_after():
+    delays = [backoff_delay(attempt, 1.0) for attempt in (1, 2, 3, 4)]
+    for attempt, d in zip((1, 2, 3, 4), delays):
+        assert 2 ** (attempt - 1) / 2 <= d <= 2 ** (attempt - 1)
+    err = HTTPStatusError("u", 429, {"Retry-After": "7"})
+    assert backoff_delay(1, 1.0, err) == 7
+
+def test_downloader_waits_for_retry_after(http_stub, tmp_path):
+    http_stub.add("/2020.tar.gz", b"data")
+    http_stub.fail_next("/2020.tar.gz", 429, retry_after="1")
+    with DownloadEngine(max_connections=4) as engine:
+        dl = HTTPDownloader(base_url=http_stub.url, retry_attempts=2, retry_wait=0, engine=engine)
+        tic = time.perf_counter()
+        assert dl.download_year_tar(2020, tmp_path).read_bytes() == b"data"
+        assert time.perf_counter() - tic >= 1.0        # retry_wait=0, the server said 1s
+        assert engine.limiters[http_stub.url.split("//")[1]].limit < 4
@@ -15,3 +15,48 @@ def test_transformer_parallel(tmp_path):
     paths = [good, bad]
     results = t.transform(paths)
     assert {"x":"good1.csv"} in results
+
+def test_process_mode_matches_thread_mode(tmp_path):
+    from etl import metrics
+    from etl.tests.gsod_sample import DIRTY_ROWS, station_rows, to_csv
+    paths = []
+    for i in range(5):
+        p = tmp_path / f"{i}.csv"
+        p.write_text(to_csv(station_rows(40, seed=i) + DIRTY_ROWS), encoding="utf-8")
+        paths.append(p)
+    def key(r):
+        return (r["station"], r["record_date"])
+    threads = ConcurrentTransformer(max_workers=2, chunk_size=2).transform(paths)
+    before = metrics.counters().get("rows_rejected", 0)
+    t = ConcurrentTransformer(max_workers=2, chunk_size=2, use_processes=True)
+    try:
+        procs = t.transform(paths)
+    finally:
+        t.close()
+    assert sorted(procs, key=key) == sorted(threads, key=key)
+    # counters bumped inside the workers reach the parent
+    assert metrics.counters()["rows_rejected"] - before == 5 * (40 + len(DIRTY_ROWS)) - len(threads)
+
+def test_stream_yields_as_tasks_finish_with_bounded_lookahead(tmp_path):
+    class CountingReader:
+        def __init__(self): self.seen = []
+        def read(self, path):
+            self.seen.append(path.name)
+            return [{"x": path.name}]
+    paths = []
+    for i in range(10):
+        p = tmp_path / f"{i}.csv"
+        p.write_text("x" * (i + 1))
+        paths.append(p)
+    t = ConcurrentTransformer(max_workers=1, chunk_size=1)
+    t.reader = CountingReader()
+    try:
+        stream = t.stream(paths)
+        files, first = next(stream)
+        assert list(first) == [{"x": files[0].name}]
+        # two tasks per worker scheduled ahead, one more once the first came back
+        assert len(t.reader.seen) <= 3
+        rest = [r for _, rs in stream for r in rs]
+    finally:
+        t.close()
+    assert sorted(r["x"] for r in [*first, *rest]) == sorted(p.name for p in paths)
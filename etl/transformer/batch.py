@@ -0,0 +1,331 @@
+# etl/transformer/batch.py
+"""
+Transformed records held column by column.
+
+A GSOD row as a 36-key dict costs a few KB of Python heap; in a
+RecordBatch it is one typed array slot per column. ConcurrentTransformer
+hands RecordBatches on, TransformStep and BatchLoader slice them, and
+dicts only come back when the loader encodes the documents it inserts.
+
+Each column is stored by the kind its values share:
+
+• f8   – float64 values plus a null bitmap (None ↔ set bit, NaN stays NaN)
+• int  – the narrowest signed integer array that holds every value
+         (GSOD attribute counts take a byte), plus a null bitmap
+• b1   – bits packed eight to a byte
+• date – proleptic ordinals as int32
+• dict – distinct values plus the narrowest unsigned codes: station ids,
+         names and anything else repeating per station file
+• obj  – the values as they are, when they cannot be hashed
+
+Iterating gives back dicts equal to the records it was built from, types
+and key order included. Slices share the parent's arrays, and a batch
+pickles as its arrays, which is how process-mode workers return results.
+`to_arrow` / `from_arrow` convert to and from pyarrow (an optional
+dependency, imported only there) buffer by buffer.
+"""
+from collections.abc import Sequence
+from datetime import date, datetime
+from itertools import repeat
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+Column = Tuple[Any, ...]
+
+_EPOCH = date(1970, 1, 1).toordinal()
+_BLOCK = 1024           # rows materialised at a time while iterating
+
+
+def _nulls(values: List[Any], filled: np.ndarray) -> np.ndarray:
+    """Mask of the None entries, given `values` already converted with None → NaN."""
+    nulls = np.isnan(filled)
+    if nulls.any():
+        maybe = np.flatnonzero(nulls)
+        nulls[maybe] = [values[i] is None for i in maybe.tolist()]
+    return nulls
+
+
+def _bitmap(mask: np.ndarray) -> Optional[np.ndarray]:
+    return np.packbits(mask) if mask.any() else None
+
+
+def _unpack(bits: Optional[np.ndarray], n: int) -> np.ndarray:
+    return np.zeros(n, dtype=bool) if bits is None else np.unpackbits(bits, count=n).view(bool)
+
+
+def _slice_bits(bits: Optional[np.ndarray], n: int, start: int, stop: int) -> Optional[np.ndarray]:
+    if bits is None:
+        return None
+    if start % 8 == 0:
+        return bits[start // 8 : (stop + 7) // 8]       # a view; bits past `stop` are never read
+    return np.packbits(np.unpackbits(bits, count=n)[start:stop])
+
+
+def _narrow(values: np.ndarray) -> np.ndarray:
+    """`values` (integers) in the smallest signed dtype that holds them all."""
+    if not len(values):
+        return values.astype(np.int8)
+    lo, hi = int(values.min()), int(values.max())
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def _codes(codes: Any, size: int) -> np.ndarray:
+    """Dictionary codes in the smallest unsigned dtype that indexes `size` uniques."""
+    dtype = np.uint8 if size <= 1 << 8 else np.uint16 if size <= 1 << 16 else np.uint32
+    return np.asarray(codes, dtype=dtype)
+
+
+def _encode(values: List[Any]) -> Column:
+    kinds = set(map(type, values))
+    nullable = type(None) in kinds
+    kinds.discard(type(None))
+    if kinds == {float}:
+        filled = np.array(values, dtype=np.float64)
+        return ("f8", filled, _bitmap(_nulls(values, filled)))
+    if kinds == {int}:
+        try:
+            if nullable:
+                boxed = np.array(values, dtype=object)
+                nulls = np.equal(boxed, None)
+                boxed[nulls] = 0
+                return ("int", _narrow(boxed.astype(np.int64)), np.packbits(nulls))
+            return ("int", _narrow(np.array(values, dtype=np.int64)), None)
+        except OverflowError:
+            pass                            # beyond int64: keep the Python ints
+    if kinds == {bool} and not nullable:
+        return ("b1", np.packbits(np.array(values, dtype=bool)))
+    if kinds == {date} and not nullable:
+        return ("date", np.fromiter(map(date.toordinal, values), dtype=np.int32, count=len(values)))
+    try:
+        if len(kinds) > 1:
+            # 1 == 1.0 == True as dict keys: tell them apart by type
+            index: Dict[Any, int] = {}
+            codes = [index.setdefault((type(v), v), len(index)) for v in values]
+            uniques = [v for _, v in index]
+        else:
+            uniques = list(dict.fromkeys(values))
+            codes = list(map({v: i for i, v in enumerate(uniques)}.__getitem__, values))
+    except TypeError:                       # unhashable values: keep them as they are
+        return ("obj", list(values))
+    return ("dict", uniques, _codes(codes, len(uniques)))
+
+
+def _decode(n: int, column: Column) -> List[Any]:
+    kind = column[0]
+    if kind in ("f8", "int"):
+        out = column[1].tolist()
+        if column[2] is not None:
+            for i in np.flatnonzero(_unpack(column[2], n)).tolist():
+                out[i] = None
+        return out
+    if kind == "b1":
+        return _unpack(column[1], n).tolist()
+    if kind == "date":
+        return (column[1].astype(np.int64) - _EPOCH).astype("datetime64[D]").tolist()
+    if kind == "dict":
+        return list(map(column[1].__getitem__, column[2].tolist()))
+    return list(column[1])
+
+
+def _slice(n: int, column: Column, start: int, stop: int) -> Column:
+    kind = column[0]
+    if kind in ("f8", "int"):
+        return (kind, column[1][start:stop], _slice_bits(column[2], n, start, stop))
+    if kind == "b1":
+        return (kind, _slice_bits(column[1], n, start, stop))
+    if kind == "dict":
+        return (kind, column[1], column[2][start:stop])
+    return (kind, column[1][start:stop])
+
+
+def _concat(parts: List[Tuple[int, Column]]) -> Column:
+    """One column of several batches; falls back to re-encoding when their kinds differ."""
+    kinds = {column[0] for _, column in parts}
+    kind = kinds.pop() if len(kinds) == 1 else None
+    if kind in ("f8", "int"):
+        values = np.concatenate([column[1] for _, column in parts])   # ints widen as needed
+        if all(column[2] is None for _, column in parts):
+            return (kind, values, None)
+        return (kind, values, np.packbits(np.concatenate([_unpack(c[2], n) for n, c in parts])))
+    if kind == "b1":
+        return (kind, np.packbits(np.concatenate([_unpack(c[1], n) for n, c in parts])))
+    if kind == "date":
+        return (kind, np.concatenate([column[1] for _, column in parts]))
+    if kind == "dict":
+        index: Dict[Any, int] = {}
+        codes = []
+        for _, (_, uniques, part) in parts:
+            remap = np.array([index.setdefault((type(v), v), len(index)) for v in uniques], dtype=np.int64)
+            codes.append(remap[part] if len(remap) else part)
+        return (kind, [v for _, v in index], _codes(np.concatenate(codes), len(index)))
+    return _encode([v for n, column in parts for v in _decode(n, column)])
+
+
+def _to_arrow(pa: Any, n: int, column: Column) -> Any:
+    kind = column[0]
+    if kind in ("f8", "int"):
+        # ints go out at full width, so every file of a dataset shares one schema
+        values = column[1] if kind == "f8" else column[1].astype(np.int64)
+        return pa.array(values, mask=_unpack(column[2], n) if column[2] is not None else None)
+    if kind == "b1":
+        return pa.array(_unpack(column[1], n))
+    if kind == "date":
+        return pa.array((column[1].astype(np.int64) - _EPOCH).astype("datetime64[D]"))
+    if kind == "dict":
+        uniques, codes = column[1], column[2]
+        if len({type(v) for v in uniques if v is not None}) > 1:
+            raise ValueError("a column mixing value types")
+        if None in uniques:
+            # Arrow keeps nulls in the indices, not among the dictionary values
+            gone = uniques.index(None)
+            nulls = codes == gone
+            codes = np.where(codes > gone, codes - 1, codes)
+            uniques = uniques[:gone] + uniques[gone + 1 :]
+            indices = pa.array(codes.astype(np.int32), mask=nulls)
+        else:
+            indices = pa.array(codes.astype(np.int32))
+        return pa.DictionaryArray.from_arrays(indices, pa.array(uniques))
+    return pa.array(column[1])
+
+
+def _from_arrow(pa: Any, array: Any) -> Column:
+    """The column RecordBatch would have built from `array.to_pylist()`, from its buffers."""
+    kind, nulls = array.type, array.null_count
+    if pa.types.is_dictionary(kind) or pa.types.is_string(kind) or pa.types.is_large_string(kind):
+        encoded = array if pa.types.is_dictionary(kind) else array.dictionary_encode()
+        uniques = encoded.dictionary.to_pylist()
+        if nulls:
+            uniques.append(None)
+        codes = encoded.indices.fill_null(len(uniques) - 1).to_numpy()
+        if len(uniques) == 1 or len(set(map(type, uniques))) == 1:
+            # only distinct values Python can tell apart make a valid dictionary
+            if len(dict.fromkeys(uniques)) == len(uniques):
+                return ("dict", uniques, _codes(codes, len(uniques)))
+    elif pa.types.is_floating(kind):
+        mask = array.is_null().to_numpy(zero_copy_only=False) if nulls else None
+        values = array.to_numpy(zero_copy_only=False).astype(np.float64)
+        return ("f8", values, None if mask is None else np.packbits(mask))
+    elif pa.types.is_integer(kind) and not pa.types.is_uint64(kind):
+        mask = array.is_null().to_numpy(zero_copy_only=False) if nulls else None
+        values = array.fill_null(0).to_numpy().astype(np.int64) if nulls else array.to_numpy().astype(np.int64)
+        return ("int", _narrow(values), None if mask is None else np.packbits(mask))
+    elif pa.types.is_boolean(kind) and not nulls:
+        return ("b1", np.packbits(array.to_numpy(zero_copy_only=False)))
+    elif pa.types.is_date32(kind) and not nulls:
+        days = array.cast(pa.int32()).to_numpy()
+        return ("date", (days.astype(np.int64) + _EPOCH).astype(np.int32))
+    return _encode(array.to_pylist())
+
+
+class RecordBatch(Sequence):
+    """
+    Records sharing their keys, stored as one typed column per key (see
+    module docstring). A read-only sequence of dicts: `len`, `batch[i]`,
+    iteration and `in` work as on a list; `batch[i:j]` is a RecordBatch.
+    """
+    __slots__ = ("n", "keys", "columns")
+
+    def __init__(self, n: int, keys: List[str], columns: List[Column]):
+        self.n = n
+        self.keys = keys
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]]) -> "RecordBatch":
+        """Raises ValueError unless every record has the first one's keys."""
+        records = records if isinstance(records, list) else list(records)
+        keys = list(records[0]) if records else []
+        try:
+            if any(n != len(keys) for n in map(len, records)):
+                raise KeyError
+            columns = [_encode(list(map(itemgetter(k), records))) for k in keys]
+        except KeyError:
+            raise ValueError("records do not share their keys") from None
+        return cls(len(records), keys, columns)
+
+    @classmethod
+    def concat(cls, batches: Iterable["RecordBatch"]) -> "RecordBatch":
+        """One batch of all rows, in order; raises ValueError if their keys differ."""
+        batches = [b for b in batches if b.n]
+        if not batches:
+            return cls(0, [], [])
+        if len(batches) == 1:
+            return batches[0]
+        keys = batches[0].keys
+        if any(b.keys != keys for b in batches):
+            raise ValueError("batches do not share their keys")
+        columns = [_concat([(b.n, b.columns[j]) for b in batches]) for j in range(len(keys))]
+        return cls(sum(b.n for b in batches), list(keys), columns)
+
+    @classmethod
+    def from_arrow(cls, table: Any) -> "RecordBatch":
+        """A pyarrow Table or RecordBatch as a RecordBatch, column by column."""
+        import pyarrow as pa
+        columns = [
+            _from_arrow(pa, c.combine_chunks() if isinstance(c, pa.ChunkedArray) else c)
+            for c in table.columns
+        ]
+        return cls(table.num_rows, list(table.schema.names), columns)
+
+    def to_arrow(self) -> Any:
+        """The batch as a pyarrow Table; raises ValueError for values Arrow cannot type."""
+        import pyarrow as pa
+        try:
+            arrays = [_to_arrow(pa, self.n, c) for c in self.columns]
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError, ValueError) as e:
+            raise ValueError(f"RecordBatch does not fit an Arrow schema: {e}") from e
+        return pa.Table.from_arrays(arrays, names=list(self.keys))
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.n)
+            if step != 1:
+                raise ValueError("RecordBatch slices must be contiguous")
+            stop = max(start, stop)
+            return RecordBatch(
+                stop - start, self.keys, [_slice(self.n, c, start, stop) for c in self.columns]
+            )
+        i = index + self.n if index < 0 else index
+        if not 0 <= i < self.n:
+            raise IndexError("RecordBatch index out of range")
+        return self[i : i + 1].to_records()[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        # a block of dicts at a time, so iterating never holds the whole batch as dicts
+        if self.n <= _BLOCK:
+            yield from self.to_records()
+            return
+        for start in range(0, self.n, _BLOCK):
+            yield from self[start : start + _BLOCK].to_records()
+
+    def __repr__(self) -> str:
+        return f"RecordBatch({self.n} rows × {len(self.keys)} columns)"
+
+    def column(self, key: str) -> List[Any]:
+        """Every row's value for `key`, as Python objects."""
+        return _decode(self.n, self.columns[self.keys.index(key)])
+
+    def datetimes(self, key: str) -> List[datetime]:
+        """A date column as midnight datetimes (what BSON stores), straight from the ordinals."""
+        column = self.columns[self.keys.index(key)]
+        if column[0] != "date":
+            raise ValueError(f"{key} is not a column of dates")
+        days = (column[1].astype(np.int64) - _EPOCH).astype("datetime64[D]")
+        return days.astype("datetime64[us]").tolist()
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """All rows as dicts, keys in the original order."""
+        if not self.keys:
+            return [{} for _ in range(self.n)]
+        values = [_decode(self.n, c) for c in self.columns]
+        # map() keeps the per-row dict construction in C
+        return list(map(dict, map(zip, repeat(self.keys), zip(*values))))
@@ -1,5 +1,8 @@
 import logging
-from typing import Mapping, Any, Dict
+from datetime import date
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from pydantic import TypeAdapter, ValidationError
 from .converter import (
     FloatConverter,
     AttributesConverter,
@@ -11,14 +14,232 @@ from .converter import (
     PrecipSnowConverter,
 )
 from .models import GSODRecord
+from .parser import FRSHTT_FLAGS, frshtt_flags
+from .quarantine import RowError
+
+VALIDATION_TIERS = ("strict", "batch", "sampled")
+
+# header names the model reads: every alias, and every field name (populate_by_name)
+_MODEL_KEYS = frozenset(
+    key
+    for name, info in GSODRecord.model_fields.items() if not name.startswith("frshtt_")
+    for key in (name, info.alias or name)
+)
+_FLAG_KEYS = tuple(f"frshtt_{name}" for name in FRSHTT_FLAGS)
+_NAMES = tuple(GSODRecord.model_fields)
+_DATE = _NAMES.index("record_date")
+_RECORDS = TypeAdapter(List[GSODRecord])
+
+Reject = Callable[[Sequence[Optional[str]], Exception], None]
+
+class SchemaDriftError(ValueError):
+    """A sampled row the model types differently from the unvalidated build: abort the file."""
+
+def _iso_date(value: Any) -> date:
+    # the one field the converters leave as text; anything but YYYY-MM-DD is pydantic's call
+    if isinstance(value, str) and len(value) == 10 and value.isascii() and value[4] == value[7] == "-":
+        return date.fromisoformat(value)
+    raise ValueError(f"not a YYYY-MM-DD date: {value!r}")
+
+def _same(a: Mapping[str, Any], b: Mapping[str, Any]) -> bool:
+    # == alone would let 1 == 1.0, True == 1 and nan != nan decide
+    return list(a) == list(b) and all(
+        type(x) is type(y) and (x == y or (x != x and y != y))
+        for x, y in zip(a.values(), b.values())
+    )
+
+class RowPlan:
+    """
+    PydanticRecordBuilder compiled for one file header. Which columns the
+    model reads and which converter each needs is resolved once, so a
+    csv.reader row goes straight to a positional pick and a tuple of
+    converter callables – no DictReader dict, no converter scan per field.
+
+    Rows behave as DictReader + CsvParser + `build` treat them: duplicate
+    columns keep the last, short rows read None for the missing columns and
+    long rows are rejected.
+
+    `build` lazily yields a file's records under one validation tier:
+
+    • strict  – GSODRecord.model_validate + model_dump per row
+    • batch   – one TypeAdapter(List[GSODRecord]) call per `batch_size` rows;
+                rows it refuses are validated alone for their error
+    • sampled – every `stride`-th row (the first included) strictly, the rest
+                straight from the converted values; a sampled row the two
+                disagree on is schema drift and raises SchemaDriftError
+    """
+    __slots__ = ("keys", "converters", "width", "frshtt", "validation", "stride",
+                 "batch_size", "_pick", "_unchecked")
+
+    def __init__(
+        self,
+        header: Sequence[str],
+        registry: ConverterRegistry,
+        validation: str = "strict",
+        sample_rate: float = 0.01,
+        batch_size: int = 4096,
+    ) -> None:
+        columns = {key: i for i, key in enumerate(header) if key in _MODEL_KEYS}
+        flags = [i for i, key in enumerate(header) if key == "FRSHTT"]
+        self.keys: Tuple[str, ...] = (*columns, *_FLAG_KEYS)
+        self.converters: Tuple[Callable[[Any], Any], ...] = tuple(map(registry.resolve, columns))
+        self.width = len(header)
+        self.frshtt: Optional[int] = flags[-1] if flags else None
+        self.validation = validation
+        self.stride = max(1, round(1 / sample_rate))
+        self.batch_size = batch_size
+        positions = list(columns.values())
+        if len(positions) > 1:
+            self._pick: Callable[[Sequence[Any]], Sequence[Any]] = itemgetter(*positions)
+        else:
+            self._pick = lambda row: [row[i] for i in positions]
+
+        # converted values → model order, the key pydantic would read winning (alias first)
+        slots = {key: i for i, key in enumerate(self.keys)}
+        order = [
+            slots.get(info.alias or name, slots.get(name))
+            for name, info in GSODRecord.model_fields.items()
+        ]
+        self._unchecked: Optional[Callable[[Sequence[Any]], Sequence[Any]]] = (
+            itemgetter(*order) if None not in order else None
+        )
+
+    def __call__(self, row: Sequence[Optional[str]]) -> Dict[str, Any]:
+        return self._validate(self._values(row))
+
+    def build(self, rows: Iterable[Sequence[Optional[str]]], reject: Reject) -> Iterator[Dict[str, Any]]:
+        """Yield the records of `rows` under this plan's tier; `reject(row, error)` hears of every refused row."""
+        if self.validation == "batch":
+            return self._build_batch(rows, reject)
+        if self.validation == "sampled" and self._unchecked is not None:
+            return self._build_sampled(rows, reject)
+        return self._build_strict(rows, reject)
+
+    # ------------------------------------------------------------------ #
+    def _values(self, row: Sequence[Optional[str]]) -> List[Any]:
+        if len(row) != self.width:
+            if len(row) > self.width:
+                raise RowError("row", "too_many_fields", f"{len(row)} fields under a {self.width}-column header")
+            row = [*row, *[None] * (self.width - len(row))]
+        picked = self._pick(row)
+        try:
+            values: List[Any] = [conv(val) for conv, val in zip(self.converters, picked)]
+        except Exception as e:
+            raise self._fault(picked, e) from e
+        values += frshtt_flags(row[self.frshtt] if self.frshtt is not None else None)
+        return values
+
+    def _fault(self, picked: Sequence[Any], error: Exception) -> Exception:
+        """The RowError naming the first column whose converter fails (a rejected row only)."""
+        for key, conv, val in zip(self.keys, self.converters, picked):
+            try:
+                conv(val)
+            except Exception as e:
+                return RowError(key, "conversion_error", str(e))
+        return error
+
+    def _validate(self, values: List[Any]) -> Dict[str, Any]:
+        return GSODRecord.model_validate(dict(zip(self.keys, values))).model_dump()
+
+    def _build(self, values: List[Any]) -> Dict[str, Any]:
+        """The record without pydantic: converted values as they are, the date parsed."""
+        fields = list(self._unchecked(values))
+        fields[_DATE] = _iso_date(fields[_DATE])
+        return dict(zip(_NAMES, fields))
+
+    def _build_strict(self, rows: Iterable[Sequence[Optional[str]]], reject: Reject) -> Iterator[Dict[str, Any]]:
+        for row in rows:
+            try:
+                record = self._validate(self._values(row))
+            except Exception as e:
+                reject(row, e)
+                continue
+            yield record
+
+    def _build_batch(self, rows: Iterable[Sequence[Optional[str]]], reject: Reject) -> Iterator[Dict[str, Any]]:
+        inputs: List[Dict[str, Any]] = []
+        raws: List[Sequence[Optional[str]]] = []
+        for row in rows:
+            try:
+                inputs.append(dict(zip(self.keys, self._values(row))))
+                raws.append(row)
+            except Exception as e:
+                reject(row, e)
+            if len(inputs) >= self.batch_size:
+                yield from self._validate_many(inputs, raws, reject)
+                inputs, raws = [], []
+        if inputs:
+            yield from self._validate_many(inputs, raws, reject)
+
+    def _validate_many(
+        self, inputs: List[Dict[str, Any]], raws: List[Sequence[Optional[str]]], reject: Reject
+    ) -> List[Dict[str, Any]]:
+        try:
+            return _RECORDS.dump_python(_RECORDS.validate_python(inputs))
+        except ValidationError as e:
+            bad = {err["loc"][0] for err in e.errors()}
+        for i in sorted(bad):
+            try:
+                GSODRecord.model_validate(inputs[i])
+            except Exception as e:
+                reject(raws[i], e)
+        keep = [rec for i, rec in enumerate(inputs) if i not in bad]
+        return _RECORDS.dump_python(_RECORDS.validate_python(keep))
+
+    def _build_sampled(self, rows: Iterable[Sequence[Optional[str]]], reject: Reject) -> Iterator[Dict[str, Any]]:
+        stride = self.stride
+        for n, row in enumerate(rows):
+            try:
+                values = self._values(row)
+            except Exception as e:
+                reject(row, e)
+                continue
+            if n % stride:
+                try:
+                    record = self._build(values)
+                except Exception:
+                    pass            # nothing to vouch for it: validate this one
+                else:
+                    yield record
+                    continue
+            try:
+                strict: Optional[Dict[str, Any]] = self._validate(values)
+            except Exception as e:
+                strict, error = None, e
+            if not n % stride:
+                try:
+                    fast: Optional[Dict[str, Any]] = self._build(values)
+                except Exception:
+                    fast = None
+                if fast is not None and (strict is None or not _same(strict, fast)):
+                    raise SchemaDriftError(
+                        f"sampled row {n + 1}: unvalidated build {fast!r} "
+                        f"vs model {strict if strict is not None else error!r}"
+                    )
+            if strict is None:
+                reject(row, error)
+            else:
+                yield strict
 
 class PydanticRecordBuilder:
     """
     1) Normalize & convert raw fields via ConverterRegistry.
     2) Validate & coerce with Pydantic GSODRecord.
+
+    `validation` picks the tier compiled row plans run under (see RowPlan);
+    `build` on a DictReader row is always strict.
     """
-    def __init__(self, logger: logging.Logger) -> None:
+    def __init__(
+        self,
+        logger: logging.Logger,
+        validation: str = "strict",
+        sample_rate: float = 0.01,
+    ) -> None:
+        if validation not in VALIDATION_TIERS:
+            raise ValueError(f"validation must be one of {VALIDATION_TIERS}, got {validation!r}")
         self.logger = logger.getChild(self.__class__.__name__)
+        self.validation = validation
+        self.sample_rate = sample_rate
         self.registry = ConverterRegistry([
             FloatConverter(),
             AttributesConverter(),
@@ -30,9 +251,18 @@ class PydanticRecordBuilder:
         ])
 
     def build(self, raw: Mapping[str, str]) -> Dict[str, Any]:
-        converted: Dict[str, Any] = {
-            fld: self.registry.convert(fld, raw_val)
-            for fld, raw_val in raw.items()
-        }
+        if None in raw:
+            # DictReader's restkey: more fields than the header names
+            raise RowError("row", "too_many_fields", f"{len(raw[None])} fields beyond the header")
+        converted: Dict[str, Any] = {}
+        for fld, raw_val in raw.items():
+            try:
+                converted[fld] = self.registry.convert(fld, raw_val)
+            except Exception as e:
+                raise RowError(str(fld), "conversion_error", str(e)) from e
         record = GSODRecord.model_validate(converted)
         return record.model_dump()
+
+    def compile(self, header: Sequence[str]) -> RowPlan:
+        """`build` for rows of a file with this header, as csv.reader lists."""
+        return RowPlan(header, self.registry, self.validation, self.sample_rate)
@@ -1,21 +1,58 @@
 import logging
-from typing import List, Mapping, Any
+from typing import Dict, List, Mapping, Any, Optional, Tuple
 
+from etl import metrics
 from etl.transformer.protocols import Transformer
+from etl.transformer.quarantine import DeadLetter, Quarantine, RejectLog, RowError, describe
+
+# document field for well-known World Bank indicators; others use their code
+INDICATOR_FIELDS: Dict[str, str] = {
+    "SP.POP.TOTL":          "population",
+    "NY.GDP.MKTP.CD":       "gdpUsd",
+    "EN.GHG.CH4.MT.CE.AR5": "ch4Mt",
+}
+
+
+# the field every doc must have: the primary (CO₂) indicator's
+PRIMARY_FIELD = "co2Mt"
+
+
+def field_for(indicator: str) -> str:
+    """Mongo field name for an indicator (dots are not allowed in field names)."""
+    return INDICATOR_FIELDS.get(indicator, indicator.replace(".", "_"))
+
 
 class CO2Transformer(Transformer):
     """
     Turn raw World Bank JSON records into flat Mongo docs:
       { country, iso3, year, co2Mt }
-    Robustly skips malformed or missing‐value records, logging each.
+    Skips missing-value records, and malformed ones: those are counted per
+    field and error type, sampled into the log and, with a `quarantine`,
+    filed per year and country as dead letters.
+
+    With `fields` ({indicator code: doc field}) records of several
+    indicators are merged into one wide doc per (iso3, year):
+      { country, iso3, year, co2Mt, population, gdpUsd, ... }
+    A country-year without a CO₂ value yields no doc at all, whatever
+    other indicators it has: every emissions doc carries `co2Mt`.
     """
-    def __init__(self, logger: logging.Logger = None):
+    def __init__(
+        self,
+        logger: logging.Logger = None,
+        fields: Optional[Mapping[str, str]] = None,
+        quarantine: Optional[Quarantine] = None,
+    ):
         self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.fields = dict(fields or {})
+        self.quarantine = quarantine
+        self.rejects = RejectLog(self.logger)
 
     def transform(self, records: List[Mapping[str, Any]]) -> List[Mapping[str, Any]]:
         total = len(records)
         self.logger.debug(f"Starting CO₂ transform for {total} raw records")
-        out: List[Mapping[str, Any]] = []
+        docs: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        letters: List[DeadLetter] = []
+        reasons: Dict[str, int] = {}
         skipped = 0
 
         for idx, rec in enumerate(records, start=1):
@@ -27,8 +64,10 @@ class CO2Transformer(Transformer):
                 value   = rec.get("value")
 
                 # check presence
-                if country is None or iso3 is None or date_str is None:
-                    raise KeyError("missing country / iso3 / date")
+                for name, present in (("country", country), ("countryiso3code", iso3), ("date", date_str)):
+                    if present is None:
+                        raise RowError(name, "missing", f"no {name}")
+                field = self._field(rec)
 
                 # skip empty data
                 if value is None:
@@ -37,23 +76,72 @@ class CO2Transformer(Transformer):
                     continue
 
                 # cast types
-                year  = int(date_str)
-                co2Mt = float(value)
-
-                out.append({
+                year  = _cast(int, "date", date_str)
+                amount = _cast(float, "value", value)
+                doc = docs.setdefault((iso3, year), {
                     "country": country,
                     "iso3":     iso3,
                     "year":     year,
-                    "co2Mt":    co2Mt,
                 })
+                doc[field] = amount
 
             except Exception as exc:
                 skipped += 1
-                # include the record index so you can trace back easily
-                self.logger.warning(
-                    f"[{idx}/{total}] skipping bad record: {exc!r}; record={rec!r}"
-                )
+                # the record index lets you trace back to the raw page
+                name, code = self.rejects(f"record {idx}/{total}", exc)
+                reasons[f"{name}/{code}"] = reasons.get(f"{name}/{code}", 0) + 1
+                if self.quarantine is not None:
+                    letters.append(_letter(rec, exc, name, code))
 
-        kept = len(out)
-        self.logger.info(f"CO₂ transform complete: kept {kept}/{total}, skipped {skipped}")
+        if self.quarantine is not None:
+            # every year transformed replaces its letters, none left meaning none stay
+            sources = {_source(_letter_year(rec)) for rec in records} | {_source("unknown")}
+            metrics.incr("rows_quarantined", self.quarantine.write(letters, sources))
+        out = [doc for doc in docs.values() if PRIMARY_FIELD in doc]
+        if len(out) < len(docs):
+            self.logger.info(f"Dropped {len(docs) - len(out)} country-years without {PRIMARY_FIELD}")
+        rejected = "".join(f", {k} ×{v}" for k, v in sorted(reasons.items(), key=lambda kv: -kv[1]))
+        self.logger.info(
+            f"CO₂ transform complete: {total - skipped}/{total} values into "
+            f"{len(out)} country-year docs, skipped {skipped}{rejected}"
+        )
         return out
+
+    def _field(self, rec: Mapping[str, Any]) -> str:
+        if not self.fields:
+            return PRIMARY_FIELD
+        indicator = (rec.get("indicator") or {}).get("id")
+        if indicator is None and len(self.fields) == 1:
+            return next(iter(self.fields.values()))
+        if indicator not in self.fields:
+            raise RowError("indicator", "unexpected", f"unexpected indicator {indicator!r}")
+        return self.fields[indicator]
+
+
+def _cast(kind: type, name: str, value: Any) -> Any:
+    try:
+        return kind(value)
+    except (TypeError, ValueError) as e:
+        raise RowError(name, "conversion_error", str(e)) from e
+
+
+def _letter(rec: Any, exc: Exception, name: str, code: str) -> DeadLetter:
+    """A World Bank record's letter, filed under its year and country."""
+    year = _letter_year(rec)
+    group = rec.get("countryiso3code") if isinstance(rec, Mapping) else None
+    return DeadLetter(
+        year=year,
+        group=str(group or "unknown"),
+        source=_source(year),
+        field=name, code=code, error=describe(exc), raw=rec,
+    )
+
+
+def _letter_year(rec: Any) -> str:
+    date = str(rec.get("date") or "") if isinstance(rec, Mapping) else ""
+    return date[:4] if date[:4].isdigit() else "unknown"
+
+
+def _source(year: str) -> str:
+    # one source per year: a run covering some years leaves the others' letters alone
+    return f"worldbank/{year}"
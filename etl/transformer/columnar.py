@@ -0,0 +1,432 @@
+# etl/transformer/columnar.py
+"""
+Vectorized GSOD reader.
+
+Reads a whole station file at once, turns every column into a NumPy array
+and applies sentinel masking, flag stripping, unit conversion and FRSHTT
+decoding as array operations, then zips the columns back into the same dicts
+`PydanticRecordBuilder.build` returns.
+
+Two front ends feed the array rules:
+
+• the fast one handles files laid out like NOAA's – printable ASCII, every
+  field quoted, the same number of fields on every line – and cuts the
+  columns straight out of the raw bytes at the quote positions, without
+  csv.reader or a Python string per value;
+• anything else goes through csv.reader, one NumPy unicode array per column.
+
+The output is identical to CsvReader + PydanticRecordBuilder: each array rule
+reproduces its scalar converter exactly on printable ASCII and flags the
+values it cannot vouch for – non-ASCII or control characters, a latitude
+like "1e3", an impossible date, a row with the wrong number of fields. Those
+rows are built by the scalar builder one by one, and a file whose header the
+array rules do not cover goes to CsvReader whole.
+"""
+import csv
+import io
+import logging
+from itertools import groupby, repeat
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from etl import metrics
+from etl.downloader.members import MemberBlob
+from .builder import PydanticRecordBuilder
+from .models import GSODRecord
+from .parser import CsvParser
+from .quarantine import Quarantine
+from .reader import CsvReader
+
+# model field name → CSV column, in model_dump() order
+_FIELDS: List[Tuple[str, str]] = [
+    (name, info.alias or name) for name, info in GSODRecord.model_fields.items()
+]
+_NAMES = [name for name, _ in _FIELDS]
+_COLUMNS = [alias for _, alias in _FIELDS if not alias.startswith("frshtt_")]
+_ZERO, _NINE, _DOT, _MINUS, _COMMA, _QUOTE, _NL = (ord(ch) for ch in '09.-,"\n')
+_POW10 = 10.0 ** np.arange(23)
+
+Rule = Callable[[np.ndarray], Tuple[List[Any], np.ndarray]]
+
+
+def _codes(arr: np.ndarray) -> np.ndarray:
+    """(rows, width) code points of a bytes or unicode array; 0 pads short values."""
+    unit = np.dtype(np.uint8 if arr.dtype.kind == "S" else np.uint32)
+    width = arr.dtype.itemsize // unit.itemsize
+    if width == 0:
+        return np.zeros((len(arr), 1), dtype=unit)
+    return np.ascontiguousarray(arr).view(unit).reshape(len(arr), width)
+
+
+def _printable(arr: np.ndarray) -> np.ndarray:
+    """Rows whose value is printable ASCII only (where str.strip() ≡ stripping spaces)."""
+    c = _codes(arr)
+    return ~((c != 0) & ((c < 32) | (c > 126))).any(axis=1)
+
+
+def _numeric(arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    float(strip_flag(s)) for a whole column, computed from the code points:
+    the kept digits form an integer mantissa m and the digits after the dot
+    a scale k, and m / 10**k is exactly what float() returns while both are
+    exact doubles (m < 2**53, k <= 22) – IEEE division rounds correctly.
+
+    Returns (values, parsed, exact): `parsed` is False where Python would
+    raise ValueError, `exact` False for mantissas too long for the shortcut.
+    """
+    n = len(arr)
+    mantissa = np.zeros(n)
+    if not n:
+        return mantissa, mantissa.astype(bool), mantissa.astype(bool)
+    digits, dots, minuses, scale = (np.zeros(n, dtype=np.int64) for _ in range(4))
+    seen, minus_first = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+    # one pass per character position, Horner-style, over whole columns
+    with np.errstate(over="ignore", invalid="ignore"):      # long digit runs: not `exact`
+        for col in np.ascontiguousarray(_codes(arr).T):
+            digit = col - _ZERO                 # unsigned: anything below "0" wraps high
+            is_digit = digit <= 9
+            is_dot, is_minus = col == _DOT, col == _MINUS
+            minus_first |= is_minus & ~seen
+            seen |= is_digit | is_dot | is_minus
+            mantissa = np.where(is_digit, mantissa * 10 + digit, mantissa)
+            scale += is_digit & (dots > 0)
+            digits += is_digit
+            dots += is_dot
+            minuses += is_minus
+        values = mantissa / _POW10[np.minimum(scale, 22)]
+    parsed = (digits > 0) & (dots <= 1) & ((minuses == 0) | ((minuses == 1) & minus_first))
+    return np.where(minuses > 0, -values, values), parsed, digits <= 15
+
+
+def _objects(values: np.ndarray, valid: np.ndarray) -> List[Any]:
+    out = values.astype(object)
+    out[~valid] = None
+    return out.tolist()
+
+
+def _isin(raw: np.ndarray, values: Tuple[str, ...]) -> np.ndarray:
+    return np.isin(raw, np.array(values, dtype=raw.dtype.kind))
+
+
+# ── one array rule per scalar converter ─────────────────────────────────────
+# each returns (python values, rows the rule is sure about)
+
+def _unstripped(sentinels: Tuple[str, ...], scale: Callable[[np.ndarray], np.ndarray]) -> Rule:
+    # TEMP/DEWP/MAX/MIN/SLP/STP compare the raw string against their sentinels
+    def rule(raw: np.ndarray) -> Tuple[List[Any], np.ndarray]:
+        values, parsed, exact = _numeric(raw)
+        valid = parsed & ~_isin(raw, sentinels)
+        return _objects(scale(values), valid), exact | ~valid
+    return rule
+
+
+def _stripped(sentinels: Tuple[str, ...], factor: float) -> Rule:
+    # a parsed value is never "", and only strings that parse to a sentinel's
+    # number can strip to that sentinel: strip just those
+    numbers = [float(v) for v in sentinels if v]
+
+    def rule(raw: np.ndarray) -> Tuple[List[Any], np.ndarray]:
+        values, parsed, exact = _numeric(raw)
+        suspect = np.flatnonzero(parsed & np.isin(values, numbers))
+        valid = parsed.copy()
+        valid[suspect] = ~_isin(np.strings.strip(raw[suspect]), sentinels)
+        return _objects(values * factor, valid), exact | ~valid
+    return rule
+
+
+def _coordinate(raw: np.ndarray) -> Tuple[List[Any], np.ndarray]:
+    stripped = np.strings.strip(raw)
+    missing = _isin(np.strings.lower(stripped), ("", "null"))
+    values, parsed, exact = _numeric(stripped)
+    # float(s) sees what strip_flag sees only when s is nothing but [0-9.-];
+    # anything else ("1e3", "+1", "inf", "1 2") is left to the scalar path,
+    # as is a value float() rejects, which fails the whole row
+    c = _codes(stripped)
+    plain = ~((c != 0) & ((c < _ZERO) | (c > _NINE)) & (c != _DOT) & (c != _MINUS)).any(axis=1)
+    return _objects(values, parsed & ~missing), missing | (plain & parsed & exact)
+
+
+def _attribute(raw: np.ndarray) -> Tuple[List[Any], np.ndarray]:
+    stripped = np.strings.strip(raw)
+    digits = np.strings.isdigit(stripped)
+    values, _, exact = _numeric(stripped)
+    ints = np.where(digits & exact, values, 0).astype(np.int64)
+    return _objects(ints, digits), exact | ~digits
+
+
+def _date(raw: np.ndarray) -> Tuple[List[Any], np.ndarray]:
+    # "YYYY-MM-DD" naming a real calendar day is what pydantic turns into a
+    # date; every other spelling is the scalar path's to accept or reject
+    c = _codes(raw).astype(np.int64)
+    if c.shape[1] < 10:
+        return [None] * len(raw), np.zeros(len(raw), dtype=bool)
+    d = c[:, :10] - _ZERO
+    digit_at = d[:, [0, 1, 2, 3, 5, 6, 8, 9]]
+    sure = (
+        ((c[:, 10] == 0) if c.shape[1] > 10 else True)
+        & ((digit_at >= 0) & (digit_at <= 9)).all(axis=1)
+        & (c[:, 4] == _MINUS) & (c[:, 7] == _MINUS)
+    )
+    year = d[:, 0] * 1000 + d[:, 1] * 100 + d[:, 2] * 10 + d[:, 3]
+    month = d[:, 5] * 10 + d[:, 6]
+    day = d[:, 8] * 10 + d[:, 9]
+    sure &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1)
+    year, month, day = np.where(sure, year, 1970), np.where(sure, month, 1), np.where(sure, day, 1)
+    first = (year - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (month - 1)
+    first_day = first.astype("datetime64[D]")
+    sure &= day <= ((first + 1).astype("datetime64[D]") - first_day).astype(np.int64)
+    return _objects(first_day + (day - 1), sure), sure
+
+
+def _f_to_c(v: np.ndarray) -> np.ndarray:
+    return (v - 32) * 5.0 / 9.0
+
+
+_RULES: Dict[str, Rule] = {
+    "DATE": _date,
+    "LATITUDE": _coordinate, "LONGITUDE": _coordinate, "ELEVATION": _coordinate,
+    **{f: _unstripped(("", "999.9", "9999.9"), _f_to_c) for f in ("TEMP", "DEWP", "MAX", "MIN")},
+    **{f: _unstripped(("", "9999.9"), lambda v: v) for f in ("SLP", "STP")},
+    "VISIB": _stripped(("", "999.9"), 1.60934),
+    **{f: _stripped(("", "999.9"), 0.514444) for f in ("WDSP", "MXSPD", "GUST")},
+    **{f: _stripped(("", "99.99", "999.9"), 25.4) for f in ("PRCP", "SNDP")},
+}
+for _alias in ("TEMP", "DEWP", "SLP", "STP", "VISIB", "WDSP", "MAX", "MIN"):
+    _RULES[f"{_alias}_ATTRIBUTES"] = _attribute
+
+
+def _frshtt(raw: np.ndarray) -> Tuple[List[List[bool]], np.ndarray]:
+    stripped = np.strings.strip(raw)
+    valid = (np.strings.str_len(stripped) == 6) & np.strings.isdigit(stripped)
+    c = _codes(stripped)
+    if c.shape[1] < 6:
+        c = np.pad(c, ((0, 0), (0, 6 - c.shape[1])))
+    return [(valid & (c[:, i] == _ZERO + 1)).tolist() for i in range(6)], _printable(raw)
+
+
+def _layout(
+    buf: np.ndarray, starts: np.ndarray, ends: np.ndarray, width: int
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """(opens, closes) quote offsets, (lines, width) each, if every line is exactly "…","…",…"""
+    quotes = np.flatnonzero(buf == _QUOTE)
+    if len(quotes) != 2 * width * len(starts):
+        return None
+    opens, closes = quotes[0::2].reshape(-1, width), quotes[1::2].reshape(-1, width)
+    # nothing but one comma between a closing quote and the next opening one
+    if not (
+        (opens[:, 0] == starts).all() and (closes[:, -1] == ends - 1).all()
+        and (opens[:, 1:] == closes[:, :-1] + 2).all()
+        and (buf[closes[:, :-1] + 1] == _COMMA).all()
+    ):
+        return None
+    return opens, closes
+
+
+def _as_bytes(parts: List[np.ndarray]) -> np.ndarray:
+    """Stack (rows, width) byte matrices into one fixed-width bytes array."""
+    width = max(max(p.shape[1] for p in parts), 1)
+    if any(p.shape[1] != width for p in parts):
+        parts = [np.pad(p, ((0, 0), (0, width - p.shape[1]))) for p in parts]
+    # NOAA's fixed column widths make this a single copy per column and batch
+    return np.concatenate(parts).view(f"S{width}").ravel()
+
+
+def _convert(alias: str, raw: np.ndarray) -> Tuple[List[Any], np.ndarray]:
+    """One column through its array rule; STATION, NAME, PRCP_ATTRIBUTES pass through."""
+    if alias not in _RULES:
+        return raw.astype("U").tolist(), np.ones(len(raw), dtype=bool)
+    values, ok = _RULES[alias](raw)
+    if raw.dtype.kind == "U":           # bytes columns are printable ASCII by construction
+        ok &= _printable(raw)
+    return values, ok
+
+
+class _QuotedColumns:
+    """
+    The columns of a body laid out as `"v","v",…` lines, located from the
+    quote positions in the raw bytes and cut out as fixed-width bytes arrays.
+
+    NOAA pads every column to a fixed width, so usually all lines share one
+    layout: the body is then a (rows, line length) `grid` and a column is a
+    slice of it, with `starts`/`ends` holding one offset per column. Otherwise
+    they hold (columns, rows) offsets into `buf`.
+    """
+    def __init__(self, buf: np.ndarray, rows: int, starts: np.ndarray, ends: np.ndarray,
+                 grid: Optional[np.ndarray] = None):
+        self.buf, self.rows, self.starts, self.ends, self.grid = buf, rows, starts, ends, grid
+
+    @classmethod
+    def parse(cls, body: str, width: int) -> Optional["_QuotedColumns"]:
+        """None when the body strays from that layout anywhere, so csv.reader has to decide."""
+        if not body.isascii():
+            return None
+        buf = np.frombuffer(body.encode("ascii"), dtype=np.uint8)
+        ends = np.flatnonzero(buf == _NL)
+        if np.count_nonzero(buf < 32) != len(ends) or (buf == 127).any():
+            return None                 # control characters besides the line breaks
+        if ends.size == 0 or ends[-1] != len(buf) - 1:
+            ends = np.append(ends, len(buf))
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        lengths = ends - starts
+        if not lengths.all():
+            return None                 # blank lines
+        if (lengths == lengths[0]).all():
+            step = int(lengths[0]) + 1
+            grid = np.concatenate((buf, np.zeros(len(starts) * step - len(buf), dtype=np.uint8)))
+            grid = grid.reshape(len(starts), step)
+            first = _layout(grid[0], starts[:1], ends[:1], width)
+            if first is not None:
+                opens, closes = first[0][0], first[1][0]
+                if (((grid == _QUOTE) == (grid[0] == _QUOTE)).all()
+                        and (grid[:, closes[:-1] + 1] == _COMMA).all()):
+                    return cls(buf, len(starts), opens + 1, closes, grid)
+        layout = _layout(buf, starts, ends, width)
+        if layout is None:
+            return None
+        opens, closes = layout
+        return cls(buf, len(starts), np.ascontiguousarray(opens.T + 1), np.ascontiguousarray(closes.T))
+
+    def cells(self, j: int) -> np.ndarray:
+        """Column j as a (rows, width) byte matrix, NUL-padded; a view when on the grid."""
+        starts, ends = self.starts[j], self.ends[j]
+        if self.grid is not None:
+            return self.grid[:, starts:ends]
+        lengths = ends - starts
+        offsets = np.arange(int(lengths.max()))
+        at = np.minimum(starts[:, None] + offsets, len(self.buf) - 1)
+        return np.where(offsets < lengths[:, None], self.buf[at], 0).astype(np.uint8)
+
+    def row(self, i: int) -> List[str]:
+        if self.grid is not None:
+            line, starts, ends = self.grid[i], self.starts, self.ends
+        else:
+            line, starts, ends = self.buf, self.starts[:, i], self.ends[:, i]
+        return [line[s:e].tobytes().decode("ascii") for s, e in zip(starts, ends)]
+
+
+class ColumnarReader:
+    """
+    Drop-in for CsvReader: same `read(path)`, same records, array-at-a-time.
+    Rows the array rules cannot vouch for go through a CsvReader, which
+    accounts for and quarantines the ones it rejects.
+    """
+    def __init__(self, logger: logging.Logger, quarantine: Optional[Quarantine] = None):
+        self.logger = logger.getChild(self.__class__.__name__)
+        self.parser = CsvParser(logger)
+        self.builder = PydanticRecordBuilder(logger)
+        self.scalar = CsvReader(self.parser, self.builder, logger, quarantine)
+
+    def read(self, path: Union[Path, MemberBlob]) -> List[Mapping[str, Any]]:
+        return self.read_many([path])[0]
+
+    def read_many(self, paths: Sequence[Union[Path, MemberBlob]]) -> List[List[Mapping[str, Any]]]:
+        """
+        The records of each file, in order. Files in the NOAA layout are
+        converted together – every column concatenated across the batch and
+        each array rule applied once – so a few hundred rows per station
+        file do not pay NumPy's per-call overhead file after file.
+        """
+        results: List[Optional[List[Mapping[str, Any]]]] = [None] * len(paths)
+        batch: List[Tuple[int, List[str], Dict[str, int], _QuotedColumns]] = []
+        for i, path in enumerate(paths):
+            self.logger.debug(f"Reading {path.name} (columnar)")
+            try:
+                with path.open(encoding="utf-8", newline="") as f:
+                    text = f.read()
+            except Exception:
+                # unreadable: the scalar reader raises the error for the caller
+                results[i] = self.scalar.read(path)
+                continue
+            head, _, body = text.partition("\n")
+            header = next(csv.reader([head]), [])
+            if (not header or "\x00" in text or len(set(header)) != len(header)
+                    or any(alias not in header for alias in _COLUMNS)):
+                # numpy strings drop trailing NULs; odd headers are DictReader's to interpret
+                results[i] = self.scalar.read(path)
+                continue
+            index = {name: j for j, name in enumerate(header)}
+            quoted = _QuotedColumns.parse(body, len(header)) if body else None
+            if quoted is None:
+                results[i] = self._merge(path, header, self._read_rows(header, index, body))
+            else:
+                batch.append((i, header, index, quoted))
+
+        if batch:
+            def column(alias: str) -> np.ndarray:
+                parts = [
+                    q.cells(index[alias]) if alias in index else np.zeros((q.rows, 0), dtype=np.uint8)
+                    for _, _, index, q in batch
+                ]
+                return _as_bytes(parts)
+            records, sure = self._columns(sum(q.rows for *_, q in batch), column)
+            offset = 0
+            for i, header, _, quoted in batch:
+                end = offset + quoted.rows
+                if sure[offset:end].all():
+                    results[i] = records[offset:end]
+                else:
+                    rows = [
+                        records[offset + r] if ok else quoted.row(r)
+                        for r, ok in enumerate(sure[offset:end].tolist())
+                    ]
+                    results[i] = self._merge(paths[i], header, rows)
+                offset = end
+        return results
+
+    # ------------------------------------------------------------------ #
+    def _read_rows(self, header: List[str], index: Dict[str, int], body: str) -> List[Any]:
+        """csv.reader front end: a record per row the array rules vouch for, else the raw row."""
+        rows = [r for r in csv.reader(io.StringIO(body, newline="")) if r]
+        whole = [i for i, r in enumerate(rows) if len(r) == len(header)]
+        cols = list(zip(*(rows[i] for i in whole))) or [() for _ in header]
+
+        def column(alias: str) -> np.ndarray:
+            if alias not in index:
+                return np.zeros(len(whole), dtype="U1")
+            return np.array(cols[index[alias]], dtype=str)
+
+        records, sure = self._columns(len(whole), column)
+        for i, rec, ok in zip(whole, records, sure.tolist()):
+            if ok:
+                rows[i] = rec
+        return rows
+
+    def _columns(
+        self, n: int, column: Callable[[str], np.ndarray]
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """Every model field as one list, zipped into records; plus which rows to trust."""
+        sure = np.ones(n, dtype=bool)
+        columns: List[List[Any]] = []
+        for alias in _COLUMNS:
+            raw = column(alias)
+            heads = np.flatnonzero(np.concatenate(([True], raw[1:] != raw[:-1]))) if n else []
+            if len(heads) * 4 < n:
+                # station metadata repeats row after row: convert each run once
+                values, ok = _convert(alias, raw[heads])
+                runs = np.diff(np.append(heads, n))
+                values, ok = np.repeat(np.array(values, dtype=object), runs).tolist(), np.repeat(ok, runs)
+            else:
+                values, ok = _convert(alias, raw)
+            sure &= ok
+            columns.append(values)
+        flags, ok = _frshtt(column("FRSHTT"))
+        sure &= ok
+        columns.extend(flags)
+        # map() keeps the per-row dict construction in C
+        return list(map(dict, map(zip, repeat(_NAMES), zip(*columns)))), sure
+
+    def _merge(self, path, header: List[str], rows: List[Any]) -> List[Mapping[str, Any]]:
+        """Records as they are, raw rows through the scalar row plan, in file order."""
+        records: List[Mapping[str, Any]] = []
+        fallback = 0
+        for raw, run in groupby(rows, key=lambda row: isinstance(row, list)):
+            if raw:
+                run = list(run)
+                fallback += len(run)
+                self.scalar.build_rows(path, header, run, records)
+            else:
+                records.extend(run)
+        metrics.incr("rows_scalar_fallback", fallback)
+        return records
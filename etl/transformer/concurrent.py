@@ -1,77 +1,233 @@
 import logging
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import multiprocessing
+from collections import deque
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import List, Mapping, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Set, Tuple
 
-from .protocols import Transformer
+from etl import metrics
+from etl.logger import get_logger
+from .protocols import StreamingTransformer
 from .parser import CsvParser
-from .builder import PydanticRecordBuilder
+from .builder import PydanticRecordBuilder, SchemaDriftError
 from .reader import CsvReader
+from .columnar import ColumnarReader
+from .batch import RecordBatch
+from .quarantine import Quarantine, summary
+from .scheduler import ScheduleReport, ScheduleRun, SizeAwareScheduler, plan_tasks
 
-class ConcurrentTransformer(Transformer):
-    """Run CsvReader.read across many files in parallel."""
+class ConcurrentTransformer(StreamingTransformer):
+    """
+    Run CsvReader.read across many files in parallel. With `columnar`, each
+    chunk of files goes through ColumnarReader.read_many instead: same
+    records, converted column-at-a-time with NumPy. `validation` and
+    `validation_sample` pick the row builder's tier (see RowPlan).
+
+    Files are scheduled by size, largest first, on one pool that lives as
+    long as the transformer and serves every concurrent `transform` call
+    (see etl.transformer.scheduler); `close()` shuts it down. `stream`
+    hands each task's records over as it finishes instead of collecting
+    every file first. Records travel as RecordBatches (etl.transformer.batch),
+    one per task, and `transform` concatenates them.
+
+    Threads share one reader and, the work being pure Python, one core.
+    With `use_processes`, every worker process builds its reader once (pool
+    initializer) and sends each chunk's RecordBatch back, pickled as its
+    column arrays, along with the counters it bumped.
+
+    Rejected rows are counted per field and error type; each call logs
+    one summary of those counts. With `quarantine_dir` the rows go to
+    dead-letter files there (etl.transformer.quarantine).
+    """
     def __init__(self, max_workers: int=4,
                   chunk_size: int = 100,
                     logger: Optional[logging.Logger]=None,
-                      use_processes: bool = False):
+                      use_processes: bool = False,
+                        columnar: bool = False,
+                          validation: str = "strict",
+                            validation_sample: float = 0.01,
+                              quarantine_dir: Optional[Path] = None):
         self.max_workers = max_workers
         self.chunk_size  = chunk_size
         self.logger = logger or logging.getLogger(self.__class__.__name__)
-        parser = CsvParser(self.logger)
-        builder = PydanticRecordBuilder(self.logger)
-        self.reader = CsvReader(parser, builder, self.logger)
+        self.columnar = columnar
+        self.validation = validation
+        self.validation_sample = validation_sample
+        self.quarantine_dir = quarantine_dir
+        self.reader = _make_reader(self.logger, columnar, validation, validation_sample, quarantine_dir)
         self._use_processes = use_processes
-        self._executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
-
-    def transform(self, paths: List[Path]) -> List[Mapping[str, Any]]:
-        self.logger.info(f"Parallel transform: {len(paths)} files → chunks of {self.chunk_size}")
-        # split into path‐lists of size chunk_size
-        chunks = [
-            paths[i : i + self.chunk_size]
-            for i in range(0, len(paths), self.chunk_size)
-        ]
-
-        results: List[Mapping[str, Any]] = []
-        with self._executor(
-            max_workers=self.max_workers,
-            thread_name_prefix=(
-                "proc-transform" if self._executor is ProcessPoolExecutor
-                else "thread-transform"
-            )
-        ) as exe:
-            futures = {exe.submit(self._process_batch, c): c for c in chunks}
-            for fut in as_completed(futures):
-                batch = futures[fut]
-                try:
-                    results.extend(fut.result())
-                except Exception as e:
-                    self.logger.error(f"Batch { [p.name for p in batch] } failed: {e!r}")
-
-        self.logger.info(f"Transformed total {len(results)} records")
-        return results
-
-    def _process_batch(self, paths: List[Path]) -> List[Mapping[str, Any]]:
+        self._scheduler: Optional[SizeAwareScheduler] = None
+        self._lock = threading.Lock()
+        self.last_report: Optional[ScheduleReport] = None
+
+    def transform(self, paths: List[Path]) -> RecordBatch:
+        return RecordBatch.concat(records for _, records in self._run(paths, window=None))
+
+    def stream(self, paths: List[Path]) -> Iterator[Tuple[List[Path], RecordBatch]]:
         """
-        Worker function (in its own thread or process).
-        Re-create parser/builder/reader locally to avoid pickling loggers.
+        Yield (files, records) per finished task, in completion order. Only
+        two tasks per worker are scheduled ahead of the consumer, so memory
+        stays flat however many files (or years) `paths` spans, and the
+        consumer starts on the first finished task. `files` leaves out the
+        task's files that could not be read: they were not transformed.
         """
-        # local imports so that each process has its own instances
-        from .parser import CsvParser
-        from .builder import PydanticRecordBuilder
-        from .reader import CsvReader
+        return self._run(paths, window=2 * self.max_workers)
+
+    def _run(
+        self, paths: List[Path], window: Optional[int]
+    ) -> Iterator[Tuple[List[Path], RecordBatch]]:
+        mode = f"{self.max_workers} processes" if self._use_processes else "threads"
+        # heaviest files first, in tasks sized by bytes rather than file count
+        tasks = deque(plan_tasks(paths, self.max_workers, self.chunk_size))
+        self.logger.info(f"Parallel transform ({mode}): {len(paths)} files, largest first")
+        scheduler = self._get_scheduler()
+        fn = _transform_chunk if self._use_processes else self._process_batch
+        run = ScheduleRun()
+        before = metrics.counters()
+        futures: Dict[Future, List[Path]] = {}
+
+        def top_up() -> None:
+            while tasks and (window is None or len(futures) < window):
+                size, chunk = tasks.popleft()
+                futures[scheduler.submit(fn, (chunk,), size, run)] = chunk
+            run.sealed = not tasks
+
+        total = 0
+        try:
+            top_up()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    batch = futures.pop(fut)
+                    try:
+                        if self._use_processes:
+                            records, failed, counts = fut.result()
+                            for name, value in counts.items():
+                                metrics.incr(name, value)
+                        else:
+                            records, failed = fut.result()
+                    except Exception as e:
+                        metrics.incr("errors")
+                        self.logger.error(f"Batch { [p.name for p in batch] } failed: {e!r}")
+                        continue
+                    top_up()
+                    total += len(records)
+                    yield [p for i, p in enumerate(batch) if i not in failed], records
+                top_up()
+        finally:
+            for fut in futures:
+                fut.cancel()
+
+        report = run.report()
+        self.last_report = report
+        metrics.gauge("transform_tail_seconds", report.tail)
+        metrics.gauge("transform_task_p99_seconds", report.percentile(0.99))
+        for worker, share in report.utilisation().items():
+            metrics.gauge(f"transform_utilisation.{worker}", share)
+        self.logger.info(f"Transformed total {total} records; {report.summary()}")
+        rejected = summary(before, metrics.counters())
+        if rejected:
+            where = f" (quarantined under {self.quarantine_dir})" if self.quarantine_dir else ""
+            self.logger.warning(f"Rejected {rejected}{where}")
+
+    def close(self) -> None:
+        """Shut the worker pool down; the next `transform` starts a new one."""
+        with self._lock:
+            scheduler, self._scheduler = self._scheduler, None
+        if scheduler is not None:
+            scheduler.close()
+
+    def _get_scheduler(self) -> SizeAwareScheduler:
+        # one pool for the whole run: every year's transform calls share it
+        with self._lock:
+            if self._scheduler is None:
+                self._scheduler = SizeAwareScheduler(self._executor(), self.max_workers, self.logger)
+            return self._scheduler
+
+    def _executor(self):
         if not self._use_processes:
-            # Threads: reuse the shared reader
-            local_reader = self.reader
-        else:
-            # Processes: build a fresh reader in this child process
-            parser  = CsvParser(self.logger)
-            builder = PydanticRecordBuilder(self.logger)
-            local_reader  = CsvReader(parser, builder, self.logger)
-
-        out: List[Mapping[str, Any]] = []
-        for p in paths:
-            try:
-                out.extend(local_reader.read(p))
-            except Exception as e:
-                self.logger.error(f"{p.name} in batch failed: {e!r}")
-        return out
+            return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="thread-transform")
+        # forked children would inherit the download engine's threads and locks mid-flight
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(
+                self.logger.name, self.logger.getEffectiveLevel(),
+                self.columnar, self.validation, self.validation_sample, self.quarantine_dir,
+            ),
+        )
+
+    def _process_batch(self, paths: List[Path]) -> Tuple[RecordBatch, Set[int]]:
+        """Worker function in thread mode: the shared reader is thread-safe."""
+        return _read_chunk(self.reader, self.columnar, paths, self.logger)
+
+
+def _make_reader(
+    logger: logging.Logger, columnar: bool, validation: str, validation_sample: float,
+    quarantine_dir: Optional[Path] = None,
+):
+    quarantine = Quarantine(quarantine_dir, logger) if quarantine_dir is not None else None
+    if columnar:
+        return ColumnarReader(logger, quarantine)
+    builder = PydanticRecordBuilder(logger, validation, validation_sample)
+    return CsvReader(CsvParser(logger), builder, logger, quarantine)
+
+
+def _read_chunk(
+    reader, columnar: bool, paths: List[Path], logger: logging.Logger
+) -> Tuple[RecordBatch, Set[int]]:
+    """The chunk's records and the indices of the files that failed to read."""
+    out: List[Dict[str, Any]] = []
+    failed: Set[int] = set()
+    if columnar:
+        try:
+            for records in reader.read_many(paths):
+                out.extend(records)
+            return RecordBatch.from_records(out), failed
+        except Exception as e:
+            # retry file by file so one bad file cannot sink its whole chunk
+            logger.error(f"Columnar batch failed ({e!r}); reading its files one by one")
+            out = []
+    for i, p in enumerate(paths):
+        try:
+            out.extend(reader.read(p))
+        except SchemaDriftError:
+            failed.add(i)                   # counted and logged by the reader
+        except Exception as e:
+            metrics.incr("errors")
+            failed.add(i)
+            logger.error(f"{p.name} in batch failed: {e!r}")
+    return RecordBatch.from_records(out), failed
+
+
+# ---------------------------------------------------------------------- #
+# process mode: one reader per worker process, built by the pool initializer
+
+_worker: Optional[Tuple[Any, bool, logging.Logger]] = None
+
+
+def _init_worker(
+    logger_name: str, level: int, columnar: bool, validation: str, validation_sample: float,
+    quarantine_dir: Optional[Path],
+) -> None:
+    global _worker
+    logger = get_logger(logger_name, logging.getLevelName(level))
+    reader = _make_reader(logger, columnar, validation, validation_sample, quarantine_dir)
+    _worker = (reader, columnar, logger)
+
+
+def _transform_chunk(paths: List[Path]) -> Tuple[RecordBatch, Set[int], Dict[str, float]]:
+    """One chunk in a worker process → (its records, failed files, counters bumped meanwhile)."""
+    reader, columnar, logger = _worker
+    before = metrics.counters()
+    records, failed = _read_chunk(reader, columnar, paths, logger)
+    counts = {
+        name: value - before.get(name, 0)
+        for name, value in metrics.counters().items()
+        if value != before.get(name, 0)
+    }
+    return records, failed, counts
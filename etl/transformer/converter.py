@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Optional, List
+from typing import Any, Callable, Optional, List
 from .utils import strip_flag
 
 class Converter(ABC):
@@ -86,11 +86,17 @@ class PrecipSnowConverter(Converter):
             return None
         return inches * 25.4
 
+def _unchanged(raw: Any) -> Any:
+    return raw
+
 class ConverterRegistry:
     def __init__(self, converters: List[Converter]) -> None:
         self._converters = converters
-    def convert(self, field: str, raw: Any) -> Any:
+    def resolve(self, field: str) -> Callable[[Any], Any]:
+        """The convert callable for `field` (identity if none supports it), looked up once."""
         for conv in self._converters:
             if conv.supports(field):
-                return conv.convert(raw)
-        return raw
+                return conv.convert
+        return _unchanged
+    def convert(self, field: str, raw: Any) -> Any:
+        return self.resolve(field)(raw)
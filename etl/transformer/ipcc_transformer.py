@@ -1,15 +1,35 @@
 # etl/transformer/ipcc_transformer.py
+import hashlib
+import json
 import logging
+import multiprocessing
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
+import pdfminer
 from pdfminer.high_level import extract_text
+from pdfminer.layout import LAParams
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
 
 class IPCCTransformer:
     """
-    Extract text from a PDF and yield chunks (≤250 words)
-    with {section, paragraph, text}.
+    Extract text from a PDF and yield chunks (≤ `max_words` words)
+    with {source, section, paragraph, text, hash}: `source` is the PDF's
+    file name, `hash` the chunk's content hash (`chunk_hash`).
+
+    Text is extracted `pages_per_task` pages at a time across `processes`
+    worker processes (None: one per core) and joined back in page order –
+    pdfminer lays every page out on its own, so the text is the same as
+    one `extract_text` over the whole file. With `cache_dir` it is kept in
+    `{cache_dir}/{pdf sha256}-{params}.txt`, keyed by the PDF's content
+    and the pdfminer version and layout parameters, so an unchanged PDF
+    is never extracted twice.
     """
 
     HEADER_FOOTER_RE = re.compile(r"^\s*(SPM|Summary for Policymakers|\d+)\s*$")
@@ -24,22 +44,79 @@ class IPCCTransformer:
     )
     MAX_WORDS = 250
 
-    def __init__(self, logger: logging.Logger) -> None:
+    def __init__(
+        self,
+        logger: logging.Logger,
+        processes: Optional[int] = None,
+        pages_per_task: int = 16,
+        cache_dir: Optional[Path] = None,
+        laparams: Optional[LAParams] = None,
+        max_words: Optional[int] = None,
+    ) -> None:
         self.log = (logger or logging.getLogger(__name__)).getChild(self.__class__.__name__)
+        self.processes = processes if processes is not None else (os.cpu_count() or 1)
+        self.pages_per_task = max(1, pages_per_task)
+        self.cache_dir = cache_dir
+        self.laparams = laparams or LAParams()
+        self.max_words = max_words or self.MAX_WORDS
 
     # --------------------------------------------------------------------- #
     def transform(self, pdf_paths: List[Path]) -> List[Dict[str, Any]]:
         all_chunks: list[dict[str, Any]] = []
         for pdf in pdf_paths:
-            self.log.info("Extracting text ⇒ %s", pdf)
-            raw_text = extract_text(str(pdf))
+            raw_text = self._extract(Path(pdf))
             chunks   = self._process_text(raw_text)
+            for chunk in chunks:
+                chunk["source"] = Path(pdf).name
+                chunk["hash"]   = chunk_hash(chunk["text"])
             all_chunks.extend(chunks)
 
         self.log.info("IPCC transform: %d chunks", len(all_chunks))
         return all_chunks
 
     # --------------------------------------------------------------------- #
+    def _extract(self, pdf: Path) -> str:
+        cached = self._cache_path(pdf)
+        if cached is not None and cached.is_file():
+            self.log.info("Text of %s served from cache %s", pdf.name, cached.name)
+            return cached.read_text(encoding="utf-8")
+
+        pages = _page_count(pdf)
+        ranges = [
+            (start, min(start + self.pages_per_task, pages))
+            for start in range(0, pages, self.pages_per_task)
+        ] or [(0, 0)]
+        workers = min(self.processes, len(ranges))
+        self.log.info("Extracting text ⇒ %s (%d pages, %d tasks, %d processes)",
+                      pdf, pages, len(ranges), workers)
+        args = [(str(pdf), start, stop, self.laparams) for start, stop in ranges]
+        if workers <= 1:
+            parts = [_extract_pages(*a) for a in args]
+        else:
+            # spawned, not forked: the caller may be running download threads
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                parts = list(pool.map(_extract_pages, *zip(*args)))       # map keeps page order
+        text = "".join(parts)
+
+        if cached is not None:
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_suffix(".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            tmp.replace(cached)
+        return text
+
+    def _cache_path(self, pdf: Path) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.sha256()
+        with pdf.open("rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        params = json.dumps([pdfminer.__version__, vars(self.laparams)], sort_keys=True, default=str)
+        return self.cache_dir / f"{digest.hexdigest()}-{hashlib.sha256(params.encode()).hexdigest()[:12]}.txt"
+
     def _process_text(self, raw: str) -> List[Dict[str, Any]]:
         current_section  = "unknown"
         paragraph_num    = 0
@@ -99,10 +176,10 @@ class IPCCTransformer:
                 self.log.debug("dropping front-matter paragraph %r", paragraph_text[:60])
                 return paragraph_num, []            
 
-        # split into ≤ MAX_WORDS chunks
+        # split into ≤ max_words chunks
         words = paragraph_text.split()
-        for i in range(0, len(words), self.MAX_WORDS):
-            chunk_words = words[i : i + self.MAX_WORDS]
+        for i in range(0, len(words), self.max_words):
+            chunk_words = words[i : i + self.max_words]
             out.append(
                 {
                     "section": section,
@@ -113,3 +190,26 @@ class IPCCTransformer:
 
         return paragraph_num, []
 
+
+
+def chunk_hash(text: str) -> str:
+    """
+    Content hash of a chunk: its text alone, what its embedding depends on.
+    Section and paragraph are metadata a re-chunking may change freely.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _page_count(pdf: Path) -> int:
+    with pdf.open("rb") as f:
+        try:
+            return int(resolve1(PDFDocument(PDFParser(f)).catalog["Pages"])["Count"])
+        except Exception:
+            # no usable page tree count: walk the pages instead
+            f.seek(0)
+            return sum(1 for _ in PDFPage.get_pages(f))
+
+
+def _extract_pages(path: str, start: int, stop: int, laparams: LAParams) -> str:
+    """Text of pages [start, stop) – the worker function, one task per page range."""
+    return extract_text(path, page_numbers=range(start, stop), laparams=laparams)
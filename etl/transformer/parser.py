@@ -1,24 +1,38 @@
 import csv
 import logging
-from typing import Iterator, Mapping, TextIO, Optional
+from typing import Iterator, List, Mapping, TextIO, Optional, Tuple
 from .protocols import Parser
+from .quarantine import RejectLog
+
+FRSHTT_FLAGS = ("fog", "rain", "snow", "hail", "thunder", "tornado")
+
+def frshtt_flags(raw: Optional[str]) -> List[bool]:
+    """FRSHTT digits → six booleans; anything but six digits means no flags."""
+    bits = (raw or "").strip()
+    return [bit=="1" for bit in bits] if bits.isdigit() and len(bits)==6 else [False]*6
 
 class CsvParser(Parser):
     """Reads comma-quoted CSV rows and splits the FRSHTT flags."""
     def __init__(self, logger: Optional[logging.Logger]=None):
         self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.rejects = RejectLog(self.logger)
 
     def parse(self, f: TextIO) -> Iterator[Mapping[str, str]]:
         reader = csv.DictReader(f)
         for lineno, row in enumerate(reader, start=1):
             try:
-                bits = (row.get("FRSHTT") or "").strip()
-                flags = [bit=="1" for bit in bits] if bits.isdigit() and len(bits)==6 else [False]*6
-                for name, val in zip(
-                    ("fog","rain","snow","hail","thunder","tornado"), flags
-                ):
+                for name, val in zip(FRSHTT_FLAGS, frshtt_flags(row.get("FRSHTT"))):
                     row[f"frshtt_{name}"] = val
                 yield row
             except Exception as e:
-                self.logger.warning(f"Line {lineno} parse error: {e!r} → {row}")
+                self.rejects(f"line {lineno}", e)
                 continue
+
+    def parse_rows(self, f: TextIO) -> Tuple[List[str], Iterator[List[str]]]:
+        """
+        Header plus plain csv.reader rows (blank lines skipped, as DictReader
+        does), for a RowPlan compiled once per header; the plan splits FRSHTT.
+        """
+        reader = csv.reader(f)
+        header = next(reader, [])
+        return header, (row for row in reader if row)
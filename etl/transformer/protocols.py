@@ -1,6 +1,9 @@
 # etl/transformer/protocols.py
 from pathlib import Path
-from typing import Iterator, Mapping, Any, List, Protocol
+from typing import (
+    Any, Callable, Iterable, Iterator, List, Mapping, Optional, Protocol, Sequence, TextIO, Tuple,
+    runtime_checkable,
+)
 
 class Parser(Protocol):
     """Split raw text → sequence of raw rows (dict[str,str])."""
@@ -12,7 +15,34 @@ class RecordBuilder(Protocol):
     def build(self, raw: Mapping[str, str]) -> Mapping[str, Any]:
         ...
 
+@runtime_checkable
+class RowParser(Protocol):
+    """Split raw text → header + positional rows (list[str]) for a compiled plan."""
+    def parse_rows(self, f: TextIO) -> Tuple[List[str], Iterator[List[str]]]:
+        ...
+
+class RowPlan(Protocol):
+    """A builder compiled for one header: positional rows → rich dicts, lazily."""
+    def build(
+        self,
+        rows: Iterable[Sequence[Optional[str]]],
+        reject: Callable[[Sequence[Optional[str]], Exception], None],
+    ) -> Iterator[Mapping[str, Any]]:
+        ...
+
+@runtime_checkable
+class CompiledRecordBuilder(Protocol):
+    """Compile once per header → RowPlan for every row of that file."""
+    def compile(self, header: Sequence[str]) -> RowPlan:
+        ...
+
 class Transformer(Protocol):
-    """Take many file-paths → flat list of rich dicts."""
-    def transform(self, paths: List[Path]) -> List[Mapping[str, Any]]:
+    """Take many file-paths → flat sequence of rich dicts (a list or a RecordBatch)."""
+    def transform(self, paths: List[Path]) -> Sequence[Mapping[str, Any]]:
+        ...
+
+@runtime_checkable
+class StreamingTransformer(Transformer, Protocol):
+    """Take many file-paths → (files, their rich dicts) batches, in completion order."""
+    def stream(self, paths: List[Path]) -> Iterator[Tuple[List[Path], Sequence[Mapping[str, Any]]]]:
         ...
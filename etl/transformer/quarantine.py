@@ -0,0 +1,257 @@
+# etl/transformer/quarantine.py
+"""
+Rejected rows: accounting and a dead-letter quarantine.
+
+Every refused row is reduced to a reason code – the field at fault and
+the error type (pydantic's own type for validation errors, e.g.
+`record_date / date_from_datetime_parsing`; `row / too_many_fields` for
+a row's shape) – and counted under `rows_rejected.<field>.<code>`.
+Logs get a rate-limited sample of rows and, per transform, one summary
+of the counters; never a line per row.
+
+With a `Quarantine`, the rows themselves go to a compact JSON Lines
+dead-letter file per year and station (or country),
+
+    {root}/{year}/{group}.jsonl
+
+written in bulk once per source file. Each write replaces everything
+the source quarantined before – an empty one clears it – so reruns
+neither pile up copies nor leave behind rows a fix now accepts; a small
+index per source, {root}/_sources/, says which files hold its rows.
+`replay` runs them through a
+builder again – after a converter fix, say – and leaves behind only
+the rows that still fail.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from etl import metrics
+
+REST = "_rest"                      # key for fields beyond the header, as DictReader's restkey
+_UNSAFE = re.compile(r"[^\w.-]")
+
+
+class RowError(ValueError):
+    """A row refused before validation: `field` is the column at fault ("row": its shape), `code` why."""
+    def __init__(self, field: str, code: str, message: str) -> None:
+        super().__init__(message)
+        self.field, self.code = field, code
+
+
+def reason(error: Exception) -> Tuple[str, str]:
+    """(field, code) for a rejected row's error."""
+    if isinstance(error, ValidationError):
+        first = error.errors()[0]
+        loc = first.get("loc") or ("row",)
+        return str(loc[0]), first["type"]
+    if isinstance(error, RowError):
+        return error.field, error.code
+    return "row", type(error).__name__
+
+
+def describe(error: Exception) -> str:
+    """One line about the error: pydantic's first message and input, else str(error)."""
+    if isinstance(error, ValidationError):
+        first = error.errors()[0]
+        return f"{first['msg']} (input {first.get('input')!r})"
+    return str(error) or type(error).__name__
+
+
+def summary(before: Mapping[str, float], after: Mapping[str, float], metric: str = "rows_rejected") -> str:
+    """"N rows: field/code ×k, ..." from two counter snapshots; "" when nothing was rejected."""
+    prefix = f"{metric}."
+    counts = {
+        name[len(prefix):].replace(".", "/", 1): after[name] - before.get(name, 0)
+        for name in after
+        if name.startswith(prefix) and after[name] != before.get(name, 0)
+    }
+    if not counts:
+        return ""
+    total = after.get(metric, 0) - before.get(metric, 0)
+    top = sorted(counts.items(), key=lambda kv: -kv[1])
+    return f"{total:.0f} rows: " + ", ".join(f"{k} ×{v:.0f}" for k, v in top)
+
+
+class RejectLog:
+    """
+    Count rejected rows per reason and log a sample of them: at most
+    `burst` per `interval` seconds, the next one saying how many were
+    left out meanwhile.
+    """
+    def __init__(self, logger: logging.Logger, metric: str = "rows_rejected",
+                 burst: int = 5, interval: float = 60.0):
+        self.logger = logger
+        self.metric = metric
+        self.burst = burst
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._window = 0.0
+        self._logged = 0
+        self._dropped = 0
+
+    def __call__(self, source: str, error: Exception) -> Tuple[str, str]:
+        """Account for one rejected row of `source`; returns its (field, code)."""
+        field, code = reason(error)
+        metrics.incr(self.metric)
+        metrics.incr(f"{self.metric}.{field}.{code}")
+        now = time.monotonic()
+        with self._lock:
+            if now - self._window >= self.interval:
+                self._window, self._logged = now, 0
+            if self._logged >= self.burst:
+                self._dropped += 1
+                return field, code
+            self._logged += 1
+            dropped, self._dropped = self._dropped, 0
+        more = f" (+{dropped} more not shown)" if dropped else ""
+        self.logger.warning(f"{source}: rejected row, {field}/{code}: {describe(error)}{more}")
+        return field, code
+
+
+@dataclass
+class DeadLetter:
+    """One rejected row: where it belongs, why it failed, and its raw fields."""
+    year: str
+    group: str
+    source: str
+    field: str
+    code: str
+    error: str
+    raw: Any
+
+
+def gsod_letter(source: str, raw: Mapping[str, Any], error: Exception, field: str, code: str) -> DeadLetter:
+    """A GSOD row's letter, filed under the year of its DATE and its STATION."""
+    date = str(raw.get("DATE") or "")
+    year = date[:4] if date[:4].isdigit() else "unknown"
+    station = str(raw.get("STATION") or "") or Path(source).stem
+    return DeadLetter(year, station, source, field, code, describe(error), dict(raw))
+
+
+def gsod_raw(header: Sequence[str], row: Sequence[Optional[str]]) -> Dict[str, Any]:
+    """A positional row as DictReader would see it, extra fields under REST."""
+    raw: Dict[str, Any] = dict(zip(header, row))
+    if len(row) > len(header):
+        raw[REST] = list(row[len(header):])
+    return raw
+
+
+class Quarantine:
+    """Dead-letter files of rejected rows, one per year and group (station or country)."""
+    def __init__(self, root: Path, logger: Optional[logging.Logger] = None):
+        self.root = Path(root)
+        self.logger = (logger or logging.getLogger(__name__)).getChild(self.__class__.__name__)
+        self._lock = threading.Lock()
+
+    def write(self, letters: Iterable[DeadLetter], sources: Optional[Iterable[str]] = None) -> int:
+        """
+        File `letters` as all the rejected rows of `sources` (by default the
+        letters' own), one write per dead-letter file; returns how many.
+        Whatever those sources had quarantined before is dropped, so
+        `write([], [source])` clears a source that now reads cleanly.
+        """
+        files: Dict[Path, List[DeadLetter]] = defaultdict(list)
+        for letter in letters:
+            files[self.path(letter.year, letter.group)].append(letter)
+        sources = {x.source for batch in files.values() for x in batch} if sources is None else set(sources)
+        with self._lock:
+            stale = {self.root / rel for source in sources for rel in self._indexed(source)}
+            for path in stale | set(files):
+                batch = [x for x in self._read(path) if x.source not in sources] if path.exists() else []
+                batch += files.get(path, [])
+                if batch:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = path.with_suffix(".tmp")
+                    tmp.write_text(_lines(batch), encoding="utf-8")
+                    os.replace(tmp, path)
+                else:
+                    path.unlink(missing_ok=True)
+            for source in sources:
+                self._index(source, [p for p, batch in files.items() if any(x.source == source for x in batch)])
+        return sum(map(len, files.values()))
+
+    def path(self, year: str, group: str) -> Path:
+        return self.root / _UNSAFE.sub("_", year) / f"{_UNSAFE.sub('_', group) or 'unknown'}.jsonl"
+
+    def letters(self, years: Optional[Iterable[Any]] = None) -> Iterator[DeadLetter]:
+        """Every quarantined row, file by file."""
+        for path in self._files(years):
+            yield from self._read(path)
+
+    def replay(self, build: Callable[[Any], Any], years: Optional[Iterable[Any]] = None) -> Iterator[Any]:
+        """
+        Yield `build(raw)` for every quarantined row it now accepts. Each
+        file is rewritten with the rows that still fail (and removed when
+        none do) once the caller has taken all of its records.
+        """
+        for path in self._files(years):
+            kept: List[DeadLetter] = []
+            for letter in self._read(path):
+                try:
+                    record = build(letter.raw)
+                except Exception as e:
+                    letter.field, letter.code = reason(e)
+                    letter.error = describe(e)
+                    kept.append(letter)
+                    continue
+                yield record
+            with self._lock:
+                if kept:
+                    tmp = path.with_suffix(".tmp")
+                    tmp.write_text(_lines(kept), encoding="utf-8")
+                    os.replace(tmp, path)
+                else:
+                    path.unlink()
+            self.logger.info(f"Replayed {path.parent.name}/{path.name}: {len(kept)} rows still rejected")
+
+    # ------------------------------------------------------------------ #
+    def _files(self, years: Optional[Iterable[Any]]) -> List[Path]:
+        if years is None:
+            return sorted(self.root.glob("*/*.jsonl"))
+        return sorted(p for year in years for p in (self.root / _UNSAFE.sub("_", str(year))).glob("*.jsonl"))
+
+    def _index_path(self, source: str) -> Path:
+        return self.root / "_sources" / f"{_UNSAFE.sub('_', source)}.txt"
+
+    def _indexed(self, source: str) -> List[str]:
+        """Dead-letter files (relative to root) last written with rows of `source`."""
+        try:
+            return self._index_path(source).read_text(encoding="utf-8").split()
+        except OSError:
+            return []
+
+    def _index(self, source: str, paths: List[Path]) -> None:
+        index = self._index_path(source)
+        if not paths:
+            index.unlink(missing_ok=True)
+            return
+        index.parent.mkdir(parents=True, exist_ok=True)
+        index.write_text("".join(f"{p.relative_to(self.root).as_posix()}\n" for p in sorted(paths)),
+                         encoding="utf-8")
+
+    @staticmethod
+    def _read(path: Path) -> Iterator[DeadLetter]:
+        year, group = path.parent.name, path.stem
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    d = json.loads(line)
+                    yield DeadLetter(year, group, d["source"], d["field"], d["code"], d["error"], d["raw"])
+
+
+def _lines(letters: Iterable[DeadLetter]) -> str:
+    return "".join(
+        json.dumps({"source": x.source, "field": x.field, "code": x.code, "error": x.error, "raw": x.raw},
+                   ensure_ascii=False, default=str) + "\n"
+        for x in letters
+    )
@@ -1,28 +1,129 @@
 import logging
 from pathlib import Path
-from typing import List, Mapping, Any
-from .protocols import Parser, RecordBuilder
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, Optional, Sequence, Union
+from etl import metrics
+from etl.downloader.members import MemberBlob
+from .builder import SchemaDriftError
+from .parser import FRSHTT_FLAGS, frshtt_flags
+from .protocols import CompiledRecordBuilder, Parser, RecordBuilder, RowParser
+from .quarantine import REST, DeadLetter, Quarantine, RejectLog, gsod_letter, gsod_raw
 
 class CsvReader:
-    """Reads & validates every row; logs errors per row or per file."""
-    def __init__(self, parser: Parser, builder: RecordBuilder, logger: logging.Logger):
+    """
+    Reads & validates every row. Rejected rows are counted per reason and
+    sampled into the log (RejectLog) and, with a `quarantine`, written to
+    its dead-letter files in one go per file; file-level errors propagate.
+    When the parser yields positional rows and the builder compiles per
+    header, each file is read through one plan compiled from its header.
+    `iter_read` yields records as they are built; `read` collects one
+    file's worth; `replay` rebuilds quarantined rows.
+    """
+    def __init__(
+        self,
+        parser: Parser,
+        builder: RecordBuilder,
+        logger: logging.Logger,
+        quarantine: Optional[Quarantine] = None,
+    ):
         self.parser, self.builder = parser, builder
         self.logger = logger.getChild(self.__class__.__name__)
+        self.quarantine = quarantine
+        self.rejects = RejectLog(self.logger)
 
-    def read(self, path: Path) -> List[Mapping[str, Any]]:
-        self.logger.debug(f"Reading {path.name}")
+    def read(self, path: Union[Path, MemberBlob]) -> List[Mapping[str, Any]]:
+        """
+        Every record of one file. Schema drift, open and decode errors
+        propagate: a file read only in part is not read, and an empty
+        result always means a file without valid rows.
+        """
         records: List[Mapping[str, Any]] = []
         try:
-            with open(path, encoding="utf-8", newline="") as f:
+            records.extend(self.iter_read(path))
+        except SchemaDriftError as e:
+            # sampling caught the model disagreeing: none of the unchecked rows can be trusted
+            metrics.incr("files_aborted")
+            self.logger.error(f"{path.name} aborted, schema drift: {e}")
+            raise
+        return records
+
+    def iter_read(self, path: Union[Path, MemberBlob]) -> Iterator[Mapping[str, Any]]:
+        """
+        Yield one file's records as its rows are built. Rejected rows are
+        counted and quarantined; open/decode errors and SchemaDriftError
+        (raised after earlier records went out) are the caller's to handle.
+        """
+        # a MemberBlob is parsed straight from memory (zero-disk mode)
+        self.logger.debug(f"Reading {path.name}")
+        letters: List[DeadLetter] = []
+        try:
+            with path.open(encoding="utf-8", newline="") as f:
+                if isinstance(self.parser, RowParser) and isinstance(self.builder, CompiledRecordBuilder):
+                    header, rows = self.parser.parse_rows(f)
+                    yield from self.builder.compile(header).build(rows, self._rejecter(path, header, letters))
+                    return
                 for raw in self.parser.parse(f):
                     try:
-                        records.append(self.builder.build(raw))
+                        record = self.builder.build(raw)
                     except Exception as e:
-                        self.logger.error(
-                            f"{path.name} row validation failed: {e!r}",
-                            extra={"raw": raw},
-                        )
+                        # DictReader's restkey is None; the split FRSHTT flags are derived
+                        raw = {
+                            (REST if k is None else k): v for k, v in raw.items()
+                            if not (isinstance(k, str) and k.startswith("frshtt_"))
+                        }
+                        self._reject(path, raw, e, letters)
                         continue
-        except Exception as e:
-            self.logger.error(f"Could not open {path.name}: {e!r}")
-        return records
+                    yield record
+        finally:
+            self._file(path, letters)
+
+    def build_rows(
+        self,
+        path: Union[Path, MemberBlob],
+        header: List[str],
+        rows: Iterable[Sequence[str]],
+        records: List[Mapping[str, Any]],
+    ) -> None:
+        """Append the records of positional `rows` under `header`; rejects are counted and quarantined."""
+        letters: List[DeadLetter] = []
+        try:
+            records.extend(self.builder.compile(header).build(rows, self._rejecter(path, header, letters)))
+        finally:
+            self._file(path, letters)
+
+    def replay(self, years: Optional[Iterable[Any]] = None) -> Iterator[Mapping[str, Any]]:
+        """Records of the quarantined rows the builder now accepts; the rest stay quarantined."""
+        if self.quarantine is None:
+            return iter(())
+        return self.quarantine.replay(self._rebuild, years)
+
+    # ------------------------------------------------------------------ #
+    def _rejecter(
+        self, path: Union[Path, MemberBlob], header: List[str], letters: List[DeadLetter]
+    ) -> Callable[[Sequence[str], Exception], None]:
+        def reject(row: Sequence[str], e: Exception) -> None:
+            self._reject(path, gsod_raw(header, row) if self.quarantine is not None else {}, e, letters)
+        return reject
+
+    def _reject(
+        self, path: Union[Path, MemberBlob], raw: Mapping[str, Any], e: Exception, letters: List[DeadLetter]
+    ) -> None:
+        field, code = self.rejects(path.name, e)
+        if self.quarantine is not None:
+            letters.append(gsod_letter(_source(path), raw, e, field, code))
+
+    def _file(self, path: Union[Path, MemberBlob], letters: List[DeadLetter]) -> None:
+        # one bulk write per source file, empty or not: it replaces the file's earlier letters
+        if self.quarantine is not None:
+            metrics.incr("rows_quarantined", self.quarantine.write(letters, [_source(path)]))
+
+    def _rebuild(self, raw: Mapping[str, Any]) -> Mapping[str, Any]:
+        """A quarantined row through the builder, as CsvParser.parse would have handed it over."""
+        row = {(None if k == REST else k): v for k, v in raw.items()}
+        for name, val in zip(FRSHTT_FLAGS, frshtt_flags(row.get("FRSHTT"))):
+            row[f"frshtt_{name}"] = val
+        return self.builder.build(row)
+
+
+def _source(path: Union[Path, MemberBlob]) -> str:
+    # station file names repeat every year: the year directory tells them apart
+    return f"{path.parent.name}/{path.name}"
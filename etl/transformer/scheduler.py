@@ -0,0 +1,208 @@
+# etl/transformer/scheduler.py
+"""
+Size-aware scheduling for ConcurrentTransformer.
+
+GSOD station files run from a handful of rows to 366 and years differ
+widely, so fixed 100-file chunks leave the tail of a run to one worker
+grinding through a heavy chunk while the rest sit idle. Instead:
+
+• `plan_tasks` sizes every file (bytes on disk or in memory), sorts them
+  largest first and cuts tasks of about `total / (workers × 4)` bytes, so
+  the heavy files go out first, one or a few per task, and the run ends
+  on many small tasks that even out the finish
+• `SizeAwareScheduler` owns one worker pool for the whole run. A
+  dispatcher keeps every worker busy from a single largest-first queue
+  that all concurrent `transform` calls (every year in flight) feed: a
+  worker that frees up takes the heaviest pending task of any year – the
+  effect of work stealing without per-worker deques
+• every call gets a `ScheduleReport`: per-worker utilisation, task latency
+  percentiles and the tail – how long the run went on after the first
+  worker found nothing left to start
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from etl.downloader.members import MemberBlob
+
+Task = Tuple[int, List[Union[Path, MemberBlob]]]
+
+
+def file_size(path: Union[Path, MemberBlob]) -> int:
+    if isinstance(path, MemberBlob):
+        return len(path.data)
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def plan_tasks(paths: List[Union[Path, MemberBlob]], workers: int, max_files: int) -> List[Task]:
+    """(bytes, files) tasks, heaviest first, of about total / (workers × 4) bytes each."""
+    sized = sorted(((file_size(p), i) for i, p in enumerate(paths)), reverse=True)
+    target = max(1, sum(s for s, _ in sized) // max(1, workers * 4))
+    tasks: List[Task] = []
+    size, files = 0, []
+    for s, i in sized:
+        files.append(paths[i])
+        size += s
+        if size >= target or len(files) >= max_files:
+            tasks.append((size, files))
+            size, files = 0, []
+    if files:
+        tasks.append((size, files))
+    return tasks
+
+
+def timed(fn: Callable[..., Any], *args: Any) -> Tuple[str, float, Any]:
+    """Run `fn(*args)` in a worker → (worker id, seconds spent, result)."""
+    me = threading.current_thread()
+    worker = f"pid-{os.getpid()}" if me is threading.main_thread() else me.name
+    start = time.perf_counter()
+    result = fn(*args)
+    return worker, time.perf_counter() - start, result
+
+
+@dataclass
+class ScheduleReport:
+    tasks: int
+    wall: float
+    busy: Dict[str, float]
+    latencies: List[float]
+    tail: float
+
+    def utilisation(self) -> Dict[str, float]:
+        return {w: (b / self.wall if self.wall else 0.0) for w, b in sorted(self.busy.items())}
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> str:
+        util = self.utilisation()
+        mean = sum(util.values()) / len(util) if util else 0.0
+        per_worker = ", ".join(f"{w} {u:.0%}" for w, u in util.items())
+        return (
+            f"{self.tasks} tasks in {self.wall:.2f}s; task p50 {self.percentile(0.5):.2f}s "
+            f"p99 {self.percentile(0.99):.2f}s max {max(self.latencies, default=0.0):.2f}s; "
+            f"tail {self.tail:.2f}s; utilisation {mean:.0%} ({per_worker})"
+        )
+
+
+@dataclass
+class ScheduleRun:
+    """Bookkeeping for one `transform` call's tasks; `sealed` once the last one is submitted."""
+    started: float = field(default_factory=time.perf_counter)
+    pending: int = 0
+    queued: int = 0
+    sealed: bool = False
+    drained_at: Optional[float] = None
+    finished: Optional[float] = None
+    busy: Dict[str, float] = field(default_factory=dict)
+    latencies: List[float] = field(default_factory=list)
+
+    def report(self) -> ScheduleReport:
+        end = self.finished or time.perf_counter()
+        return ScheduleReport(
+            tasks=len(self.latencies),
+            wall=end - self.started,
+            busy=dict(self.busy),
+            latencies=list(self.latencies),
+            tail=end - self.drained_at if self.drained_at is not None else 0.0,
+        )
+
+
+class SizeAwareScheduler:
+    """
+    One executor shared by every caller, fed largest task first. At most
+    `slots` tasks sit in the executor at a time (one more than its workers,
+    so a worker finishing never waits on the dispatcher); the rest wait in
+    one heap, so a freed worker always gets the heaviest pending task.
+    """
+    def __init__(self, executor: Executor, workers: int, logger: Optional[logging.Logger] = None):
+        self.executor = executor
+        self.slots = workers + 1
+        self.logger = (logger or logging.getLogger(__name__)).getChild(self.__class__.__name__)
+        self._heap: List[Tuple[int, int, Callable[..., Any], tuple, Future, ScheduleRun]] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._dispatch, name="transform-dispatch", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], args: tuple, size: int, run: ScheduleRun) -> Future:
+        """Queue `fn(*args)` (picklable for process pools); its Future resolves to fn's result."""
+        fut: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("scheduler is closed")
+            run.pending += 1
+            run.queued += 1
+            heapq.heappush(self._heap, (-size, next(self._seq), fn, args, fut, run))
+            self._cond.notify_all()
+        return fut
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.executor.shutdown(wait=True)
+
+    # ------------------------------------------------------------------ #
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not (self._heap and self._in_flight < self.slots):
+                    self._cond.wait()
+                if self._closed:
+                    for *_, fut, _ in self._heap:
+                        fut.cancel()
+                    return
+                _, _, fn, args, fut, run = heapq.heappop(self._heap)
+                run.queued -= 1
+                if not fut.set_running_or_notify_cancel():
+                    run.pending -= 1        # the caller gave up on it (e.g. a closed stream)
+                    self._cond.notify_all()
+                    continue
+                self._in_flight += 1
+            try:
+                inner = self.executor.submit(timed, fn, *args)
+            except Exception as e:      # a broken pool: fail the task, keep dispatching
+                self._finish(run, fut, error=e)
+                continue
+            inner.add_done_callback(lambda f, fut=fut, run=run: self._finish(run, fut, inner=f))
+
+    def _finish(self, run: ScheduleRun, fut: Future, inner: Optional[Future] = None,
+                error: Optional[BaseException] = None) -> None:
+        now = time.perf_counter()
+        result = None
+        if inner is not None:
+            error = inner.exception()
+            if error is None:
+                worker, seconds, result = inner.result()
+        with self._cond:
+            self._in_flight -= 1
+            run.pending -= 1
+            if error is None:
+                run.busy[worker] = run.busy.get(worker, 0.0) + seconds
+                run.latencies.append(seconds)
+            if run.sealed and run.queued == 0 and run.drained_at is None:
+                run.drained_at = now        # a worker came back and this run had nothing left for it
+            if run.pending == 0:
+                run.finished = now
+            self._cond.notify_all()
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
@@ -36,8 +36,10 @@ export class FunctionHandlerService {
     const db = await mongoSingleton.connect();
 
     // 1) Exact-match on country/iso3
+    // docs without a CO₂ value (older ETL runs stored some) have nothing to report
     const exactFilter = {
       year: { $gte: startYear, $lte: endYear },
+      co2Mt: { $type: 'number' },
       $or: [
         { country: new RegExp(`^${country}$`, 'i') },
         { iso3:    new RegExp(`^${country}$`, 'i') },
@@ -62,7 +64,7 @@ export class FunctionHandlerService {
             },
           },
         },
-        { $match: { year: { $gte: startYear, $lte: endYear } } },
+        { $match: { year: { $gte: startYear, $lte: endYear }, co2Mt: { $type: 'number' } } },
         { $sort: { year: 1 } },
         { $limit: 1000 },
         { $project: { _id: 1, year: 1, country: 1, co2Mt: 1 } },